@@ -0,0 +1,72 @@
+"""
+Event loop latency while documents are made, in the loop vs. with aiter_documents()
+
+A ticker coroutine wants to run every millisecond; we report how late it was at
+worst and the throughput.
+
+USAGE
+    python bench/bench_aio.py [records] [batchsize]
+"""
+from MpApi.Fieldmaker import RowBuilder
+from MpApi.Fieldmaker.aio import aiter_documents
+from MpApi.Fieldmaker.parallel import _build_chunk
+import asyncio
+import sys
+import time
+
+FIELDS = [f"Field{n}Txt" for n in range(10)]
+
+
+async def ticker(lags: list) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def rows(n: int):
+    for ID in range(n):
+        if not ID % 100:
+            await asyncio.sleep(0)  # like a real source, e.g. a database cursor
+        yield {"objId": ID, **{f: f"{f} {ID}" for f in FIELDS}}
+
+
+async def in_loop(rb: RowBuilder, n: int, batchsize: int) -> None:
+    batch = []
+    async for row in rows(n):
+        batch.append(row)
+        if len(batch) == batchsize:
+            _build_chunk(rb.build, batch)
+            batch = []
+
+
+async def in_executor(rb: RowBuilder, n: int, batchsize: int) -> None:
+    async for xml in aiter_documents(rows(n), rb.build, mtype="Object", batchsize=batchsize):
+        pass
+
+
+async def measure(job, rb: RowBuilder, n: int, batchsize: int) -> None:
+    lags = []
+    tick = asyncio.create_task(ticker(lags))
+    start = time.perf_counter()
+    await job(rb, n, batchsize)
+    duration = time.perf_counter() - start
+    tick.cancel()
+    lags.sort()
+    print(
+        f"{job.__name__:12} {n / duration:9,.0f} items/s  max lag {max(lags) * 1000:7.1f} ms"
+        f"  p99 lag {lags[int(len(lags) * 0.99)] * 1000:6.1f} ms"
+    )
+
+
+def main(n: int = 100000, batchsize: int = 1000) -> None:
+    rb = RowBuilder(
+        ID="objId",
+        mapping={f: {"kind": "dataField", "name": f, "dataType": "Varchar"} for f in FIELDS},
+    )
+    for job in (in_loop, in_executor):
+        asyncio.run(measure(job, rb, n, batchsize))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,79 @@
+"""
+moduleItems from rows: constructors vs RowBuilder
+
+USAGE
+    python bench/bench_bulk.py [rows]
+"""
+from MpApi.Fieldmaker import (
+    moduleItem,
+    dataField,
+    vocabularyReference,
+    repeatableGroup,
+    RowBuilder,
+)
+import sys
+import timeit
+
+FIELDS = [f"Field{n}Txt" for n in range(10)]
+
+
+def make_rows(n: int) -> list[dict]:
+    rows = []
+    for ID in range(n):
+        row = {"objId": ID, "Kategorie": 3206642, "Titel": f"Titel {ID}"}
+        for field in FIELDS:
+            row[field] = f"{field} {ID}"
+        rows.append(row)
+    return rows
+
+
+def with_constructors(rows: list[dict]) -> list[moduleItem]:
+    itemL = []
+    for row in rows:
+        mi = moduleItem(ID=row["objId"])
+        for field in FIELDS:
+            mi.add(dataField(name=field, dataType="Varchar", value=row[field]))
+        vocRef = mi.add(
+            vocabularyReference(
+                name="ObjCategoryVoc", ID=30349, instanceName="ObjCategoryVgr"
+            )
+        )
+        vocRef.item(ID=row["Kategorie"])
+        rGrp = mi.add(repeatableGroup(name="ObjObjectTitleGrp"))
+        rGrp.item().add(dataField(name="TitleTxt", value=row["Titel"]))
+        rGrp.update_size()
+        itemL.append(mi)
+    return itemL
+
+
+def main(n: int = 10000) -> None:
+    rows = make_rows(n)
+    mapping = {
+        field: {"kind": "dataField", "name": field, "dataType": "Varchar"}
+        for field in FIELDS
+    }
+    mapping["Kategorie"] = {
+        "kind": "vocabularyReference",
+        "name": "ObjCategoryVoc",
+        "ID": 30349,
+        "instanceName": "ObjCategoryVgr",
+    }
+    mapping["Titel"] = {
+        "kind": "repeatableGroup",
+        "name": "ObjObjectTitleGrp",
+        "field": "TitleTxt",
+    }
+    rb = RowBuilder(ID="objId", mapping=mapping)
+
+    # both ways produce the same xml
+    assert with_constructors(rows[:1])[0].tostring() == next(rb.build(rows)).tostring()
+
+    before = timeit.timeit(lambda: with_constructors(rows), number=1)
+    after = timeit.timeit(lambda: list(rb.build(rows)), number=1)
+    print(f"{n} rows with {len(mapping)} columns")
+    print(f"constructors: {before:.3f}s")
+    print(f"RowBuilder:   {after:.3f}s ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
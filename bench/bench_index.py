@@ -0,0 +1,49 @@
+"""
+Getting a few items out of a big file: parsing all of it vs. ItemIndex
+
+USAGE
+    python bench/bench_index.py [items] [lookups]
+"""
+from MpApi.Fieldmaker import StreamWriter, application, dataField, moduleItem
+from MpApi.Fieldmaker.index import ItemIndex
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+
+def main(n: int = 200000, lookups: int = 300) -> None:
+    path = Path(tempfile.mkdtemp()) / "export.xml"
+    with StreamWriter(path, mtype="Object", pretty_print=True) as w:
+        for ID in range(n):
+            mi = moduleItem(ID=ID)
+            for f in range(10):
+                mi.add(dataField(name=f"Field{f}Txt", value=f"Field {f} {ID}"))
+            w.add(mi)
+    print(f"{path.stat().st_size / 1e6:.0f} MB, {n} items")
+    IDs = random.sample(range(n), lookups)
+
+    start = time.perf_counter()
+    a = application.fromfile(path)
+    for ID in IDs:
+        a.get_item(ID, mtype="Object")
+    print(f"parse everything:  {time.perf_counter() - start:7.3f}s")
+    del a
+
+    start = time.perf_counter()
+    ItemIndex.open(path).close()
+    print(f"build index:       {time.perf_counter() - start:7.3f}s")
+
+    start = time.perf_counter()
+    with ItemIndex.open(path) as idx:
+        loaded = time.perf_counter()
+        for ID in IDs:
+            idx.get_item(ID, mtype="Object")
+    end = time.perf_counter()
+    print(f"load index:        {loaded - start:7.3f}s")
+    print(f"{lookups} lookups:      {end - loaded:7.3f}s ({(end - loaded) / lookups * 1000:.2f} ms each)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
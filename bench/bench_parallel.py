@@ -0,0 +1,34 @@
+"""
+Throughput of write_document() with 1..n worker processes
+
+USAGE
+    python bench/bench_parallel.py [records] [max processes]
+"""
+from MpApi.Fieldmaker import RowBuilder, write_document
+import io
+import os
+import sys
+import time
+
+FIELDS = [f"Field{n}Txt" for n in range(10)]
+
+
+def main(n: int = 100000, maxProcesses: int = os.cpu_count() or 1) -> None:
+    rows = [{"objId": ID, **{f: f"{f} {ID}" for f in FIELDS}} for ID in range(n)]
+    rb = RowBuilder(
+        ID="objId",
+        mapping={f: {"kind": "dataField", "name": f, "dataType": "Varchar"} for f in FIELDS},
+    )
+    base = None
+    for processes in range(1, maxProcesses + 1):
+        start = time.perf_counter()
+        write_document(io.BytesIO(), rows, rb.build, mtype="Object", processes=processes)
+        duration = time.perf_counter() - start
+        base = base or duration
+        print(
+            f"{processes} processes: {n / duration:,.0f} items/s ({base / duration:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
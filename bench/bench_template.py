@@ -0,0 +1,76 @@
+"""
+Microbenchmarks: constructors vs Template.new() for the same shapes
+
+USAGE
+    python bench/bench_template.py [n]
+"""
+from MpApi.Fieldmaker import (
+    Template,
+    dataField,
+    repeatableGroupItem,
+    vocabularyReference,
+    vocabularyReferenceItem,
+)
+import sys
+import timeit
+
+
+def title_item(ID: int, title: str) -> repeatableGroupItem:
+    """ObjObjectTitleGrp item like in repeatableGroup's docstring"""
+    rGrpItem = repeatableGroupItem(ID=ID)
+    rGrpItem.add(dataField(name="SortLnu", dataType="Long", value="1"))
+    rGrpItem.add(dataField(name="TitleTxt", dataType="Varchar", value=title))
+    rGrpItem.add(dataField(name="ModifiedByTxt", dataType="Varchar", value="EM_AR"))
+    vocRef = rGrpItem.add(
+        vocabularyReference(name="TypeVoc", ID=30450, instanceName="ObjTitleTypeVgr")
+    )
+    vocRef.add(
+        vocabularyReferenceItem(
+            ID=4398935,
+            name="Originaltitel",
+            language="de",
+            formattedValue="Originaltitel",
+        )
+    )
+    return rGrpItem
+
+
+def main(n: int = 10000) -> None:
+    cases = {
+        "dataField": (
+            lambda i: dataField(name="TitleTxt", dataType="Varchar", value=str(i)),
+            Template(dataField(name="TitleTxt", dataType="Varchar", value="{value}")),
+            lambda i: {"value": i},
+        ),
+        "vocabularyReferenceItem": (
+            lambda i: vocabularyReferenceItem(
+                ID=i, name="Originaltitel", language="de", formattedValue="Originaltitel"
+            ),
+            Template(
+                vocabularyReferenceItem(
+                    ID="{ID}",
+                    name="Originaltitel",
+                    language="de",
+                    formattedValue="Originaltitel",
+                )
+            ),
+            lambda i: {"ID": i},
+        ),
+        "repeatableGroupItem (ObjObjectTitleGrp)": (
+            lambda i: title_item(i, str(i)),
+            Template(title_item("{ID}", "{title}")),
+            lambda i: {"ID": i, "title": i},
+        ),
+    }
+    print(f"{n} instances each")
+    for label, (ctor, template, values) in cases.items():
+        assert ctor(1).tostring() == template.new(**values(1)).tostring()
+        before = timeit.timeit(lambda: [ctor(i) for i in range(n)], number=1)
+        after = timeit.timeit(lambda: [template.new(**values(i)) for i in range(n)], number=1)
+        print(f"{label}")
+        print(f"    constructors: {before / n * 1e6:.2f} µs")
+        print(f"    Template:     {after / n * 1e6:.2f} µs ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
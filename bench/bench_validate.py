@@ -0,0 +1,49 @@
+"""
+Per-document cost of application.validate()
+
+before: every application compiled its own schema and validation went through
+        tostring(pretty_print=True, encoding="unicode") and etree.XML()
+after:  one compiled schema per process, compact bytes (or in place for trees
+        that are already in the module namespace)
+
+USAGE
+    python bench/bench_validate.py            # 100 docs with 10 items each
+    python bench/bench_validate.py 50 1000    # 50 docs with 1000 items each
+"""
+from lxml import etree
+from MpApi.Fieldmaker import application, modules, module, moduleItem, dataField
+import pkgutil
+import sys
+import timeit
+
+
+def make_doc(items: int) -> application:
+    a = application()
+    ms = a.add(modules())
+    m = ms.add(module(name="Object"))
+    for ID in range(items):
+        mi = m.add(moduleItem(ID=ID))
+        mi.add(dataField(name="InventarNrSTxt", value=f"I C {ID}"))
+    m.update_totalSize()
+    return a
+
+
+def validate_before(a: application) -> True:
+    xsd_str = pkgutil.get_data("mpapi.client", "data/xsd/module_1_6.xsd")
+    xmlschema = etree.XMLSchema(etree.fromstring(xsd_str))
+    ET = etree.XML(a.tostring())
+    xmlschema.assertValid(ET)
+    return True
+
+
+def main(docs: int = 100, items: int = 10) -> None:
+    docL = [make_doc(items) for _ in range(docs)]
+    before = timeit.timeit(lambda: [validate_before(a) for a in docL], number=1)
+    after = timeit.timeit(lambda: [a.validate() for a in docL], number=1)
+    print(f"{docs} docs with {items} items each")
+    print(f"before: {before / docs * 1000:.3f} ms/doc")
+    print(f"after:  {after / docs * 1000:.3f} ms/doc")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
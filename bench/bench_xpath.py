@@ -0,0 +1,31 @@
+"""
+Repeated xpath queries: element.xpath(str) vs cached, compiled expressions
+
+USAGE
+    python bench/bench_xpath.py [n]
+"""
+from MpApi.Fieldmaker import dataField
+import sys
+import timeit
+
+
+def main(n: int = 100000) -> None:
+    a = dataField(name="InventarNrSTxt", value="I C 7703").wrap(mtype="Object", ID=1234)
+    expr = "/application/modules/module[@name = 'Object']/moduleItem"
+    nsmap = {"m": "http://www.zetcom.com/ria/ws/module"}
+    before = timeit.timeit(lambda: a.element.xpath(expr, namespaces=nsmap), number=n)
+    after = timeit.timeit(lambda: a.xpath(expr), number=n)
+    variables = timeit.timeit(
+        lambda: a.xpath(
+            "/application/modules/module[@name = $mtype]/moduleItem", mtype="Object"
+        ),
+        number=n,
+    )
+    print(f"{n} queries")
+    print(f"element.xpath(str): {before / n * 1e6:.2f} µs")
+    print(f"baseField.xpath():  {after / n * 1e6:.2f} µs ({before / after:.1f}x)")
+    print(f"with variables:     {variables / n * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,425 @@
+"""
+Benchmark suite for Fieldmaker
+
+Runs offline on synthetic documents and writes the results as json, so that two
+commits can be compared.
+
+USAGE
+    python bench/suite.py                                  # 1k and 100k items
+    python bench/suite.py --sizes 1000 100000 1000000 -o results.json
+    python bench/suite.py --only tostring validate
+    python bench/suite.py --compare before.json after.json # ratios, flags regressions
+
+Every benchmark gets the number of items n and returns a function that does the
+measured work; setup is not measured. We report the best of --repeat runs.
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import json
+from lxml import etree
+from MpApi.Fieldmaker import (
+    __version__,
+    application,
+    modules,
+    module,
+    moduleItem,
+    dataField,
+    repeatableGroup,
+)
+from MpApi.Fieldmaker import fm, records
+from MpApi.Fieldmaker.emitter import Emitter
+from MpApi.Fieldmaker.vocabulary import VocabularyCache
+from MpApi.Fieldmaker.writer import ShardedWriter, StreamWriter
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+benchmarks: dict[str, Callable[[int], Callable[[], object]]] = {}
+
+
+def benchmark(func: Callable) -> Callable:
+    benchmarks[func.__name__] = func
+    return func
+
+
+def make_doc(n: int, m=fm) -> tuple[application, module]:
+    """
+    n moduleItems with three dataFields and a repeatableGroup each; m is fm or
+    records
+    """
+    a = m.application()
+    mod = a.add(m.modules()).add(m.module(name="Object"))
+    for ID in range(n):
+        mi = mod.add(m.moduleItem(ID=ID))
+        mi.add(m.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute"))
+        mi.add(m.dataField(name="ObjInventarNrTxt", dataType="Varchar", value=f"I C {ID}"))
+        mi.add(m.dataField(name="ObjSortLnu", dataType="Long", value=str(ID)))
+        rGrp = mi.add(m.repeatableGroup(name="ObjObjectTitleGrp"))
+        rGrp.item(ID=ID).add(m.dataField(name="TitleTxt", value=f"Titel {ID}"))
+        rGrp.update_size()
+    mod.update_totalSize()
+    return a, mod
+
+
+@benchmark
+def dataField_construction(n: int) -> Callable:
+    def run():
+        for ID in range(n):
+            dataField(name="ObjInventarNrTxt", dataType="Varchar", value="I C 7703")
+
+    return run
+
+
+@benchmark
+def repeatableGroup_construction(n: int) -> Callable:
+    def run():
+        for ID in range(n):
+            rGrp = repeatableGroup(name="ObjObjectTitleGrp")
+            rGrp.item(ID=ID).add(dataField(name="TitleTxt", value="Titel"))
+
+    return run
+
+
+@benchmark
+def add(n: int) -> Callable:
+    fields = [dataField(name="ObjInventarNrTxt", value="I C 7703") for _ in range(n)]
+
+    def run():
+        mi = moduleItem(ID=1)
+        for df in fields:
+            mi.add(df)
+
+    return run
+
+
+@benchmark
+def wrap(n: int) -> Callable:
+    fields = [dataField(name="ObjInventarNrTxt", value="I C 7703") for _ in range(n)]
+
+    def run():
+        for ID, df in enumerate(fields):
+            df.wrap(mtype="Object", ID=ID)
+
+    return run
+
+
+@benchmark
+def tostring(n: int) -> Callable:
+    a, m = make_doc(n)
+    return lambda: a.tostring()
+
+
+@benchmark
+def tostring_compact(n: int) -> Callable:
+    a, m = make_doc(n)
+    return lambda: a.tostring(pretty_print=False, encoding="UTF-8")
+
+
+@benchmark
+def tofile(n: int) -> Callable:
+    a, m = make_doc(n)
+    path = Path(tempfile.gettempdir()) / "fieldmaker-bench.xml"
+    return lambda: a.tofile(path)
+
+
+@benchmark
+def tofile_gzip(n: int) -> Callable:
+    a, m = make_doc(n)
+    path = Path(tempfile.gettempdir()) / "fieldmaker-bench.xml.gz"
+    return lambda: a.tofile(path)
+
+
+@benchmark
+def validate(n: int) -> Callable:
+    a, m = make_doc(n)
+    a.xmlschema  # compiling the schema is not part of the per-document cost
+    return a.validate
+
+
+@benchmark
+def validate_items(n: int) -> Callable:
+    """the same checks as validate, one moduleItem at a time"""
+    a, m = make_doc(n)
+    v = fm.ItemValidator("Object")
+
+    def run():
+        for mi in m.element:
+            v.check(mi)
+
+    return run
+
+
+@benchmark
+def records_construction(n: int) -> Callable:
+    def run():
+        mi = records.moduleItem(ID=1)
+        for ID in range(n):
+            mi.add(
+                records.dataField(
+                    name="ObjInventarNrTxt", dataType="Varchar", value="I C 7703"
+                )
+            )
+
+    return run
+
+
+@benchmark
+def records_tostring(n: int) -> Callable:
+    mi = records.moduleItem(ID=1)
+    for ID in range(n):
+        mi.add(
+            records.dataField(name="ObjInventarNrTxt", dataType="Varchar", value="I C 7703")
+        )
+    return lambda: mi.tostring(pretty_print=False, encoding="UTF-8")
+
+
+@benchmark
+def build_tostring(n: int) -> Callable:
+    """make_doc() and tostring(), the baseline for records and emitter"""
+    return lambda: make_doc(n)[0].tostring(pretty_print=False, encoding="UTF-8")
+
+
+@benchmark
+def records_build_tostring(n: int) -> Callable:
+    return lambda: make_doc(n, records)[0].tostring(pretty_print=False, encoding="UTF-8")
+
+
+@benchmark
+def emitter(n: int) -> Callable:
+    """the same document as make_doc() written with the Emitter"""
+
+    def run():
+        e = Emitter(pretty_print=False, encoding="UTF-8")
+        with e.application(), e.modules(), e.module(name="Object", totalSize=n):
+            for ID in range(n):
+                with e.moduleItem(ID=ID):
+                    e.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute")
+                    e.dataField(name="ObjInventarNrTxt", dataType="Varchar", value=f"I C {ID}")
+                    e.dataField(name="ObjSortLnu", dataType="Long", value=str(ID))
+                    with e.repeatableGroup(name="ObjObjectTitleGrp", size=1):
+                        with e.repeatableGroupItem(ID=ID):
+                            e.dataField(name="TitleTxt", value=f"Titel {ID}")
+        return e.getvalue()
+
+    return run
+
+
+STATUS = dict(
+    name="ObjPublicationStatusVoc",
+    ID=30432,
+    instanceName="ObjPublicationStatusVgr",
+    itemID=4399323,
+    itemName="vorhanden",
+    language="de",
+    formattedValue="vorhanden",
+)
+
+
+@benchmark
+def vocabularyReference_construction(n: int) -> Callable:
+    def run():
+        for _ in range(n):
+            vocRef = fm.vocabularyReference(
+                name="ObjPublicationStatusVoc", ID=30432, instanceName="ObjPublicationStatusVgr"
+            )
+            vocRef.add(
+                fm.vocabularyReferenceItem(
+                    ID=4399323, name="vorhanden", language="de", formattedValue="vorhanden"
+                )
+            )
+
+    return run
+
+
+@benchmark
+def vocabulary_new(n: int) -> Callable:
+    vocs = VocabularyCache()
+
+    def run():
+        for _ in range(n):
+            vocs.new(**STATUS)
+
+    return run
+
+
+@benchmark
+def vocabulary_emit(n: int) -> Callable:
+    vocs = VocabularyCache()
+
+    def run():
+        e = Emitter(pretty_print=False)
+        with e.moduleItem(ID=1):
+            for _ in range(n):
+                vocs.emit(e, **STATUS)
+        return e.getvalue()
+
+    return run
+
+
+@benchmark
+def emitter_vocabularyReference(n: int) -> Callable:
+    def run():
+        e = Emitter(pretty_print=False)
+        with e.moduleItem(ID=1):
+            for _ in range(n):
+                with e.vocabularyReference(
+                    name="ObjPublicationStatusVoc", ID=30432, instanceName="ObjPublicationStatusVgr"
+                ):
+                    e.vocabularyReferenceItem(
+                        ID=4399323, name="vorhanden", language="de", formattedValue="vorhanden"
+                    )
+        return e.getvalue()
+
+    return run
+
+
+@benchmark
+def add_item(n: int) -> Callable:
+    """a document with n items of all known module types"""
+    mtypes = sorted(fm.known_module_types)
+    items = [moduleItem(ID=ID) for ID in range(n)]
+
+    def run():
+        a = application()
+        for ID, mi in enumerate(items):
+            a.add_item(mi, mtype=mtypes[ID % len(mtypes)])
+        a.update_totalSizes()
+
+    return run
+
+
+def _shard_item(ID: int) -> moduleItem:
+    mi = moduleItem(ID=ID)
+    mi.add(dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute"))
+    mi.add(dataField(name="ObjInventarNrTxt", dataType="Varchar", value=f"I C {ID}"))
+    return mi
+
+
+@benchmark
+def shards_sequential(n: int) -> Callable:
+    """build items and write shards of 1000 items with StreamWriter, one thread"""
+    pattern = str(Path(tempfile.mkdtemp()) / "shard-{:04d}.xml")
+
+    def run():
+        for start in range(0, n, 1000):
+            with StreamWriter(pattern.format(start // 1000), mtype="Object") as w:
+                for ID in range(start, min(start + 1000, n)):
+                    w.add(_shard_item(ID))
+
+    return run
+
+
+@benchmark
+def shards_background(n: int) -> Callable:
+    """the same with ShardedWriter, writing in a background thread"""
+    pattern = str(Path(tempfile.mkdtemp()) / "shard-{:04d}.xml")
+
+    def run():
+        with ShardedWriter(pattern, mtype="Object", max_items=1000) as w:
+            for ID in range(n):
+                w.add(_shard_item(ID))
+
+    return run
+
+
+@benchmark
+def update_totalSize(n: int) -> Callable:
+    a, m = make_doc(n)
+    return m.update_totalSize
+
+
+@benchmark
+def update_sizes(n: int) -> Callable:
+    a, m = make_doc(n)
+    return a.update_sizes
+
+
+def measure(name: str, n: int, repeat: int) -> dict:
+    try:
+        run = benchmarks[name](n)
+    except Exception as e:  # e.g. no schema without mpapi
+        return {"name": name, "size": n, "skipped": f"{type(e).__name__}: {e}"}
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {"name": name, "size": n, "seconds": best, "us_per_item": best / n * 1e6}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "fieldmaker": __version__,
+        "python": platform.python_version(),
+        "lxml": ".".join(str(v) for v in etree.LXML_VERSION),
+        "machine": platform.machine(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(before: Path, after: Path, threshold: float) -> int:
+    """
+    Prints after/before ratios; returns 1 if something got slower than threshold.
+    """
+    old = json.loads(before.read_text())
+    new = json.loads(after.read_text())
+    oldD = {(r["name"], r["size"]): r for r in old["results"] if "seconds" in r}
+    regressions = 0
+    for r in new["results"]:
+        o = oldD.get((r["name"], r["size"]))
+        if o is None or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / o["seconds"]
+        flag = ""
+        if ratio > threshold:
+            flag = " REGRESSION"
+            regressions += 1
+        print(f"{r['name']:30} {r['size']:>9} {ratio:6.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fieldmaker benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--only", nargs="+", choices=sorted(benchmarks))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", type=Path, help="write json here")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=1.1)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    results = []
+    for n in args.sizes:
+        for name in args.only or benchmarks:
+            # one run is enough for the big documents
+            r = measure(name, n, args.repeat if n < 1000000 else 1)
+            results.append(r)
+            if "skipped" in r:
+                print(f"{name:30} {n:>9} skipped ({r['skipped']})")
+            else:
+                print(f"{name:30} {n:>9} {r['seconds']:9.4f}s {r['us_per_item']:9.2f} µs/item")
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
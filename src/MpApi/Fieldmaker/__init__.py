@@ -13,7 +13,22 @@ from MpApi.Fieldmaker.fm import (application,
     repeatableGroupItem,
     UnknownDataTypeError,
     UnknownModuleTypeError,
+    UnknownFieldError,
+    InvalidItemError,
+    registry,
+    ItemValidator,
     )
+from MpApi.Fieldmaker.writer import ShardedWriter, StreamWriter
+from MpApi.Fieldmaker.bulk import RowBuilder, UnknownFieldKindError
+from MpApi.Fieldmaker.template import Template
+from MpApi.Fieldmaker.reader import iterparse_items
+from MpApi.Fieldmaker.index import ItemIndex
+from MpApi.Fieldmaker.emitter import Emitter
+from MpApi.Fieldmaker.vocabulary import VocabularyCache
+from MpApi.Fieldmaker.parallel import iter_chunks, write_document, write_shards
+from MpApi.Fieldmaker.aio import aiter_documents
+from MpApi.Fieldmaker.diff import diff_item, diff_document
+from MpApi.Fieldmaker.uploader import Uploader, UploadError
 
 __version__ = "0.0.1"
 
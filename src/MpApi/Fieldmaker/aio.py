@@ -0,0 +1,107 @@
+"""
+MpApi.Fieldmaker.aio - Make documents in asyncio programs
+
+Building and serializing moduleItems is CPU work; done in a coroutine, a big
+wrap() or tostring() blocks the event loop for everything else. aiter_documents()
+takes an async iterator of records, collects them into batches and builds every
+batch in an executor: build(batch) makes the moduleItems, and the worker serializes
+them into a complete document (with totalSize), so the event loop only gets the
+finished bytes.
+
+A bounded queue between reading records and handing out documents provides
+backpressure: if the consumer is slow (e.g. uploading), we stop reading records
+once maxsize batches are waiting.
+
+By default the batches are built in a process pool, so that the event loop doesn't
+have to share the GIL with the builders; then build has to be picklable, like for
+MpApi.Fieldmaker.parallel. Pass executor=ThreadPoolExecutor() to use threads.
+
+USAGE
+    from MpApi.Fieldmaker.aio import aiter_documents
+
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    async for xml in aiter_documents(rows, rb.build, mtype="Object", batchsize=1000):
+        await send(xml)
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+import io
+from MpApi.Fieldmaker.fm import module
+from MpApi.Fieldmaker.parallel import Builder, _build_chunk
+from MpApi.Fieldmaker.writer import StreamWriter
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+
+async def aiter_documents(
+    records: AsyncIterable[Any],
+    build: Builder,
+    *,
+    mtype: str,
+    batchsize: int = 1000,
+    processes: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    maxsize: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields one document (UTF-8 bytes) per batch of records, in order.
+    processes: size of our process pool; ignored if you pass an executor
+    maxsize: batches in flight, default is two per process
+    """
+    module(name=mtype)  # raises UnknownModuleTypeError
+    processes = processes or os.cpu_count() or 1
+    ownExecutor = executor is None
+    if ownExecutor:
+        executor = ProcessPoolExecutor(max_workers=processes)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize or 2 * processes)
+
+    async def produce() -> None:
+        try:
+            batch = []
+            async for record in records:
+                batch.append(record)
+                if len(batch) >= batchsize:
+                    await queue.put(
+                        loop.run_in_executor(executor, _build_document, build, batch, mtype)
+                    )
+                    batch = []
+            if batch:
+                await queue.put(
+                    loop.run_in_executor(executor, _build_document, build, batch, mtype)
+                )
+        except Exception as e:
+            # hand the error to the consumer
+            failed = loop.create_future()
+            failed.set_exception(e)
+            await queue.put(failed)
+        await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            future = await queue.get()
+            if future is None:
+                break
+            yield await future
+    finally:
+        producer.cancel()
+        if ownExecutor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+#
+# private
+#
+
+
+def _build_document(build: Builder, batch: list, mtype: str) -> bytes:
+    """
+    runs in the worker
+    """
+    count, xml = _build_chunk(build, batch)
+    buf = io.BytesIO()
+    with StreamWriter(buf, mtype=mtype, totalSize=count) as w:
+        w.add_fragment(xml, count)
+    return buf.getvalue()
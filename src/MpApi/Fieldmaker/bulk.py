@@ -0,0 +1,209 @@
+"""
+MpApi.Fieldmaker.bulk - Make many moduleItems from tabular rows
+
+Most of the time we turn rows from a spreadsheet or a database into moduleItems.
+Doing that with the constructors means dozens of wrapper objects per row. The
+RowBuilder gets the mapping from columns to fields once, compiles it into a plan
+and then builds the elements for each row directly with lxml. It creates only one
+wrapper per row, the moduleItem.
+
+A mapping is a dict column -> field spec; field specs are dicts with a kind
+
+    "dataField"/"virtualField"/"systemField": name, dataType (optional)
+        value of the column becomes the value
+    "vocabularyReference": name, ID (optional), instanceName (optional)
+        value of the column is the id of the vocabularyReferenceItem
+    "repeatableGroup": name, field, dataType (optional), instanceName (optional)
+        value of the column becomes a dataField named field inside a
+        repeatableGroupItem; columns with the same group name share a group
+
+Empty values (None or "") are skipped.
+
+USAGE
+    from MpApi.Fieldmaker import RowBuilder
+
+    rb = RowBuilder(
+        ID="objId",
+        mapping={
+            "Bezeichnung": {"kind": "dataField", "name": "ObjTechnicalTermClb", "dataType": "Clob"},
+            "Kategorie": {"kind": "vocabularyReference", "name": "ObjCategoryVoc", "ID": 30349, "instanceName": "ObjCategoryVgr"},
+            "Titel": {"kind": "repeatableGroup", "name": "ObjObjectTitleGrp", "field": "TitleTxt"},
+        },
+    )
+    m = module(name="Object")
+    for mi in rb.build(rows):
+        m.add(mi)
+
+    # or straight from a csv file
+    for mi in rb.build_csv("objects.csv"):
+        ...
+"""
+from __future__ import annotations
+import csv
+from MpApi.Fieldmaker.fm import (
+    baseField,
+    dataField,
+    moduleItem,
+    repeatableGroup,
+    systemField,
+    virtualField,
+    vocabularyReference,
+)
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+known_kinds = (
+    "dataField",
+    "virtualField",
+    "systemField",
+    "vocabularyReference",
+    "repeatableGroup",
+)
+
+_simple_fields = {
+    "dataField": dataField,
+    "virtualField": virtualField,
+    "systemField": systemField,
+}
+
+
+class UnknownFieldKindError(Exception):
+    pass
+
+
+class RowBuilder:
+    def __init__(self, *, ID: str, mapping: dict[str, dict]) -> None:
+        """
+        ID is the column that holds the moduleItem's id; mapping is described in the
+        module's docstring.
+
+        The plan is a prototype moduleItem that has every mapped field with an
+        empty value and a list of slots (column, is it an attribute?). Slots are
+        in document order of value and vocabularyReferenceItem elements.
+        """
+        self.ID = ID
+        self.mapping = mapping
+        self._proto, self._slots = self._compile(mapping)
+
+    def __getstate__(self) -> dict:
+        """
+        lxml elements can't be pickled; we pickle the mapping and compile again,
+        so a RowBuilder can be sent to worker processes.
+        """
+        return {"ID": self.ID, "mapping": self.mapping}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def build(self, rows: Iterable[dict[str, Any]]) -> Iterator[moduleItem]:
+        """
+        Yields one moduleItem per row; rows are dicts (e.g. from csv.DictReader).
+
+        Every row is a deep copy of the prototype (done in C by lxml), we only fill
+        in the values and drop fields without value.
+        """
+        copy = self._proto.__deepcopy__  # skips the bookkeeping of copy.deepcopy
+        slots = self._slots
+        ID = self.ID
+        for row in rows:
+            itemN = copy(None)
+            itemN.attrib["id"] = str(row[ID])
+            empty = []
+            for (column, isAttrib), slotN in zip(
+                slots, itemN.iter("value", "vocabularyReferenceItem")
+            ):
+                value = row.get(column)
+                if value is None or value == "":
+                    empty.append(slotN)
+                elif isAttrib:
+                    slotN.attrib["id"] = str(value)
+                else:
+                    slotN.text = str(value)
+            if empty:
+                self._drop(empty)
+            yield moduleItem.from_element(itemN)
+
+    def build_csv(self, path: Union[str, Path], **kwargs) -> Iterator[moduleItem]:
+        """
+        kwargs are passed on to csv.DictReader, e.g. delimiter=";"
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from self.build(csv.DictReader(f, **kwargs))
+
+    #
+    # private
+    #
+
+    def _compile(self, mapping: dict[str, dict]) -> tuple:
+        """
+        We build the prototype with the normal constructors, so the rows come out
+        exactly like hand-made moduleItems. Columns of the same repeatableGroup end
+        up in one repeatableGroupItem at the position of the group's first column.
+        """
+        mi = moduleItem(ID=0)
+        groups: dict[str, list] = {}
+        order: list[tuple] = []
+        for column, spec in mapping.items():
+            kind = spec.get("kind")
+            if kind not in known_kinds:
+                raise UnknownFieldKindError(f"ERROR: Unknown field kind '{kind}'")
+            if kind == "repeatableGroup":
+                name = spec["name"]
+                if name not in groups:
+                    groups[name] = []
+                    order.append((kind, spec, groups[name]))
+                groups[name].append((column, spec))
+            else:
+                order.append((kind, spec, column))
+
+        slots = []
+        for kind, spec, columns in order:
+            if kind == "repeatableGroup":
+                rGrp = mi.add(
+                    repeatableGroup(name=spec["name"], instanceName=spec.get("instanceName"))
+                )
+                rGrpItem = rGrp.item()
+                for column, fieldSpec in columns:
+                    rGrpItem.add(
+                        dataField(
+                            name=fieldSpec["field"],
+                            dataType=fieldSpec.get("dataType"),
+                            value="",
+                        )
+                    )
+                    slots.append((column, False))
+                rGrp.update_size()
+            elif kind == "vocabularyReference":
+                vocRef = mi.add(
+                    vocabularyReference(
+                        name=spec["name"],
+                        ID=spec.get("ID"),
+                        instanceName=spec.get("instanceName"),
+                    )
+                )
+                vocRef.item(ID=0)
+                slots.append((columns, True))
+            else:
+                mi.add(self._simple_field(kind, spec))
+                slots.append((columns, False))
+        return mi.element, slots
+
+    def _simple_field(self, kind: str, spec: dict) -> baseField:
+        if kind == "virtualField":
+            return virtualField(name=spec.get("name"), value="")
+        return _simple_fields[kind](
+            name=spec.get("name"), dataType=spec.get("dataType"), value=""
+        )
+
+    def _drop(self, empty: list) -> None:
+        """
+        Remove fields (and vocabularyReferences) without value; a repeatableGroup
+        goes away with its last field.
+        """
+        for slotN in empty:
+            fieldN = slotN.getparent()
+            parentN = fieldN.getparent()
+            parentN.remove(fieldN)
+            if parentN.tag == "repeatableGroupItem" and len(parentN) == 0:
+                rGrpN = parentN.getparent()
+                rGrpN.getparent().remove(rGrpN)
@@ -0,0 +1,151 @@
+"""
+MpApi.Fieldmaker.compress - Read and write compressed zml files
+
+zml is very repetitive xml; gzip makes it about ten times smaller, zstd about as
+small and much faster. Everything in Fieldmaker that writes or reads files by path
+(application.tofile/fromfile, records' tofile, StreamWriter, ShardedWriter,
+iterparse_items) compresses and decompresses on the fly:
+
+- by extension: .gz/.gzip means gzip, .zst/.zstd means zstd
+- or with compression="gzip", "zstd" or "none" (plain, whatever the extension)
+
+gzip is in the standard library; zstd needs the zstandard package (pip install
+zstandard), or Python 3.14's compression.zstd.
+
+USAGE
+    from MpApi.Fieldmaker.compress import open_file
+
+    a.tofile("export.xml.gz")
+    a = application.fromfile("export.xml.zst")
+
+    with open_file("export.xml.gz", "wb") as f:
+        a.write_to(f)
+
+Compressed files can consist of several gzip members or zstd frames, e.g. those
+written by the StreamWriter; the usual tools (zcat, zstd -d) read them as one.
+"""
+from __future__ import annotations
+import gzip
+from pathlib import Path
+from typing import IO, Optional, Union
+
+# file extension: compression
+extensions = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+# default levels; gzip's own default (9) is much slower for little gain
+levels = {"gzip": 6, "zstd": 3}
+
+
+def compression_for(
+    path: Union[str, Path, None], compression: Optional[str] = None
+) -> Optional[str]:
+    """
+    Returns "gzip", "zstd" or None (not compressed); an explicit compression wins
+    over the file extension.
+    """
+    if compression is None:
+        if path is None or not isinstance(path, (str, Path)):
+            return None
+        return extensions.get(Path(path).suffix.lower())
+    if compression == "none":
+        return None
+    if compression not in levels:
+        raise ValueError(f"ERROR: Unknown compression '{compression}'")
+    return compression
+
+
+def open_file(
+    path: Union[str, Path],
+    mode: str = "rb",
+    *,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> IO[bytes]:
+    """
+    Opens path in binary mode ("rb" or "wb") and (de)compresses on the fly.
+    """
+    if mode not in ("rb", "wb"):
+        raise ValueError(f"ERROR: mode '{mode}' not supported")
+    compression = compression_for(path, compression)
+    if compression is None:
+        return open(path, mode)
+    level = levels[compression] if level is None else level
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=level)
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        if mode == "rb":
+            return zstd.ZstdDecompressor().stream_reader(
+                open(path, "rb"), read_across_frames=True, closefd=True
+            )
+        return zstd.ZstdCompressor(level=level).stream_writer(
+            open(path, "wb"), closefd=True
+        )
+    if mode == "rb":
+        return zstd.open(path, "rb")
+    return zstd.open(path, "wb", level=level)
+
+
+def reader(fileobj: IO[bytes], compression: str) -> IO[bytes]:
+    """
+    Decompressing file object over fileobj; reads all gzip members or zstd frames.
+    Closing it doesn't close fileobj.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdDecompressor().stream_reader(
+            fileobj, read_across_frames=True, closefd=False
+        )
+    return zstd.ZstdFile(fileobj, "rb")
+
+
+def writer(
+    fileobj: IO[bytes], compression: str, *, level: Optional[int] = None
+) -> IO[bytes]:
+    """
+    Compressing file object over fileobj; closing it ends the gzip member or zstd
+    frame, but doesn't close fileobj.
+    """
+    level = levels[compression] if level is None else level
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=level)
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdCompressor(level=level).stream_writer(fileobj, closefd=False)
+    return zstd.ZstdFile(fileobj, "wb", level=level)
+
+
+def compress(data: bytes, compression: str, *, level: Optional[int] = None) -> bytes:
+    """
+    Compresses data in one go, as one gzip member or zstd frame.
+    """
+    level = levels[compression] if level is None else level
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=level)
+    zstd = _zstd()
+    if zstd.__name__ == "zstandard":
+        return zstd.ZstdCompressor(level=level).compress(data)
+    return zstd.compress(data, level=level)
+
+
+#
+# private
+#
+
+
+def _zstd():
+    """
+    the zstd module we have: compression.zstd (Python 3.14) or zstandard
+    """
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError(
+                "ERROR: zstd needs the zstandard package (pip install zstandard)"
+            ) from None
+    return zstd
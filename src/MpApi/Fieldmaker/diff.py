@@ -0,0 +1,174 @@
+"""
+MpApi.Fieldmaker.diff - Send only what changed
+
+To update a record we used to send the complete moduleItem, even if only one
+dataField changed. diff_item() compares an existing moduleItem (usually parsed from
+an export) with a newly built one and returns a moduleItem with only the fields that
+are new or different. Repeatable groups are compared item by item: a
+repeatableGroup is in the result only with its new or changed repeatableGroupItems.
+
+Fields are matched by name (in a dict), repeatableGroupItems by id. Every field
+gets a signature of what it says (a tuple of name and value, or of the ids of a
+vocabularyReference), and signatures are compared as tuples, so the comparison is
+linear in the size of the items, also for groups with thousands of entries. Only what the new item has is compared: fields that exist only in the
+old item (e.g. systemFields or formattedValues from the server) don't make a
+difference.
+
+USAGE
+    from MpApi.Fieldmaker.diff import diff_item, diff_document
+
+    old = application.fromfile("export.xml").get_item(1234, mtype="Object")
+    new = moduleItem(ID=1234)
+    new.add(dataField(name="ObjTechnicalTermClb", value="Laute"))
+
+    change = diff_item(old, new)  # None if nothing changed
+    if change is not None:
+        xml = change.wrap(mtype="Object").tostring()
+
+    # all items of a document; returns None if nothing changed
+    a = diff_document(old_app, new_app, mtype="Object")
+"""
+from __future__ import annotations
+from lxml import etree
+from MpApi.Fieldmaker.fm import (
+    _tags,
+    application,
+    module,
+    moduleItem,
+    modules,
+    repeatableGroup,
+    repeatableGroupItem,
+)
+from typing import Optional
+
+_SIMPLE = frozenset(("dataField", "systemField", "virtualField"))
+_VALUE = _tags("value")
+
+
+def diff_item(old: moduleItem, new: moduleItem) -> Optional[moduleItem]:
+    """
+    Returns a new moduleItem (with the id of new) that has copies of the fields
+    of new that are not in old or differ from it. Returns None if there are none.
+    """
+    changes = _diff_fields(old.element, new.element)
+    if not changes:
+        return None
+    mi = moduleItem(ID=new.element.get("id"))
+    for changeN in changes:
+        mi.element.append(changeN)
+    return mi
+
+
+def diff_document(
+    old: application, new: application, *, mtype: str
+) -> Optional[application]:
+    """
+    Compares the moduleItems of mtype in new with the items of the same id in old
+    and returns a document with the changes. Items that old doesn't have are
+    included completely. Returns None if nothing changed.
+    """
+    m = module(name=mtype)
+    for newItem in new.iter_items(mtype=mtype):
+        oldItem = old.get_item(newItem.element.get("id"), mtype=mtype)
+        if oldItem is None:
+            m.add(moduleItem.from_element(newItem.element.__deepcopy__(None)))
+            continue
+        change = diff_item(oldItem, newItem)
+        if change is not None:
+            m.add(change)
+    if not m.size:
+        return None
+    a = application()
+    a.add(modules()).add(m)
+    m.update_totalSize()
+    return a
+
+
+#
+# private
+#
+
+
+def _diff_fields(oldN: etree._Element, newN: etree._Element) -> list[etree._Element]:
+    """
+    Copies of the children of newN that differ from oldN's children of the same
+    name. Repeatable groups are diffed by item.
+    """
+    oldFields = {}
+    for fieldN in oldN.iterchildren(etree.Element):
+        oldFields.setdefault(fieldN.get("name"), fieldN)
+
+    changes = []
+    for fieldN in newN.iterchildren(etree.Element):
+        oldFieldN = oldFields.get(fieldN.get("name"))
+        if oldFieldN is None:
+            changes.append(fieldN.__deepcopy__(None))
+        elif _localname(fieldN) == "repeatableGroup":
+            rGrp = _diff_group(oldFieldN, fieldN)
+            if rGrp is not None:
+                changes.append(rGrp.element)
+        elif _signature(fieldN) != _signature(oldFieldN):
+            changes.append(fieldN.__deepcopy__(None))
+    return changes
+
+
+def _diff_group(
+    oldN: etree._Element, newN: etree._Element
+) -> Optional[repeatableGroup]:
+    """
+    A repeatableGroup with the new or changed items of newN (complete copies), or
+    None. Items without id are new by definition.
+    """
+    oldItems = {}
+    for itemN in oldN.iterchildren(etree.Element):
+        ID = itemN.get("id")
+        if ID is not None:
+            oldItems.setdefault(ID, itemN)
+
+    rGrp = None
+    for itemN in newN.iterchildren(etree.Element):
+        oldItemN = oldItems.get(itemN.get("id"))
+        if oldItemN is not None and not _diff_fields(oldItemN, itemN):
+            continue
+        if rGrp is None:
+            rGrp = repeatableGroup(name=newN.get("name"))
+        rGrp.add(repeatableGroupItem.from_element(itemN.__deepcopy__(None)))
+    if rGrp is not None:
+        rGrp.update_size()
+    return rGrp
+
+
+def _localname(node: etree._Element) -> str:
+    tag = node.tag
+    return tag[tag.index("}") + 1 :] if tag[0] == "{" else tag
+
+
+def _signature(node: etree._Element) -> tuple:
+    """
+    What a field says, as a tuple to compare, independent of namespace and blanks from pretty
+    printing. For simple fields that is name and value, for vocabularyReferences
+    name and the ids of the items; the server adds dataTypes, names and
+    formattedValues, which we don't care about.
+    """
+    tag = _localname(node)
+    if tag in _SIMPLE:
+        for child in node.iterchildren(_VALUE):
+            return (tag, node.get("name"), child.text or "")
+        return (tag, node.get("name"), None)
+    if tag == "vocabularyReference":
+        ids = frozenset(child.get("id") for child in node.iterchildren(etree.Element))
+        return (tag, node.get("name"), ids)
+    return _canonical(node)
+
+
+def _canonical(node: etree._Element) -> tuple:
+    text = node.text
+    if len(node):
+        if text is not None and not text.strip():
+            text = None
+        children = tuple(
+            _canonical(child) for child in node.iterchildren(etree.Element)
+        )
+    else:
+        children = ()
+    return (_localname(node), tuple(sorted(node.attrib.items())), text, children)
@@ -0,0 +1,372 @@
+"""
+MpApi.Fieldmaker.emitter - Write zml text directly, without lxml
+
+For write-only jobs like upload payloads, building an lxml tree just to serialize it
+costs twice. The Emitter takes the same arguments as the constructors in fm.py but
+writes escaped xml right away, into a file object or an internal buffer. The output
+is the same as tostring() of the equivalent lxml tree, pretty or compact.
+
+Module types and dataTypes are checked like in the constructors; if the registry
+knows the fields of the module type, field names are checked as well.
+
+Elements with children are context managers; leaves (dataField, systemField,
+virtualField, vocabularyReferenceItem) are written in one go. Size attributes have
+to be known when a container is opened.
+
+USAGE
+    from MpApi.Fieldmaker.emitter import Emitter
+
+    e = Emitter(pretty_print=False, encoding="UTF-8")
+    with e.application(), e.modules(), e.module(name="Object", totalSize=1):
+        with e.moduleItem(ID=1234):
+            e.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute")
+            with e.vocabularyReference(name="ObjCategoryVoc", ID=30349):
+                e.vocabularyReferenceItem(ID=3206642, name="Musikinstrument")
+            with e.repeatableGroup(name="ObjObjectTitleGrp", size=1):
+                with e.repeatableGroupItem(ID=26502225):
+                    e.dataField(name="TitleTxt", value="tritantri vina")
+    payload = e.getvalue()
+
+    # or straight into a file
+    with open("upload.xml", "wb") as f:
+        e = Emitter(f, pretty_print=False, encoding="UTF-8")
+        ...
+        e.flush()
+
+The records in MpApi.Fieldmaker.records serialize with the Emitter by default; use
+tostring(method="lxml") to go through lxml instead.
+"""
+from __future__ import annotations
+from MpApi.Fieldmaker.fm import (
+    NSMAP,
+    registry,
+)
+import re
+from typing import IO, Iterable, Optional, Union
+
+_XMLNS = f' xmlns="{NSMAP[None]}"'
+
+# characters that are not allowed in XML 1.0; lxml refuses them, so do we
+_NOT_XML = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+# flush to the file object after this many pieces
+_CHUNK = 4096
+
+Attrs = Iterable[tuple[str, str]]
+
+
+class _Closer:
+    """
+    returned by the container methods, so they can be used with with
+    """
+
+    __slots__ = ("emitter",)
+
+    def __init__(self, emitter: Emitter) -> None:
+        self.emitter = emitter
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.emitter.end()
+
+
+class Emitter:
+    def __init__(
+        self,
+        fileobj: Optional[IO] = None,
+        *,
+        pretty_print: bool = True,
+        encoding: str = "unicode",
+        level: int = 0,
+    ) -> None:
+        """
+        encoding is "unicode" (str) or "UTF-8" (bytes), like for tostring(). Without
+        fileobj, get the result with getvalue().
+        level: start at this nesting level to write fragments of a document (no
+        xmlns, indented for that level)
+        """
+        if encoding.upper().replace("-", "") not in ("UNICODE", "UTF8"):
+            raise ValueError(f"ERROR: Emitter can't write encoding '{encoding}'")
+        self.fileobj = fileobj
+        self.pretty_print = pretty_print
+        self.encoding = encoding
+        self._parts: list[str] = []
+        self._done: list[Union[str, bytes]] = []
+        self._stack: list[Optional[str]] = [None] * level
+        self._pending = False  # start tag written, but not closed with > yet
+        self._closer = _Closer(self)
+        self._mtype: Optional[str] = None  # for field checks
+
+    #
+    # generic
+    #
+
+    def start(self, tag: str, attrs: Attrs = ()) -> _Closer:
+        self._parts.append(self._open(tag, attrs))
+        self._stack.append(tag)
+        self._pending = True
+        return self._closer
+
+    def leaf(self, tag: str, attrs: Attrs = (), text: Optional[str] = None) -> None:
+        """
+        element without children; text None gives <tag/>
+        """
+        nl = "\n" if self.pretty_print else ""
+        if text is None:
+            self._parts.append(f"{self._open(tag, attrs)}/>{nl}")
+        else:
+            self._parts.append(f"{self._open(tag, attrs)}>{escape(text)}</{tag}>{nl}")
+        self._check()
+
+    def end(self) -> None:
+        tag = self._stack.pop()
+        nl = "\n" if self.pretty_print else ""
+        if self._pending:
+            self._parts.append("/>" + nl)
+            self._pending = False
+        elif self.pretty_print:
+            self._parts.append(f"{'  ' * len(self._stack)}</{tag}>\n")
+        else:
+            self._parts.append(f"</{tag}>")
+        self._check()
+
+    def raw(self, xml: str) -> None:
+        """
+        Writes already serialized elements, e.g. from VocabularyCache.fragment().
+        They have to be made for the current level and pretty_print.
+        """
+        if self._pending:
+            self._parts.append(">\n" if self.pretty_print else ">")
+            self._pending = False
+        self._parts.append(xml)
+        self._check()
+
+    @property
+    def level(self) -> int:
+        """nesting level of the next element"""
+        return len(self._stack)
+
+    @property
+    def mtype(self) -> Optional[str]:
+        """type of the module we are in, for field checks"""
+        return self._mtype
+
+    def flush(self) -> None:
+        """
+        Writes what we have to fileobj (or keeps it for getvalue).
+        """
+        if not self._parts:
+            return
+        chunk = "".join(self._parts)
+        self._parts = []
+        if self.encoding != "unicode":
+            chunk = chunk.encode("UTF-8")
+        if self.fileobj is None:
+            self._done.append(chunk)
+        else:
+            self.fileobj.write(chunk)
+
+    def getvalue(self) -> Union[str, bytes]:
+        self.flush()
+        empty = "" if self.encoding == "unicode" else b""
+        return empty.join(self._done)
+
+    #
+    # same arguments as in fm.py
+    #
+
+    def application(self) -> _Closer:
+        return self.start("application")
+
+    def modules(self) -> _Closer:
+        return self.start("modules")
+
+    def module(self, *, name: str, totalSize: Optional[int] = None) -> _Closer:
+        registry.check_module_type(name)
+        self._mtype = name
+        attrs = [("name", name)]
+        if totalSize is not None:
+            attrs.append(("totalSize", str(totalSize)))
+        return self.start("module", attrs)
+
+    def moduleItem(
+        self,
+        *,
+        ID: int,
+        hasAttachments: Optional[bool] = None,
+        uuid: Optional[str] = None,
+    ) -> _Closer:
+        attrs = [("id", str(ID))]
+        if hasAttachments is not None:
+            attrs.append(("hasAttachments", "true" if hasAttachments else "false"))
+        if uuid is not None:
+            attrs.append(("uuid", uuid))
+        return self.start("moduleItem", attrs)
+
+    def dataField(
+        self,
+        *,
+        dataType: Optional[str] = None,
+        name: Optional[str] = None,
+        value: Optional[str] = None,
+    ) -> None:
+        self._simpleField("dataField", dataType, name, value)
+
+    def systemField(
+        self,
+        *,
+        dataType: Optional[str] = None,
+        name: Optional[str] = None,
+        value: Optional[str] = None,
+    ) -> None:
+        self._simpleField("systemField", dataType, name, value)
+
+    def virtualField(
+        self, *, name: Optional[str] = None, value: Optional[str] = None
+    ) -> None:
+        registry.check_field(self._mtype, name)
+        attrs = [("name", name)] if name is not None else ()
+        self.start("virtualField", attrs)
+        self.leaf("value", (), value)
+        self.end()
+
+    def vocabularyReference(
+        self, *, name: str, ID: Optional[int] = None, instanceName: Optional[str] = None
+    ) -> _Closer:
+        registry.check_field(self._mtype, name)
+        attrs = [("name", name)]
+        if ID is not None:
+            attrs.append(("id", str(ID)))
+        if instanceName is not None:
+            attrs.append(("instanceName", instanceName))
+        return self.start("vocabularyReference", attrs)
+
+    def vocabularyReferenceItem(
+        self,
+        *,
+        ID: int,
+        name: Optional[str] = None,
+        language: Optional[str] = None,
+        formattedValue: Optional[str] = None,
+    ) -> None:
+        attrs = [("id", str(ID))]
+        if name is not None:
+            attrs.append(("name", name))
+        if formattedValue is None:
+            self.leaf("vocabularyReferenceItem", attrs)
+            return
+        self.start("vocabularyReferenceItem", attrs)
+        fvAttrs = () if language is None else (("language", language),)
+        self.leaf("formattedValue", fvAttrs, formattedValue)
+        self.end()
+
+    def repeatableGroup(
+        self, *, name, instanceName: Optional[str] = None, size: Optional[int] = None
+    ) -> _Closer:
+        registry.check_field(self._mtype, name)
+        attrs = [("name", name)]
+        if size is not None:
+            attrs.append(("size", str(size)))
+        if instanceName is not None:
+            attrs.append(("instanceName", instanceName))
+        return self.start("repeatableGroup", attrs)
+
+    def repeatableGroupItem(
+        self, *, ID: Optional[int] = None, uuid: Optional[str] = None
+    ) -> _Closer:
+        attrs = []
+        if ID is not None:
+            attrs.append(("id", str(ID)))
+        if uuid is not None:
+            attrs.append(("uuid", uuid))
+        return self.start("repeatableGroupItem", attrs)
+
+    #
+    # private
+    #
+
+    def _check(self) -> None:
+        if len(self._parts) > _CHUNK or not self._stack:
+            self.flush()
+
+    def _open(self, tag: str, attrs: Attrs) -> str:
+        """
+        "<tag attrs" with whatever has to come before it
+        """
+        level = len(self._stack)
+        head = ""
+        if self._pending:
+            head = ">\n" if self.pretty_print else ">"
+            self._pending = False
+        if self.pretty_print and level:
+            head += "  " * level
+        attrs = "".join(f' {key}="{escape_attrib(value)}"' for key, value in attrs)
+        if not level:
+            return f"{head}<{tag}{_XMLNS}{attrs}"
+        return f"{head}<{tag}{attrs}"
+
+    def _simpleField(
+        self,
+        tag: str,
+        dataType: Optional[str],
+        name: Optional[str],
+        value: Optional[str],
+    ) -> None:
+        attrs = []
+        if name is not None:
+            attrs.append(("name", name))
+        if dataType is not None:
+            registry.check_dataType(dataType)
+            attrs.append(("dataType", dataType))
+        registry.check_field(self._mtype, name, dataType)
+        if value is None:
+            self.leaf(tag, attrs)
+        elif self.pretty_print:
+            indent = "  " * (len(self._stack) + 1)
+            self._parts.append(
+                f"{self._open(tag, attrs)}>\n{indent}<value>{escape(value)}</value>\n"
+                f"{indent[2:]}</{tag}>\n"
+            )
+            self._check()
+        else:
+            self._parts.append(
+                f"{self._open(tag, attrs)}><value>{escape(value)}</value></{tag}>"
+            )
+            self._check()
+
+
+def escape(text: str) -> str:
+    """
+    Escape text like libxml2; raises ValueError (like lxml) for characters that
+    are not allowed in XML, e.g. control characters.
+    """
+    if _NOT_XML.search(text) is not None:
+        raise ValueError(
+            "All strings must be XML compatible: Unicode or ASCII, no NULL bytes or"
+            " control characters"
+        )
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    return text
+
+
+def escape_attrib(text: str) -> str:
+    """
+    Escape attribute values like libxml2
+    """
+    text = escape(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#9;")
+    return text
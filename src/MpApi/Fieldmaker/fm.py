@@ -59,6 +59,16 @@ Methods
     a = df.wrap(module=Object, ID=1234) 
 - xpath(str): xpath with module default namespace 
     result = mi.xpath("/application/modules/module")
+- application.fromfile(path)/fromstring(xml): parse existing documents
+    a = application.fromfile("export.xml")
+    mi = a.get_item(1234, mtype="Object")
+- module(name=..., validate=True): check every moduleItem against the schema when
+  it is added; raises InvalidItemError with the item's id
+    m = module(name="Object", validate=True)
+    m.add(moduleItem(ID=1234))
+- get_field(name), get_item(ID): indexed lookups in moduleItem, repeatableGroupItem
+  and repeatableGroup; iter_fields(), iter_items() to go through them
+    df = mi.get_field("ObjTechnicalTermClb")
 
 
  # Fieldmaker
@@ -92,28 +102,179 @@ Methods
 from __future__ import annotations
 from lxml.etree import Element
 from lxml import etree
+from functools import lru_cache
 from mpapi.client import MpApi
+from MpApi.Fieldmaker import compress
+from MpApi.Fieldmaker.schema import (
+    Registry,
+    UnknownDataTypeError,
+    UnknownFieldError,
+    UnknownModuleTypeError,
+)
 
 # from mpapi.constants import NSMAP
 import pkgutil
-from typing import Optional
+from typing import IO, Iterator, Optional, Union
 
 # NS = "{http://www.zetcom.com/ria/ws/module}"
 
 # as usual I have trouble with namespaces, so I am not using default namespace NSMAP,
 # but old skool NSMAP with m prefix
 NSMAP = {None: "http://www.zetcom.com/ria/ws/module"}
+NS = "{" + NSMAP[None] + "}"
+# for xpath we need a prefix
+XPATH_NSMAP = {"m": NSMAP[None]}
 
-known_module_types = ("Object", "Mulimedia")  # TODO: make this configurable
-known_dataTypes = ("Boolean", "Clob", "Date", "Long", "Numeric", "Timestamp", "Varchar")
+# module types, dataTypes and (optionally) fields we check against; see schema.py
+registry = Registry(
+    module_types=("Object", "Multimedia", "Person", "Exhibition", "Registrar"),
+    dataTypes=("Boolean", "Clob", "Date", "Long", "Numeric", "Timestamp", "Varchar"),
+)
+# the registry's sets, for older code
+known_module_types = registry.module_types
+known_dataTypes = registry.dataTypes
 
 
-class UnknownModuleTypeError(Exception):
-    pass
 
+def _tags(*names: str) -> tuple:
+    """
+    Elements made by our constructors have no namespace, parsed elements do; so we
+    look for both.
+    """
+    return names + tuple(NS + name for name in names)
+
+
+# containers with a size attribute, see baseField.update_sizes()
+_SIZED = _tags("module", "repeatableGroup")
+
+
+def _append(parentN: etree._Element, childN: etree._Element) -> None:
+    """
+    Appends childN. If parentN is in the module namespace (parsed) and childN is not
+    (made by our constructors), childN and everything below it is moved into the
+    namespace first, so that parsed documents stay in one namespace when we add to
+    them.
+    """
+    if parentN.tag[0] == "{" and childN.tag[0] != "{":
+        for el in childN.iter("{}*"):  # elements without namespace
+            el.tag = NS + el.tag
+    parentN.append(childN)
+
+
+def _namespaced(element: etree._Element) -> bool:
+    """
+    True if element and all elements below are in a namespace, i.e. the tree can be
+    validated as it is. Trees made by our constructors, and mixed trees (e.g. lxml
+    elements appended directly), have to go through bytes first.
+    """
+    return next(element.iter("{}*"), None) is None
+
+# compiled schema is shared by all documents in this process; see get_xmlschema()
+_xmlschema: Optional[etree.XMLSchema] = None
+
+
+def get_xmlschema() -> etree.XMLSchema:
+    """
+    Returns the compiled module_1_6.xsd. It is loaded and compiled only once per
+    process, on first use, since compiling the schema is expensive.
+    """
+    global _xmlschema
+    if _xmlschema is None:
+        xsd_str = pkgutil.get_data("mpapi.client", "data/xsd/module_1_6.xsd")
+        _xmlschema = etree.XMLSchema(etree.fromstring(xsd_str))
+    return _xmlschema
+
+
+@lru_cache(maxsize=256)
+def _compile_xpath(xpath: str) -> etree.XPath:
+    """
+    Compiling is expensive, so we keep the most recently used expressions
+    """
+    return etree.XPath(xpath, namespaces=XPATH_NSMAP)
+
+
+class InvalidItemError(Exception):
+    """
+    A moduleItem failed validation; mtype and ID tell us which one.
+    """
+
+    def __init__(self, message: str, *, mtype: str, ID: Optional[str]) -> None:
+        super().__init__(message)
+        self.mtype = mtype
+        self.ID = ID
+
+
+class ItemValidator:
+    """
+    Validates single moduleItems (or serialized chunks of them) against the schema,
+    so that errors show up while a document is made, not after the whole run.
+
+    Every item is put into a small application/modules/module skeleton of its own,
+    which is validated and emptied again. So cost and memory per check depend only
+    on the size of the item, not on the size of the document.
+
+    USAGE
+        v = ItemValidator("Object")
+        v.check(mi)              # raises InvalidItemError or returns True
+        v.check_fragment(xml)    # bytes with one or more moduleItems
+    """
+
+    def __init__(self, mtype: str, *, schema: Optional[etree.XMLSchema] = None) -> None:
+        registry.check_module_type(mtype)
+        self.mtype = mtype
+        self.schema = schema if schema is not None else get_xmlschema()
+        self._head = (
+            f'<application xmlns="{NSMAP[None]}"><modules>'
+            f'<module name="{mtype}" totalSize="1">'
+        ).encode()
+        self._tail = b"</module></modules></application>"
+        self._moduleN = etree.fromstring(self._head + self._tail)[0][0]
+
+    def check(self, item: Union[baseField, etree._Element]) -> True:
+        """
+        item is a moduleItem or its element; raises InvalidItemError
+        """
+        itemN = item if isinstance(item, etree._Element) else item.element
+        if _namespaced(itemN):
+            copyN = itemN.__deepcopy__(None)
+        else:
+            # our constructors make elements without namespace, maybe only some of
+            # them; see application.validate()
+            copyN = etree.fromstring(etree.tostring(itemN))
+        self._moduleN.append(copyN)
+        try:
+            valid = self.schema.validate(self._moduleN.getroottree())
+        finally:
+            self._moduleN.remove(copyN)
+        if not valid:
+            self._raise(itemN.get("id"))
+        return True
+
+    def check_fragment(self, xml: bytes) -> True:
+        """
+        xml: serialized moduleItems without the skeleton, like for
+        StreamWriter.add_fragment(). The chunk is validated in one go; only if it
+        is invalid, we look for the first bad item.
+        """
+        docN = etree.fromstring(self._head + xml + self._tail, _parser)
+        if self.schema.validate(docN):
+            return True
+        for itemN in docN[0][0]:
+            self.check(itemN)
+        # only the chunk as a whole is invalid, e.g. wrong root
+        self._raise(None)
+
+    #
+    # private
+    #
 
-class UnknownDataTypeError(Exception):
-    pass
+    def _raise(self, ID: Optional[str]) -> None:
+        errors = "; ".join(e.message for e in self.schema.error_log)
+        raise InvalidItemError(
+            f"ERROR: {self.mtype} moduleItem {ID} is invalid: {errors}",
+            mtype=self.mtype,
+            ID=ID,
+        )
 
 
 class baseField:
@@ -121,9 +282,19 @@ class baseField:
         """
         Appends child to object.
         """
-        self.element.append(child.element)
+        _append(self.element, child.element)
         return child
 
+    @classmethod
+    def from_element(cls, element: etree._Element) -> baseField:
+        """
+        Wraps an existing lxml element (no copy).
+            mi = moduleItem.from_element(moduleItemN)
+        """
+        obj = cls.__new__(cls)
+        obj.element = element
+        return obj
+
     def count_elements(self) -> int:
         """
         Counts all elements (starting with 1).
@@ -132,12 +303,57 @@ class baseField:
         """
         return int(self.xpath("count(//*)"))
 
-    def tostring(self) -> str:
+    def tostring(
+        self,
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = True,
+        encoding: str = "unicode",
+    ) -> Union[str, bytes]:
+        """
+        Returns str by default. With an encoding like "UTF-8" you get bytes, e.g. for
+        http uploads; pretty_print=False gives compact xml.
+            payload = a.tostring(pretty_print=False, encoding="UTF-8")
+
+        With update_sizes=True, totalSize and size attributes of all modules and
+        repeatableGroups are set to the number of their items first.
+        """
         # root = self.element.getroottree()
+        if update_sizes:
+            self.update_sizes()
+        return etree.tostring(self.element, pretty_print=pretty_print, encoding=encoding)
 
-        xml = etree.tostring(self.element, pretty_print=True, encoding="unicode")
-        # xml = xml.encode()
-        return xml
+    def write_to(
+        self,
+        fileobj: IO[bytes],
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = False,
+        xml_declaration: Optional[bool] = None,
+    ) -> None:
+        """
+        Serializes as UTF-8 straight into a binary file object (or anything else with
+        a write method), without making a string first.
+            a.write_to(buffer)
+        """
+        if update_sizes:
+            self.update_sizes()
+        etree.ElementTree(self.element).write(
+            fileobj,
+            encoding="UTF-8",
+            pretty_print=pretty_print,
+            xml_declaration=xml_declaration,
+        )
+
+    def update_sizes(self) -> None:
+        """
+        Sets totalSize of every module and size of every repeatableGroup below (and
+        including) this element to the number of its items. One walk over the tree;
+        every container only counts its own children.
+        """
+        for el in self.element.iter(*_SIZED):
+            attrib = "totalSize" if etree.QName(el).localname == "module" else "size"
+            el.attrib[attrib] = str(len(el))
 
     def wrap(self, *, mtype: str, ID: int) -> application:
         """
@@ -164,31 +380,204 @@ class baseField:
         m.update_totalSize()
         return a
 
-    def xpath(self, xpath):  # -> something xpath
-        # for xpath we apparently need prefix
-        NSMAP = {"m": "http://www.zetcom.com/ria/ws/module"}
-        return self.element.xpath(xpath, namespaces=NSMAP)
+    def xpath(self, xpath: str, **variables):  # -> something xpath
+        """
+        Compiled expressions are cached, so use variables instead of putting values
+        into the expression yourself:
+            a.xpath("/application/modules/module[@name = $mtype]", mtype="Object")
+        """
+        return _compile_xpath(xpath)(self.element, **variables)
 
     #
     # private
     #
 
     def _check_dataType(self, dataType: str):
-        if dataType not in known_dataTypes:
-            raise UnknownDataTypeError(f"ERROR: Unknown dataType '{dataType}'")
+        registry.check_dataType(dataType)
+
+
+class fieldContainer(baseField):
+    """
+    moduleItem and repeatableGroupItem hold fields. Fields are looked up by name in
+    an index that is made on first use; wrappers are only made when a field is
+    accessed.
+    """
+
+    _index: Optional[dict] = None
+
+    def add(self, child: baseField) -> baseField:
+        _append(self.element, child.element)
+        self._index = None
+        return child
+
+    def get_field(self, name: str) -> Optional[baseField]:
+        """
+        Returns the field with this name as Fieldmaker object or None.
+            df = mi.get_field("ObjTechnicalTermClb")
+        """
+        if self._index is None:
+            self._index = {}
+            for fieldN in self.element.iterchildren(etree.Element):
+                self._index.setdefault(fieldN.get("name"), fieldN)
+        fieldN = self._index.get(name)
+        if fieldN is None:
+            return None
+        return _wrap(fieldN)
+
+    def iter_fields(self) -> Iterator[baseField]:
+        for fieldN in self.element.iterchildren(etree.Element):
+            yield _wrap(fieldN)
 
 
 class application(baseField):
+    """
+    Parsing existing documents
+        a = application.fromfile("export.xml")
+        a = application.fromstring(xml)
+        mi = a.get_item(1234, mtype="Object")
+        df = mi.get_field("ObjTechnicalTermClb")
+        for mi in a.iter_items(mtype="Object"):
+            ...
+    Lookups go through an index that is made on the first call. It keeps the
+    moduleItem objects, so get_item() returns the same object every time and its
+    field index is kept too. Items added with add_item() are put into the index; if the number of items of a module changes
+    otherwise (e.g. module.add(), or lxml directly), the index is made again on the
+    next lookup. After other changes (e.g. a changed id), call reindex().
+
+    Documents with several module types
+        a = application()
+        a.add_item(moduleItem(ID=1), mtype="Object")
+        a.add_item(moduleItem(ID=2), mtype="Multimedia")
+        a.update_totalSizes()  # {"Object": 1, "Multimedia": 1}
+    add_item() finds the module through a dict, so building a document costs
+    O(items), however many module types it has.
+
+    ATTENTION: parsed elements are in the module namespace, so use the m prefix
+    with xpath, e.g. a.xpath("/m:application/m:modules")
+    """
+
+    _index: Optional[dict] = None
+    _modules: Optional[dict] = None
+    _sizes: Optional[dict] = None  # {module element: len} when _index was updated
+
     def __init__(self) -> None:
         self.element = etree.Element("application", nsmap=NSMAP)
 
-    def tofile(self, path: str) -> None:
+    def add(self, child: baseField) -> baseField:
+        _append(self.element, child.element)
+        self.reindex()
+        return child
+
+    @classmethod
+    def fromfile(cls, path: str, *, compression: Optional[str] = None) -> application:
+        """
+        compression: "gzip", "zstd" or "none"; by default from the extension, see
+        MpApi.Fieldmaker.compress
+        """
+        if compress.compression_for(path, compression) is None:
+            doc = etree.parse(str(path), _parser)
+        else:
+            with compress.open_file(path, "rb", compression=compression) as f:
+                doc = etree.parse(f, _parser)
+        return cls.from_element(doc.getroot())
+
+    @classmethod
+    def fromstring(cls, xml: Union[str, bytes]) -> application:
+        if isinstance(xml, str):
+            xml = xml.encode()  # lxml refuses str with encoding declaration
+        return cls.from_element(etree.fromstring(xml, _parser))
+
+    def get_item(self, ID: int, *, mtype: Optional[str] = None) -> Optional[moduleItem]:
+        """
+        Returns the moduleItem with this id or None. Without mtype, we look in all
+        modules.
+        """
+        index = self._item_index()
+        ID = str(ID)
+        for name, items in index.items():
+            if mtype is None or mtype == name:
+                item = items.get(ID)
+                if item is not None:
+                    return item
+        return None
+
+    def iter_items(self, *, mtype: Optional[str] = None) -> Iterator[moduleItem]:
+        for moduleN in self.element.iter(_MODULE):
+            if mtype is None or moduleN.get("name") == mtype:
+                for itemN in moduleN.iterchildren(_MODULEITEM):
+                    yield moduleItem.from_element(itemN)
+
+    def get_module(self, mtype: str) -> module:
+        """
+        Returns the module of this type, adds it (and modules) if necessary.
+        """
+        m = self._module_index().get(mtype)
+        if m is None:
+            modulesN = self._modules_element()  # adding modules resets the index
+            index = self._module_index()
+            m = module(name=mtype)
+            _append(modulesN, m.element)
+            index[mtype] = m
+            if self._index is not None:
+                self._index.setdefault(mtype, {})
+                self._sizes[m.element] = 0
+        return m
+
+    def add_item(self, item: moduleItem, *, mtype: str) -> moduleItem:
+        """
+        Adds item to the module of type mtype.
+        """
+        m = self.get_module(mtype)
+        m.add(item)
+        if self._index is not None:
+            self._index.setdefault(mtype, {}).setdefault(item.element.get("id"), item)
+            self._sizes[m.element] = len(m.element)
+        return item
+
+    @property
+    def totals(self) -> dict[str, int]:
+        """
+        {mtype: number of moduleItems} for all modules
+        """
+        return {mtype: m.size for mtype, m in self._module_index().items()}
+
+    def update_totalSizes(self) -> dict[str, int]:
+        """
+        Sets totalSize of every module from the counters; returns totals.
+        """
+        for m in self._module_index().values():
+            m.update_totalSize()
+        return self.totals
+
+    def reindex(self) -> None:
+        self._index = None
+        self._modules = None
+        self._sizes = None
+
+    def tofile(
+        self,
+        path: str,
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = True,
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        compression: "gzip", "zstd" or "none"; by default from the extension, see
+        MpApi.Fieldmaker.compress
+        """
+        if update_sizes:
+            self.update_sizes()
         doc = etree.ElementTree(self.element)
-        doc.write(str(path), pretty_print=True, encoding="UTF-8")
+        if compress.compression_for(path, compression) is None:
+            doc.write(str(path), pretty_print=pretty_print, encoding="UTF-8")
+        else:
+            with compress.open_file(path, "wb", compression=compression) as f:
+                doc.write(f, pretty_print=pretty_print, encoding="UTF-8")
 
     def _update_totalSize(self) -> None:
         """
-        OBSOLETE
+        OBSOLETE: use update_totalSizes()
         This version updates the totalSize for potentially multiple mtypes, so does
         not return the actual size in a simple int.
         """
@@ -197,37 +586,85 @@ class application(baseField):
         # print (f"GET HERE! {mtypeL}")
         # print (self.tostring())
         for mtype in mtypeL:
-            moduleN = self.xpath(f"/application/modules/module[@name = '{mtype}']")[0]
+            moduleN = self.xpath(
+                "/application/modules/module[@name = $mtype]", mtype=mtype
+            )[0]
             totalSize = int(
                 self.xpath(
-                    f"count(/application/modules/module[@name = '{mtype}']/moduleItem)"
+                    "count(/application/modules/module[@name = $mtype]/moduleItem)",
+                    mtype=mtype,
                 )
             )
             # print (f"module item SIZE {totalSize}")
             moduleN.attrib["totalSize"] = str(totalSize)
         print(self.tostring())
 
+    @property
+    def xmlschema(self) -> etree.XMLSchema:
+        return get_xmlschema()
+
     def validate(self) -> True:
         """
         Raise with useful error message if validation fails or returns True
-        """
 
-        try:
-            self.xmlschema
-        except:
-            xsd_str = pkgutil.get_data("mpapi.client", "data/xsd/module_1_6.xsd")
-            xmlschema_doc = etree.fromstring(xsd_str)
-            self.xmlschema = etree.XMLSchema(xmlschema_doc)
-        #
-        # why do I have to transform it to string and back?
-        # Because it makes a copy?
-        ET = etree.XML(self.tostring())
+        Trees that are completely in the module namespace (e.g. parsed documents)
+        are validated in place. Our constructors create elements without namespace
+        and only declare the default namespace (so that xpath works without prefix).
+        The namespace only gets applied when the document is parsed again, so for
+        those trees, and for mixed ones, we still have to go through bytes; we use
+        compact bytes instead of the pretty str from tostring() since that is
+        considerably cheaper.
+        """
+        if _namespaced(self.element):
+            ET = self.element
+        else:
+            ET = etree.fromstring(etree.tostring(self.element))
         self.xmlschema.assertValid(ET)
         return True
 
     def wrap(self) -> None:
         raise TypeError("ERROR: Don't wrap in application!")
 
+    #
+    # private
+    #
+
+    def _module_index(self) -> dict[str, module]:
+        """
+        {mtype: module}
+        """
+        if self._modules is None:
+            self._modules = {}
+            for moduleN in self.element.iter(_MODULE):
+                self._modules.setdefault(moduleN.get("name"), module.from_element(moduleN))
+        return self._modules
+
+    def _modules_element(self) -> etree._Element:
+        for modulesN in self.element.iterchildren(_MODULES):
+            return modulesN
+        return self.add(modules()).element
+
+    def _item_index(self) -> dict[str, dict[str, moduleItem]]:
+        """
+        {mtype: {ID: moduleItem}}
+        """
+        if self._index is not None:
+            # items added behind our back; one len() per module
+            for moduleN, size in self._sizes.items():
+                if len(moduleN) != size:
+                    self._index = None
+                    break
+        if self._index is None:
+            self._index = {}
+            self._sizes = {}
+            for moduleN in self.element.iter(_MODULE):
+                items = self._index.setdefault(moduleN.get("name"), {})
+                for itemN in moduleN.iterchildren(_MODULEITEM):
+                    if itemN.get("id") not in items:
+                        items[itemN.get("id")] = moduleItem.from_element(itemN)
+                self._sizes[moduleN] = len(moduleN)
+        return self._index
+
 
 class modules(baseField):
     def __init__(self) -> None:
@@ -240,35 +677,64 @@ class modules(baseField):
 
 
 class module(baseField):
-    def __init__(self, *, name: str, totalSize: Optional[int] = None) -> None:
-        # we could test for known module types
-        if name not in known_module_types:
-            raise UnknownModuleTypeError(f"Error: Unknown module type '{name}')")
+    validator: Optional[ItemValidator] = None
+
+    def __init__(
+        self, *, name: str, totalSize: Optional[int] = None, validate: bool = False
+    ) -> None:
+        """
+        validate: check every moduleItem when it is added, see ItemValidator
+        """
+        registry.check_module_type(name)
 
         moduleN = etree.Element("module", nsmap=NSMAP, name=name)
         if totalSize is not None:
-            moduleN.attrib["totalSize"] = totalSize
+            moduleN.attrib["totalSize"] = str(totalSize)
         self.element = moduleN
         self.mtype = name
+        self.size = 0  # number of moduleItems added so far
+        if validate:
+            self.validator = ItemValidator(name)
+
+    @classmethod
+    def from_element(cls, element: etree._Element) -> module:
+        obj = super().from_element(element)
+        obj.mtype = element.attrib["name"]
+        obj.size = len(element)
+        return obj
+
+    def add(self, child: baseField) -> baseField:
+        """
+        If the registry knows the fields of this module type, we check the names
+        and dataTypes of the item's fields.
+        """
+        if self.mtype in registry.fields:
+            registry.check_item(self.mtype, child.element)
+        if self.validator is not None:
+            self.validator.check(child)
+        _append(self.element, child.element)
+        self.size += 1
+        return child
 
     def update_totalSize(self) -> int:
-        totalSize = int(self.xpath("count(//module/moduleItem)"))
-        # print (f"module.update_totalSize(): {totalSize}")
-        self.element.attrib["totalSize"] = str(totalSize)
-        # print (self.tostring())
-        return totalSize
+        """
+        Sets totalSize to the number of moduleItems added to this module. We count
+        while adding, so this is cheap.
+        """
+        self.element.attrib["totalSize"] = str(self.size)
+        return self.size
 
     def wrap(self) -> application:
         a = application()
         m = modules()
         ms = a.add(m)
         ms.add(self)
-        a.update_totalSize()
+        self.update_totalSize()
         print(a.tostring())
         return a
 
 
-class moduleItem(baseField):
+class moduleItem(fieldContainer):
     def __init__(
         self,
         *,
@@ -361,7 +827,7 @@ class systemField(baseField):
         if value is not None:
             valueN = etree.Element("value", nsmap=NSMAP)
             valueN.text = value
-            sysField.append(valueN)
+            sysFieldN.append(valueN)
         self.element = sysFieldN
 
 
@@ -531,6 +997,8 @@ class repeatableGroup(baseField):
     </repeatableGroup>
     """
 
+    _index: Optional[dict] = None
+
     def __init__(
         self, *, name, instanceName: Optional[str] = None, size: Optional[int] = None
     ) -> None:
@@ -540,6 +1008,37 @@ class repeatableGroup(baseField):
         if instanceName is not None:
             rGrpN.attrib["instanceName"] = instanceName
         self.element = rGrpN
+        self.size = 0  # number of repeatableGroupItems added so far
+
+    @classmethod
+    def from_element(cls, element: etree._Element) -> repeatableGroup:
+        obj = super().from_element(element)
+        obj.size = len(element)
+        return obj
+
+    def add(self, child: baseField) -> baseField:
+        _append(self.element, child.element)
+        self.size += 1
+        self._index = None
+        return child
+
+    def get_item(self, ID: int) -> Optional[repeatableGroupItem]:
+        """
+        Returns the repeatableGroupItem with this id or None; uses an index like
+        moduleItem.get_field().
+        """
+        if self._index is None:
+            self._index = {}
+            for itemN in self.element.iterchildren(_RGRPITEM):
+                self._index.setdefault(itemN.get("id"), itemN)
+        itemN = self._index.get(str(ID))
+        if itemN is None:
+            return None
+        return repeatableGroupItem.from_element(itemN)
+
+    def iter_items(self) -> Iterator[repeatableGroupItem]:
+        for itemN in self.element.iterchildren(_RGRPITEM):
+            yield repeatableGroupItem.from_element(itemN)
 
     def item(self, *, ID: Optional[int] = None, uuid: Optional[str] = None):
         """
@@ -552,21 +1051,17 @@ class repeatableGroup(baseField):
     def update_size(self) -> int:
         """
         set size programmatically according to current number of items
-        TODO: test this
         Normal use:
             rGrp.update_size()
         You can get size as well
             size = rGrp.update_size()
+        Items are counted in item() and add(), so this doesn't look at the tree.
         """
-        actual_size = int(self.xpath("count(//repeatableGroup/repeatableGroupItem)"))
-        # print (f"SIZE {actual_size}")
-        rGrpN = self.xpath("//repeatableGroup")[0]
-        rGrpN.attrib["size"] = str(actual_size)
-        # print(self.tostring())
-        return actual_size
+        self.element.attrib["size"] = str(self.size)
+        return self.size
 
 
-class repeatableGroupItem(baseField):
+class repeatableGroupItem(fieldContainer):
     def __init__(self, *, ID: Optional[int] = None, uuid: Optional[str] = None) -> None:
         rGrpItem = etree.Element("repeatableGroupItem", nsmap=NSMAP)
 
@@ -576,3 +1071,42 @@ class repeatableGroupItem(baseField):
         if uuid is not None:
             rGrpItem.attrib["uuid"] = uuid
         self.element = rGrpItem
+
+
+#
+# parsing
+#
+
+_MODULES = _tags("modules")
+_MODULE = _tags("module")
+_MODULEITEM = _tags("moduleItem")
+_RGRPITEM = _tags("repeatableGroupItem")
+
+_parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+
+_classes = {
+    cls.__name__: cls
+    for cls in (
+        application,
+        modules,
+        module,
+        moduleItem,
+        dataField,
+        systemField,
+        virtualField,
+        moduleReference,
+        vocabularyReference,
+        vocabularyReferenceItem,
+        repeatableGroup,
+        repeatableGroupItem,
+    )
+}
+
+
+def _wrap(element: etree._Element) -> baseField:
+    """
+    Returns the Fieldmaker object for an element, e.g. dataField for a dataField
+    element. Elements we don't know get a plain baseField.
+    """
+    cls = _classes.get(element.tag.rpartition("}")[2], baseField)
+    return cls.from_element(element)
@@ -0,0 +1,234 @@
+"""
+MpApi.Fieldmaker.index - Get single moduleItems out of big zml files fast
+
+To get a few hundred items by id out of an export of several GB, we don't want to
+parse the whole file. ItemIndex scans the file once (searching the bytes of a
+memory map, not with an xml parser) and notes where every moduleItem starts and
+ends. The index is saved next to the file (export.xml.idx) and reused as long as the
+file doesn't change. A lookup parses only the bytes of that one item.
+
+USAGE
+    from MpApi.Fieldmaker.index import ItemIndex
+
+    with ItemIndex.open("export.xml") as idx:  # builds or loads export.xml.idx
+        mi = idx.get_item(1234, mtype="Object")
+        for mi in idx.iter_items([1, 2, 3], mtype="Object"):
+            ...
+
+Items are parsed like in application.fromfile(), i.e. in the module namespace.
+
+ATTENTION: we expect the usual zml as written by MuseumPlus or Fieldmaker: tags
+without prefix and no "<moduleItem" in comments or CDATA sections.
+"""
+from __future__ import annotations
+import json
+from lxml import etree
+import mmap
+from MpApi.Fieldmaker import compress
+from MpApi.Fieldmaker.fm import _parser, moduleItem
+import os
+from pathlib import Path
+import re
+from typing import Iterable, Iterator, Optional, Union
+
+# what can come after a tag name
+_AFTER_NAME = frozenset((b" ", b"\t", b"\r", b"\n", b"/", b">"))
+_NAME = re.compile(rb'\bname\s*=\s*"([^"]*)"')
+_ID = re.compile(rb'\bid\s*=\s*"([^"]*)"')
+_ROOT = re.compile(rb"<application\b[^>]*>")
+
+# change when the format of the .idx file changes
+_VERSION = 1
+
+
+class ItemIndex:
+    def __init__(self, path: Union[str, Path], items: dict, root: bytes) -> None:
+        """
+        Use ItemIndex.open() or ItemIndex.build().
+        items: {mtype: {ID: (start, end)}}; root: start tag of application
+        """
+        self.path = Path(path)
+        self.items = items
+        self.root = root
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def open(cls, path: Union[str, Path], *, save: bool = True) -> ItemIndex:
+        """
+        Loads the index next to path if it fits the file, otherwise builds (and
+        saves) it.
+        """
+        path = Path(path)
+        idx = cls.load(path)
+        if idx is None:
+            idx = cls.build(path)
+            if save:
+                idx.save()
+        return idx
+
+    @classmethod
+    def build(cls, path: Union[str, Path]) -> ItemIndex:
+        """
+        Scans the file once. Compressed files can't be mapped; decompress them
+        first.
+        """
+        path = Path(path)
+        if compress.compression_for(path) is not None:
+            raise ValueError(f"ERROR: Can't index compressed file '{path}'")
+        items: dict[str, dict[str, tuple[int, int]]] = {}
+        root = b""
+        if path.stat().st_size == 0:
+            return cls(path, items, root)
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            match = _ROOT.search(m)
+            if match is not None:
+                root = match.group(0)
+            # bytes.find is much faster than a regular expression; and we jump from
+            # the start of an item straight to its end
+            find = m.find
+            current = None  # items of the module we are in
+            pos = 0
+            while True:
+                pos = find(b"<module", pos)
+                if pos < 0:
+                    break
+                tagEnd = find(b">", pos)
+                if tagEnd < 0:
+                    raise ValueError(f"ERROR: '{path}' is truncated at byte {pos}")
+                tagEnd += 1
+                tag = m[pos:tagEnd]
+                if tag.startswith(b"<moduleItem") and tag[11:12] in _AFTER_NAME:
+                    if current is None:
+                        current = items.setdefault("", {})
+                    ID = _ID.search(tag)
+                    ID = ID.group(1).decode() if ID else ""
+                    if tag.endswith(b"/>"):
+                        end = tagEnd
+                    else:
+                        end = find(b"</moduleItem>", tagEnd)
+                        if end < 0:
+                            raise ValueError(
+                                f"ERROR: '{path}' is truncated in moduleItem at byte {pos}"
+                            )
+                        end += len(b"</moduleItem>")
+                    current.setdefault(ID, (pos, end))
+                    pos = end
+                    continue
+                if tag[7:8] in _AFTER_NAME:  # <module ...>, not modules
+                    name = _NAME.search(tag)
+                    mtype = name.group(1).decode() if name else ""
+                    current = items.setdefault(mtype, {})
+                pos = tagEnd
+        return cls(path, items, root)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional[ItemIndex]:
+        """
+        Returns the saved index or None if there is none or if the file has
+        changed since.
+        """
+        path = Path(path)
+        try:
+            with open(cls.index_path(path), encoding="utf-8") as f:
+                data = json.load(f)
+            stat = path.stat()
+            if (
+                data["version"] != _VERSION
+                or data["size"] != stat.st_size
+                or data["mtime_ns"] != stat.st_mtime_ns
+            ):
+                return None
+            items = {
+                mtype: {ID: tuple(pos) for ID, pos in itemD.items()}
+                for mtype, itemD in data["items"].items()
+            }
+            return cls(path, items, data["root"].encode())
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def index_path(path: Union[str, Path]) -> Path:
+        path = Path(path)
+        return path.with_name(path.name + ".idx")
+
+    def save(self) -> Path:
+        stat = self.path.stat()
+        data = {
+            "version": _VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "root": self.root.decode(),
+            "items": self.items,
+        }
+        target = self.index_path(self.path)
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, target)
+        return target
+
+    def __enter__(self) -> ItemIndex:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def __len__(self) -> int:
+        return sum(len(itemD) for itemD in self.items.values())
+
+    def __contains__(self, ID) -> bool:
+        return self._find(ID, None) is not None
+
+    def get_item(self, ID: Union[int, str], *, mtype: Optional[str] = None) -> Optional[moduleItem]:
+        """
+        Returns the moduleItem with this id (parsed from its bytes only) or None.
+        Without mtype, we look in all modules.
+        """
+        pos = self._find(ID, mtype)
+        if pos is None:
+            return None
+        start, end = pos
+        xml = self.root + self._mmap()[start:end] + b"</application>"
+        return moduleItem.from_element(etree.fromstring(xml, _parser)[0])
+
+    def iter_items(
+        self, IDs: Iterable[Union[int, str]], *, mtype: Optional[str] = None
+    ) -> Iterator[moduleItem]:
+        """
+        Yields the items for IDs in file order; ids we don't have are skipped.
+        """
+        found = []
+        for ID in IDs:
+            pos = self._find(ID, mtype)
+            if pos is not None:
+                found.append((pos, ID))
+        found.sort()
+        for pos, ID in found:
+            yield self.get_item(ID, mtype=mtype)
+
+    #
+    # private
+    #
+
+    def _find(self, ID, mtype: Optional[str]) -> Optional[tuple[int, int]]:
+        ID = str(ID)
+        if mtype is not None:
+            return self.items.get(mtype, {}).get(ID)
+        for itemD in self.items.values():
+            pos = itemD.get(ID)
+            if pos is not None:
+                return pos
+        return None
+
+    def _mmap(self) -> mmap.mmap:
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
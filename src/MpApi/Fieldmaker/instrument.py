@@ -0,0 +1,226 @@
+"""
+MpApi.Fieldmaker.instrument - Where does the time go?
+
+Optional counters and timers for Fieldmaker. When instrumentation is off (the
+default), nothing is changed and there is no overhead at all. enable() wraps the
+constructors and the expensive methods of the classes in fm.py and records.py:
+
+- created: number of objects made per class (constructors only; clones made by
+  Template or RowBuilder and from_element() wrappers are not counted)
+- calls: count and seconds per phase: validate, tostring, tofile, write_to
+- bytes: size of what tostring, tofile and write_to produced (for tostring with
+  encoding="unicode" that is the number of characters)
+
+Calls made inside another instrumented call (e.g. records' tofile() uses
+write_to()) are part of the outer call and not counted again.
+
+A callback gets every finished call: callback(phase, class name, seconds, size);
+size is None if we can't know it (write_to to a file object that can't tell).
+
+USAGE
+    from MpApi.Fieldmaker import instrument
+
+    instrument.enable(callback=exporter)  # callback is optional
+    ...
+    print(instrument.snapshot())
+    instrument.disable()
+
+    with instrument.enabled():
+        a.tostring()
+    stats = instrument.snapshot()
+"""
+from __future__ import annotations
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from MpApi.Fieldmaker import fm, records
+import os
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+Callback = Callable[[str, str, float, Optional[int]], None]
+
+_constructed = (
+    fm.application,
+    fm.modules,
+    fm.module,
+    fm.moduleItem,
+    fm.dataField,
+    fm.systemField,
+    fm.virtualField,
+    fm.vocabularyReference,
+    fm.vocabularyReferenceItem,
+    fm.repeatableGroup,
+    fm.repeatableGroupItem,
+    records.application,
+    records.modules,
+    records.module,
+    records.moduleItem,
+    records.dataField,
+    records.systemField,
+    records.virtualField,
+    records.vocabularyReference,
+    records.vocabularyReferenceItem,
+    records.repeatableGroup,
+    records.repeatableGroupItem,
+)
+
+# (class, method) for every phase
+_timed = (
+    (fm.baseField, "tostring"),
+    (fm.baseField, "write_to"),
+    (fm.application, "tofile"),
+    (fm.application, "validate"),
+    (records.record, "tostring"),
+    (records.record, "write_to"),
+    (records.application, "tofile"),
+    (records.application, "validate"),
+)
+
+_MISSING = object()
+_lock = threading.Lock()
+_local = threading.local()  # depth of nested instrumented calls
+_patched: list[tuple[type, str, object]] = []
+_callback: Optional[Callback] = None
+_created: Counter = Counter()
+_calls: dict[str, list] = {}  # phase: [count, seconds]
+_bytes: Counter = Counter()
+
+
+def enable(*, callback: Optional[Callback] = None) -> None:
+    """
+    Starts counting; counters keep their values, see reset().
+    """
+    global _callback
+    _callback = callback
+    if _patched:
+        return
+    for cls in _constructed:
+        _patch(cls, "__init__", _count(cls, cls.__init__))
+    for cls, name in _timed:
+        _patch(cls, name, _time(name, getattr(cls, name)))
+
+
+def disable() -> None:
+    """
+    Stops counting and puts the original methods back.
+    """
+    global _callback
+    while _patched:
+        cls, name, original = _patched.pop()
+        if original is _MISSING:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _callback = None
+
+
+def is_enabled() -> bool:
+    return bool(_patched)
+
+
+@contextmanager
+def enabled(*, callback: Optional[Callback] = None) -> Iterator[None]:
+    enable(callback=callback)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def reset() -> None:
+    with _lock:
+        _created.clear()
+        _calls.clear()
+        _bytes.clear()
+
+
+def snapshot() -> dict:
+    """
+    {"created": {class: count}, "calls": {phase: {"count", "seconds"}},
+    "bytes": {phase: size}}; a copy, so it doesn't change afterwards.
+    """
+    with _lock:
+        return {
+            "created": dict(_created),
+            "calls": {
+                phase: {"count": count, "seconds": seconds}
+                for phase, (count, seconds) in _calls.items()
+            },
+            "bytes": dict(_bytes),
+        }
+
+
+#
+# private
+#
+
+
+def _patch(cls: type, name: str, wrapper: Callable) -> None:
+    _patched.append((cls, name, cls.__dict__.get(name, _MISSING)))
+    setattr(cls, name, wrapper)
+
+
+def _key(cls: type) -> str:
+    prefix = "records." if cls.__module__ == records.__name__ else ""
+    return prefix + cls.__name__
+
+
+def _count(cls: type, init: Callable) -> Callable:
+    key = _key(cls)
+
+    @wraps(init)
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        if type(self) is cls:  # not for super().__init__() of subclasses
+            with _lock:
+                _created[key] += 1
+
+    return __init__
+
+
+def _time(phase: str, method: Callable) -> Callable:
+    @wraps(method)
+    def timed(self, *args, **kwargs):
+        depth = getattr(_local, "depth", 0)
+        if depth:
+            return method(self, *args, **kwargs)
+        fileobj = args[0] if phase == "write_to" and args else kwargs.get("fileobj")
+        start_pos = _tell(fileobj)
+        _local.depth = 1
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _local.depth = 0
+        seconds = time.perf_counter() - start
+
+        if phase == "tostring":
+            size = len(result)
+        elif phase == "tofile":
+            path = args[0] if args else kwargs["path"]
+            size = os.path.getsize(path)
+        elif phase == "write_to":
+            end_pos = _tell(fileobj)
+            size = None if start_pos is None or end_pos is None else end_pos - start_pos
+        else:
+            size = None
+        with _lock:
+            stat = _calls.setdefault(phase, [0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            if size is not None:
+                _bytes[phase] += size
+        if _callback is not None:
+            _callback(phase, _key(type(self)), seconds, size)
+        return result
+
+    return timed
+
+
+def _tell(fileobj) -> Optional[int]:
+    try:
+        return fileobj.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
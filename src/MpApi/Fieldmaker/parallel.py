@@ -0,0 +1,127 @@
+"""
+MpApi.Fieldmaker.parallel - Build documents in several processes
+
+Building and serializing moduleItems is pure CPU work. The functions here split the
+records into chunks, build the moduleItems of every chunk in a worker process and
+send back serialized bytes (lxml elements can't be pickled). The chunks are either
+merged into one module or written as separate upload files.
+
+build is called in the worker with a list of records (one chunk) and returns the
+moduleItems for it. It has to be picklable, so use a module-level function or a
+RowBuilder's build method.
+
+USAGE
+    from MpApi.Fieldmaker.parallel import write_document, write_shards
+
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    write_document("upload.xml", rows, rb.build, mtype="Object", chunksize=5000)
+
+    # one file per chunk: upload-0000.xml, upload-0001.xml, ...
+    pathL = write_shards("upload-{:04d}.xml", rows, rb.build, mtype="Object")
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+from MpApi.Fieldmaker.fm import moduleItem
+from MpApi.Fieldmaker.writer import StreamWriter, _tostring
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Union
+
+Builder = Callable[[list], Iterable[moduleItem]]
+
+
+def iter_chunks(
+    records: Iterable[Any],
+    build: Builder,
+    *,
+    chunksize: int = 10000,
+    processes: Optional[int] = None,
+) -> Iterator[tuple[int, bytes]]:
+    """
+    Yields (number of moduleItems, serialized moduleItems) per chunk in the order
+    of the records. At most two chunks per process are in flight, so records can be
+    a generator over a big table.
+    """
+    processes = processes or os.cpu_count() or 1
+    window = 2 * processes
+    chunks = _chunked(records, chunksize)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_build_chunk, build, chunk))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_document(
+    target: Union[str, Path, IO[bytes]],
+    records: Iterable[Any],
+    build: Builder,
+    *,
+    mtype: str,
+    chunksize: int = 10000,
+    processes: Optional[int] = None,
+    validate: bool = False,
+) -> int:
+    """
+    Merges all chunks into one module and returns totalSize. With validate, every
+    chunk is checked against the schema before it is written.
+    """
+    with StreamWriter(target, mtype=mtype, validate=validate) as w:
+        for count, xml in iter_chunks(
+            records, build, chunksize=chunksize, processes=processes
+        ):
+            w.add_fragment(xml, count)
+    return w.totalSize
+
+
+def write_shards(
+    pattern: str,
+    records: Iterable[Any],
+    build: Builder,
+    *,
+    mtype: str,
+    chunksize: int = 10000,
+    processes: Optional[int] = None,
+) -> list[Path]:
+    """
+    Writes every chunk as a complete document; pattern is formatted with the number
+    of the chunk, e.g. "upload-{:04d}.xml". Returns the paths.
+    """
+    pathL = []
+    for n, (count, xml) in enumerate(
+        iter_chunks(records, build, chunksize=chunksize, processes=processes)
+    ):
+        path = Path(pattern.format(n))
+        with StreamWriter(path, mtype=mtype) as w:
+            w.add_fragment(xml, count)
+        pathL.append(path)
+    return pathL
+
+
+#
+# private
+#
+
+
+def _chunked(records: Iterable[Any], size: int) -> Iterator[list]:
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _build_chunk(build: Builder, chunk: list) -> tuple[int, bytes]:
+    """
+    runs in the worker
+    """
+    parts = []
+    for mi in build(chunk):
+        parts.append(_tostring(mi.element))
+    return len(parts), b"".join(parts)
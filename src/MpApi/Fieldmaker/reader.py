@@ -0,0 +1,82 @@
+"""
+MpApi.Fieldmaker.reader - Read big zml files item by item
+
+Exports from MuseumPlus can be many GB, too big for application.fromfile(). This is
+the read-side counterpart of the StreamWriter: iterparse_items() goes through a file
+with lxml's iterparse and yields one moduleItem at a time. Items we are done with are
+removed from the tree, so memory stays flat.
+
+USAGE
+    from MpApi.Fieldmaker import iterparse_items
+
+    for mi in iterparse_items("export.xml", mtype="Object", fields={"ObjTechnicalTermClb"}):
+        df = mi.get_field("ObjTechnicalTermClb")
+
+With fields, all other fields are dropped from the moduleItem before it is yielded.
+
+Compressed files (export.xml.gz, export.xml.zst) are decompressed on the fly, see
+MpApi.Fieldmaker.compress.
+
+If you want to keep a moduleItem, just keep it. It is removed from the parsed tree
+when the next item is read, but not cleared.
+"""
+from __future__ import annotations
+from lxml import etree
+from MpApi.Fieldmaker import compress
+from MpApi.Fieldmaker.fm import NS, moduleItem
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional, Union
+
+_MODULE = NS + "module"
+_MODULEITEM = NS + "moduleItem"
+
+
+def iterparse_items(
+    source: Union[str, Path, IO[bytes]],
+    *,
+    mtype: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+    compression: Optional[str] = None,
+) -> Iterator[moduleItem]:
+    """
+    Yields moduleItems from a zml file (path or binary file object).
+    mtype: only items of this module type
+    fields: only keep fields with these names
+    compression: "gzip", "zstd" or "none"; by default from the extension of a path,
+    none for file objects
+    """
+    if isinstance(source, Path):
+        source = str(source)
+    if fields is not None:
+        fields = frozenset(fields)
+    if compress.compression_for(source, compression) is not None:
+        if isinstance(source, str):
+            with compress.open_file(source, "rb", compression=compression) as f:
+                yield from iterparse_items(f, mtype=mtype, fields=fields)
+        else:
+            with compress.reader(source, compression) as f:
+                yield from iterparse_items(f, mtype=mtype, fields=fields)
+        return
+
+    current = None  # module type of the module we are in
+    context = etree.iterparse(
+        source, events=("start", "end"), tag=(_MODULE, _MODULEITEM), huge_tree=True
+    )
+    for event, element in context:
+        if element.tag == _MODULE:
+            if event == "start":
+                current = element.get("name")
+            continue
+        if event == "start":
+            continue
+
+        if mtype is None or mtype == current:
+            if fields is not None:
+                for fieldN in list(element.iterchildren(etree.Element)):
+                    if fieldN.get("name") not in fields:
+                        element.remove(fieldN)
+            yield moduleItem.from_element(element)
+        # we're done with previous items; items still used by the caller live on
+        # outside of the tree
+        while element.getprevious() is not None:
+            del element.getparent()[0]
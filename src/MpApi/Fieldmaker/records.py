@@ -0,0 +1,574 @@
+"""
+MpApi.Fieldmaker.records - Lightweight fields that make lxml elements only on demand
+
+The classes in fm.py make an lxml element as soon as they are constructed. If you
+only want to serialize at the end, that is a lot of allocation for nothing. The
+classes in this module have the same names and the same interface, but are small
+__slots__ records that only keep the constructor arguments (and their children).
+
+- tostring() and write_to() emit the xml straight from the records with the
+  Emitter; the output is the same as the one from the lxml classes. Use
+  method="lxml" to go through lxml instead.
+- element, xpath(), count_elements() and validate() make the lxml tree on first use
+  (with the classes from fm.py). From then on the record uses its element, so
+  changes made with lxml are not lost.
+
+USAGE
+    # same code as with fm.py, just a different import
+    from MpApi.Fieldmaker.records import moduleItem, dataField, repeatableGroup
+
+    mi = moduleItem(ID=1234)
+    mi.add(dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute"))
+    a = mi.wrap(mtype="Object")
+    xml = a.tostring()              # no lxml involved
+    a.validate()                    # now we make the lxml tree
+
+Don't mix records and objects from fm.py in one tree.
+"""
+from __future__ import annotations
+from lxml import etree
+from MpApi.Fieldmaker import compress, fm
+from MpApi.Fieldmaker.fm import (
+    _compile_xpath,
+    registry,
+)
+from MpApi.Fieldmaker.emitter import Emitter
+from typing import IO, Iterator, Optional, Union
+
+
+class record:
+    """
+    Base class; subclasses describe themselves with _node():
+        (tag, attributes as tuple of (name, value), content)
+    content is None (empty element), a str (text) or a list of children (records
+    or node tuples).
+    """
+
+    __slots__ = ("_element",)
+
+    def __init__(self) -> None:
+        self._element = None
+
+    @property
+    def element(self) -> etree._Element:
+        if self._element is None:
+            self._element = self._materialize()
+        return self._element
+
+    def add(self, child: record) -> record:
+        self.children.append(child)
+        if self._element is not None:
+            self._element.append(child.element)
+        return child
+
+    def count_elements(self) -> int:
+        return int(self.xpath("count(//*)"))
+
+    def tostring(
+        self,
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = True,
+        encoding: str = "unicode",
+        method: str = "emit",
+    ) -> Union[str, bytes]:
+        """
+        Same interface and same output as fm.baseField.tostring(). With
+        method="emit" (default) we write the xml with the Emitter, with
+        method="lxml" we make the lxml tree and let lxml serialize it.
+        """
+        if update_sizes:
+            self.update_sizes()
+        if method == "emit" and encoding.upper().replace("-", "") in ("UNICODE", "UTF8"):
+            e = Emitter(pretty_print=pretty_print, encoding=encoding)
+            try:
+                _feed(self, e)
+                return e.getvalue()
+            except _Materialized:
+                # (part of) the tree has lxml elements already, maybe changed
+                pass
+        elif method not in ("emit", "lxml"):
+            raise ValueError(f"ERROR: Unknown method '{method}'")
+        return etree.tostring(self.element, pretty_print=pretty_print, encoding=encoding)
+
+    def update_sizes(self) -> None:
+        for rec in self._iter_records():
+            if isinstance(rec, (module, repeatableGroup)):
+                rec._update()
+
+    def wrap(self, *, mtype: str, ID: int) -> application:
+        a = application()
+        ms = a.add(modules())
+        m = ms.add(module(name=mtype))
+        mi = m.add(moduleItem(ID=ID))
+        mi.add(self)
+        m.update_totalSize()
+        return a
+
+    def write_to(
+        self,
+        fileobj: IO[bytes],
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = False,
+        xml_declaration: Optional[bool] = None,
+        method: str = "emit",
+    ) -> None:
+        """
+        With method="emit" the Emitter writes straight into fileobj.
+        """
+        if method == "lxml" or any(
+            rec._element is not None for rec in self._iter_records()
+        ):
+            fm.baseField.write_to(
+                self,
+                fileobj,
+                update_sizes=update_sizes,
+                pretty_print=pretty_print,
+                xml_declaration=xml_declaration,
+            )
+            return
+        if update_sizes:
+            self.update_sizes()
+        if xml_declaration:
+            fileobj.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        e = Emitter(fileobj, pretty_print=pretty_print, encoding="UTF-8")
+        _feed(self, e)
+        e.flush()
+
+    def xpath(self, xpath: str, **variables):
+        return _compile_xpath(xpath)(self.element, **variables)
+
+    #
+    # private
+    #
+
+    def _check_dataType(self, dataType: str):
+        registry.check_dataType(dataType)
+
+    def _iter_records(self) -> Iterator[record]:
+        yield self
+        for child in getattr(self, "children", ()):
+            yield from child._iter_records()
+
+    def _materialize_children(self, obj: fm.baseField) -> fm.baseField:
+        for child in self.children:
+            obj.add(child)  # uses child.element
+        return obj
+
+
+#
+# simple fields: dataField, virtualField, systemField
+#
+
+
+class _simpleField(record):
+    __slots__ = ("name", "dataType", "value")
+    tag = None
+
+    def __init__(
+        self,
+        *,
+        dataType: Optional[str] = None,
+        name: Optional[str] = None,
+        value: Optional[str] = None,
+    ) -> None:
+        if dataType is not None:
+            self._check_dataType(dataType)
+        self._element = None
+        self.name = name
+        self.dataType = dataType
+        self.value = value
+
+    def _node(self) -> tuple:
+        attrs = []
+        if self.name is not None:
+            attrs.append(("name", self.name))
+        if self.dataType is not None:
+            attrs.append(("dataType", self.dataType))
+        if self.value is None:
+            return (self.tag, attrs, None)
+        return (self.tag, attrs, [("value", (), self.value)])
+
+    def _materialize(self) -> etree._Element:
+        cls = getattr(fm, self.tag)
+        return cls(dataType=self.dataType, name=self.name, value=self.value).element
+
+
+class dataField(_simpleField):
+    __slots__ = ()
+    tag = "dataField"
+
+
+class systemField(_simpleField):
+    __slots__ = ()
+    tag = "systemField"
+
+
+class virtualField(_simpleField):
+    """
+    virtualFields always have a value element, like in fm.py; no dataType
+    """
+
+    __slots__ = ()
+    tag = "virtualField"
+
+    def __init__(self, *, name: Optional[str] = None, value: Optional[str] = None):
+        super().__init__(name=name, value=value)
+
+    def _node(self) -> tuple:
+        attrs = [("name", self.name)] if self.name is not None else []
+        return (self.tag, attrs, [("value", (), self.value)])
+
+    def _materialize(self) -> etree._Element:
+        return fm.virtualField(name=self.name, value=self.value).element
+
+
+#
+# complex fields
+#
+
+
+class vocabularyReference(record):
+    __slots__ = ("name", "ID", "instanceName", "children")
+
+    def __init__(
+        self, *, name: str, ID: Optional[int] = None, instanceName: Optional[str] = None
+    ):
+        self._element = None
+        self.name = name
+        self.ID = ID
+        self.instanceName = instanceName
+        self.children = []
+
+    def item(
+        self,
+        *,
+        ID: Optional[int] = None,
+        name: Optional[str] = None,
+        language: Optional[str] = None,
+        formattedValue: Optional[str] = None,
+    ) -> vocabularyReferenceItem:
+        # language is not passed on, like in fm.vocabularyReference.item()
+        return self.add(
+            vocabularyReferenceItem(ID=ID, name=name, formattedValue=formattedValue)
+        )
+
+    def _node(self) -> tuple:
+        attrs = [("name", self.name)]
+        if self.ID is not None:
+            attrs.append(("id", str(self.ID)))
+        if self.instanceName is not None:
+            attrs.append(("instanceName", self.instanceName))
+        return ("vocabularyReference", attrs, self.children)
+
+    def _materialize(self) -> etree._Element:
+        obj = fm.vocabularyReference(
+            name=self.name, ID=self.ID, instanceName=self.instanceName
+        )
+        return self._materialize_children(obj).element
+
+
+class vocabularyReferenceItem(record):
+    __slots__ = ("ID", "name", "language", "formattedValue")
+
+    def __init__(
+        self,
+        *,
+        ID: int,
+        name: Optional[str] = None,
+        language: Optional[str] = None,
+        formattedValue: Optional[str] = None,
+    ) -> None:
+        self._element = None
+        self.ID = ID
+        self.name = name
+        self.language = language
+        self.formattedValue = formattedValue
+
+    def _node(self) -> tuple:
+        attrs = [("id", str(self.ID))]
+        if self.name is not None:
+            attrs.append(("name", self.name))
+        if self.formattedValue is None:
+            return ("vocabularyReferenceItem", attrs, None)
+        fvAttrs = () if self.language is None else (("language", self.language),)
+        return (
+            "vocabularyReferenceItem",
+            attrs,
+            [("formattedValue", fvAttrs, self.formattedValue)],
+        )
+
+    def _materialize(self) -> etree._Element:
+        return fm.vocabularyReferenceItem(
+            ID=self.ID,
+            name=self.name,
+            language=self.language,
+            formattedValue=self.formattedValue,
+        ).element
+
+
+class repeatableGroup(record):
+    """
+    size is the number of items; the size attribute is set with update_size() (or
+    given to the constructor), like in fm.py
+    """
+
+    __slots__ = ("name", "instanceName", "size", "_sizeAttrib", "_sizeFirst", "children")
+
+    def __init__(
+        self, *, name, instanceName: Optional[str] = None, size: Optional[int] = None
+    ) -> None:
+        self._element = None
+        self.name = name
+        self.instanceName = instanceName
+        self.size = 0
+        # fm.py puts a size from the constructor before instanceName, one from
+        # update_size() after it
+        self._sizeAttrib = None if size is None else str(size)
+        self._sizeFirst = size is not None
+        self.children = []
+
+    def add(self, child: record) -> record:
+        self.size += 1
+        return super().add(child)
+
+    def item(
+        self, *, ID: Optional[int] = None, uuid: Optional[str] = None
+    ) -> repeatableGroupItem:
+        return self.add(repeatableGroupItem(ID=ID, uuid=uuid))
+
+    def update_size(self) -> int:
+        self._update()
+        return self.size
+
+    def _update(self) -> None:
+        self._sizeAttrib = str(self.size)
+        if self._element is not None:
+            self._element.attrib["size"] = self._sizeAttrib
+
+    def _node(self) -> tuple:
+        attrs = [("name", self.name)]
+        if self._sizeFirst:
+            attrs.append(("size", self._sizeAttrib))
+        if self.instanceName is not None:
+            attrs.append(("instanceName", self.instanceName))
+        if self._sizeAttrib is not None and not self._sizeFirst:
+            attrs.append(("size", self._sizeAttrib))
+        return ("repeatableGroup", attrs, self.children)
+
+    def _materialize(self) -> etree._Element:
+        obj = fm.repeatableGroup(
+            name=self.name,
+            instanceName=self.instanceName,
+            size=self._sizeAttrib if self._sizeFirst else None,
+        )
+        self._materialize_children(obj)
+        if self._sizeAttrib is not None and not self._sizeFirst:
+            obj.element.attrib["size"] = self._sizeAttrib
+        return obj.element
+
+
+class repeatableGroupItem(record):
+    __slots__ = ("ID", "uuid", "children")
+
+    def __init__(self, *, ID: Optional[int] = None, uuid: Optional[str] = None) -> None:
+        self._element = None
+        self.ID = ID
+        self.uuid = uuid
+        self.children = []
+
+    def _node(self) -> tuple:
+        attrs = []
+        if self.ID is not None:
+            attrs.append(("id", str(self.ID)))
+        if self.uuid is not None:
+            attrs.append(("uuid", self.uuid))
+        return ("repeatableGroupItem", attrs, self.children)
+
+    def _materialize(self) -> etree._Element:
+        obj = fm.repeatableGroupItem(ID=self.ID, uuid=self.uuid)
+        return self._materialize_children(obj).element
+
+
+#
+# document: application, modules, module, moduleItem
+#
+
+
+class moduleItem(record):
+    __slots__ = ("ID", "hasAttachments", "uuid", "children")
+
+    def __init__(
+        self,
+        *,
+        ID: int,
+        hasAttachments: Optional[bool] = None,
+        uuid: Optional[str] = None,
+    ) -> None:
+        self._element = None
+        self.ID = ID
+        self.hasAttachments = hasAttachments
+        self.uuid = uuid
+        self.children = []
+
+    def wrap(self, *, mtype: str) -> application:
+        a = application()
+        ms = a.add(modules())
+        m = ms.add(module(name=mtype))
+        m.add(self)
+        return a
+
+    def _node(self) -> tuple:
+        attrs = [("id", str(self.ID))]
+        if self.hasAttachments is not None:
+            attrs.append(("hasAttachments", "true" if self.hasAttachments else "false"))
+        if self.uuid is not None:
+            attrs.append(("uuid", self.uuid))
+        return ("moduleItem", attrs, self.children)
+
+    def _materialize(self) -> etree._Element:
+        obj = fm.moduleItem(ID=self.ID, hasAttachments=self.hasAttachments, uuid=self.uuid)
+        return self._materialize_children(obj).element
+
+
+class module(record):
+    __slots__ = ("mtype", "size", "_totalSize", "children")
+
+    def __init__(self, *, name: str, totalSize: Optional[int] = None) -> None:
+        registry.check_module_type(name)
+        self._element = None
+        self.mtype = name
+        self.size = 0
+        self._totalSize = None if totalSize is None else str(totalSize)
+        self.children = []
+
+    def add(self, child: record) -> record:
+        self.size += 1
+        return super().add(child)
+
+    def update_totalSize(self) -> int:
+        self._update()
+        return self.size
+
+    def wrap(self) -> application:
+        a = application()
+        a.add(modules()).add(self)
+        self.update_totalSize()
+        return a
+
+    def _update(self) -> None:
+        self._totalSize = str(self.size)
+        if self._element is not None:
+            self._element.attrib["totalSize"] = self._totalSize
+
+    def _node(self) -> tuple:
+        attrs = [("name", self.mtype)]
+        if self._totalSize is not None:
+            attrs.append(("totalSize", self._totalSize))
+        return ("module", attrs, self.children)
+
+    def _materialize(self) -> etree._Element:
+        obj = fm.module(name=self.mtype, totalSize=self._totalSize)
+        return self._materialize_children(obj).element
+
+
+class modules(record):
+    __slots__ = ("children",)
+
+    def __init__(self) -> None:
+        self._element = None
+        self.children = []
+
+    def wrap(self) -> application:
+        a = application()
+        a.add(self)
+        return a
+
+    def _node(self) -> tuple:
+        return ("modules", (), self.children)
+
+    def _materialize(self) -> etree._Element:
+        return self._materialize_children(fm.modules()).element
+
+
+class application(record):
+    __slots__ = ("children",)
+
+    def __init__(self) -> None:
+        self._element = None
+        self.children = []
+
+    @property
+    def xmlschema(self) -> etree.XMLSchema:
+        return fm.get_xmlschema()
+
+    def tofile(
+        self,
+        path: str,
+        *,
+        update_sizes: bool = False,
+        pretty_print: bool = True,
+        method: str = "emit",
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        compression: "gzip", "zstd" or "none"; by default from the extension
+        """
+        with compress.open_file(path, "wb", compression=compression) as f:
+            self.write_to(
+                f, update_sizes=update_sizes, pretty_print=pretty_print, method=method
+            )
+
+    def validate(self) -> True:
+        """
+        Makes the lxml tree (if not done yet) and validates it like fm.py.
+        """
+        return fm.application.validate(self)
+
+    def wrap(self) -> None:
+        raise TypeError("ERROR: Don't wrap in application!")
+
+    def _node(self) -> tuple:
+        return ("application", (), self.children)
+
+    def _materialize(self) -> etree._Element:
+        return self._materialize_children(fm.application()).element
+
+
+#
+# serialization
+#
+
+
+class _Materialized(Exception):
+    pass
+
+
+def _feed(node, e: Emitter, mtype: Optional[str] = None) -> None:
+    """
+    Writes node (a record or a node tuple) and its children with the Emitter.
+    Below a module whose fields the registry knows (mtype), field names and
+    dataTypes are checked like in fm.module.add().
+    """
+    if isinstance(node, record):
+        if node._element is not None:
+            raise _Materialized
+        node = node._node()
+    tag, attrs, content = node
+    if tag == "module":
+        mtype = dict(attrs)["name"]
+        if mtype not in registry.fields:
+            mtype = None
+    elif mtype is not None and tag[-4:] != "Item":  # not vocabularyReferenceItem
+        attrD = dict(attrs)
+        registry.check_field(mtype, attrD.get("name"), attrD.get("dataType"))
+    if content is None or isinstance(content, str):
+        e.leaf(tag, attrs, content)
+    elif not content:
+        e.leaf(tag, attrs)
+    else:
+        e.start(tag, attrs)
+        for child in content:
+            _feed(child, e, mtype)
+        e.end()
@@ -0,0 +1,319 @@
+"""
+MpApi.Fieldmaker.schema - What module types, data types and fields we know
+
+The constructors check module types and dataTypes against the registry; these are
+sets, so every check is a single hash lookup. A registry can also know the fields
+of a module (name and dataType). Then module.add(), the Emitter (also records and
+the VocabularyCache) and the Stream- and ShardedWriter check field names and
+dataTypes of every moduleItem, which catches typos early and is much cheaper than
+validating against the schema.
+
+The default registry (MpApi.Fieldmaker.fm.registry) knows the common module types
+and the dataTypes, but no fields. Load more into it from a json file or from the
+xsd; changes take effect right away. The enumerations load_xsd() needs are cached
+on disk (see xsd_facts), so short-lived processes don't have to parse the xsd every
+time. The cache only speeds up load_xsd(); validation (fm.get_xmlschema) still
+compiles the whole xsd once per process.
+
+    {
+        "module_types": ["Object", "Multimedia"],
+        "dataTypes": ["Clob", "Varchar"],
+        "fields": {
+            "Object": {"ObjTechnicalTermClb": "Clob", "ObjObjectTitleGrp": null}
+        }
+    }
+
+LIMITATION
+    Fields are known per module type, not per repeatable group. The fields inside
+    a group (e.g. TitleTxt in ObjObjectTitleGrp) are checked against the same
+    dict as the fields of the moduleItem, so they have to be listed there too,
+    and a field can't be in a group it doesn't belong to. Two groups with a field
+    of the same name but different dataTypes can't be described; leave the
+    dataType of such a field null.
+
+USAGE
+    from MpApi.Fieldmaker import registry
+
+    registry.load("fields.json")  # adds to what we know
+    registry.load_xsd()           # dataTypes (and module types) from module_1_6.xsd
+    registry.add_field("Object", "ObjInventarNrTxt", "Varchar")
+
+    registry.check_module_type("Object")
+    registry.check_field("Object", "ObjTechnicalTermClb", "Clob")
+"""
+from __future__ import annotations
+import hashlib
+import json
+from lxml import etree
+import os
+from pathlib import Path
+import pkgutil
+import tempfile
+from typing import Iterable, Optional, Union
+
+_XS = "{http://www.w3.org/2001/XMLSchema}"
+
+
+class UnknownModuleTypeError(Exception):
+    pass
+
+
+class UnknownDataTypeError(Exception):
+    pass
+
+
+class UnknownFieldError(Exception):
+    pass
+
+
+class Registry:
+    def __init__(
+        self,
+        *,
+        module_types: Iterable[str] = (),
+        dataTypes: Iterable[str] = (),
+        fields: Optional[dict[str, dict[str, Optional[str]]]] = None,
+    ) -> None:
+        """
+        fields: {module type: {field name: dataType or None}}
+        """
+        self.module_types: set[str] = set(module_types)
+        self.dataTypes: set[str] = set(dataTypes)
+        self.fields: dict[str, dict[str, Optional[str]]] = {}
+        for mtype, fieldD in (fields or {}).items():
+            for name, dataType in fieldD.items():
+                self.add_field(mtype, name, dataType)
+
+    #
+    # checks
+    #
+
+    def check_module_type(self, name: str) -> None:
+        if name not in self.module_types:
+            raise UnknownModuleTypeError(f"Error: Unknown module type '{name}')")
+
+    def check_dataType(self, dataType: str) -> None:
+        if dataType not in self.dataTypes:
+            raise UnknownDataTypeError(f"ERROR: Unknown dataType '{dataType}'")
+
+    def check_field(
+        self, mtype: str, name: Optional[str], dataType: Optional[str] = None
+    ) -> None:
+        """
+        Only checks if we know the fields of mtype. A dataType is only compared if
+        both the field definition and the caller have one.
+        """
+        fieldD = self.fields.get(mtype)
+        if fieldD is None or name is None:
+            return
+        try:
+            known = fieldD[name]
+        except KeyError:
+            raise UnknownFieldError(f"ERROR: Unknown field '{name}' in {mtype}")
+        if dataType is not None and known is not None and dataType != known:
+            raise UnknownDataTypeError(
+                f"ERROR: Field '{name}' in {mtype} has dataType '{known}', not '{dataType}'"
+            )
+
+    def check_item(self, mtype: str, itemN: etree._Element) -> None:
+        """
+        Checks names and dataTypes of all fields in a moduleItem element, also
+        inside repeatable groups.
+        """
+        if mtype not in self.fields:
+            return
+        for node in itemN.iterdescendants(etree.Element):
+            name = node.get("name")
+            if name is not None and node.tag[-4:] != "Item":  # not vocRefItem
+                self.check_field(mtype, name, node.get("dataType"))
+
+    #
+    # changing the registry
+    #
+
+    def add_field(self, mtype: str, name: str, dataType: Optional[str] = None) -> None:
+        if dataType is not None:
+            self.check_dataType(dataType)
+        self.module_types.add(mtype)
+        self.fields.setdefault(mtype, {})[name] = dataType
+
+    def update(self, other: Registry) -> None:
+        """
+        Adds what other knows; we change our sets in place, so references to them
+        stay valid.
+        """
+        self.module_types.update(other.module_types)
+        self.dataTypes.update(other.dataTypes)
+        for mtype, fieldD in other.fields.items():
+            self.module_types.add(mtype)
+            self.fields.setdefault(mtype, {}).update(fieldD)
+
+    def load(self, path: Union[str, Path]) -> None:
+        """
+        Adds module types, dataTypes and fields from a json file
+        """
+        self.update(Registry.fromfile(path))
+
+    def load_xsd(
+        self, xsd: Optional[bytes] = None, *, cache_dir: Union[str, Path, None] = None
+    ) -> None:
+        """
+        Adds the dataTypes (and module types, if the schema lists them) from the
+        xsd; by default module_1_6.xsd from mpapi. With a warm cache (see
+        xsd_facts) this reads a small json file instead of parsing the xsd. It
+        doesn't help validate(), which needs the compiled schema.
+        """
+        self.update(Registry.from_xsd(xsd, cache_dir=cache_dir))
+
+    @classmethod
+    def fromfile(cls, path: Union[str, Path]) -> Registry:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            module_types=config.get("module_types", ()),
+            dataTypes=config.get("dataTypes", ()),
+            fields=config.get("fields"),
+        )
+
+    @classmethod
+    def from_xsd(
+        cls, xsd: Optional[bytes] = None, *, cache_dir: Union[str, Path, None] = None
+    ) -> Registry:
+        """
+        Module types and dataTypes from the xsd; see xsd_facts() for the cache.
+        """
+        facts = xsd_facts(xsd, cache_dir=cache_dir)
+        return cls(module_types=facts["module_types"], dataTypes=facts["dataTypes"])
+
+
+#
+# facts from the xsd, cached on disk
+#
+
+
+def xsd_facts(
+    xsd: Optional[bytes] = None,
+    *,
+    cache_dir: Union[str, Path, None] = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Returns what we need from the xsd as a dict:
+        dataTypes: enumeration of dataType
+        module_types: enumeration of module/@name (empty if the xsd has none)
+
+    Parsing the xsd takes a while, so the facts are cached as json in cache_dir
+    (default: $FIELDMAKER_CACHE or ~/.cache/MpApi.Fieldmaker). The file name has
+    the sha256 of the xsd, so a new xsd gets new facts. Without a usable cache
+    directory (e.g. no home), we just don't cache.
+    """
+    if xsd is None:
+        xsd = pkgutil.get_data("mpapi.client", "data/xsd/module_1_6.xsd")
+    if not use_cache:
+        return _extract_facts(xsd)
+
+    digest = hashlib.sha256(xsd).hexdigest()
+    try:
+        path = _cache_dir(cache_dir) / f"xsd-{digest[:16]}.json"
+    except (RuntimeError, KeyError):  # no home directory
+        return _extract_facts(xsd)
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["version"] == _CACHE_VERSION and cached["sha256"] == digest:
+            return cached["facts"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # no or broken cache
+
+    facts = _extract_facts(xsd)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temp file first, so other processes never see half a file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": _CACHE_VERSION, "sha256": digest, "facts": facts}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only home etc.; we just don't cache
+    return facts
+
+
+#
+# private
+#
+
+# change when the layout of the facts changes
+_CACHE_VERSION = 2
+
+
+def _cache_dir(cache_dir: Union[str, Path, None]) -> Path:
+    if cache_dir is not None:
+        return Path(cache_dir)
+    if "FIELDMAKER_CACHE" in os.environ:
+        return Path(os.environ["FIELDMAKER_CACHE"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "MpApi.Fieldmaker"
+
+
+def _extract_facts(xsd: bytes) -> dict:
+    rootN = etree.fromstring(xsd)
+    named = {}  # (kind, name) -> node for global types and attribute groups
+    for node in rootN:
+        if isinstance(node.tag, str) and node.get("name") is not None:
+            named[(etree.QName(node).localname, node.get("name"))] = node
+
+    def lookup(kind: str, ref: Optional[str]) -> Optional[etree._Element]:
+        if ref is None:
+            return None
+        return named.get((kind, ref.split(":")[-1]))
+
+    def enumerations(attributeN: etree._Element) -> list[str]:
+        typeN = lookup("simpleType", attributeN.get("type"))
+        if typeN is None:
+            typeN = attributeN.find(_XS + "simpleType")
+        if typeN is None:
+            return []
+        return [e.get("value") for e in typeN.iter(_XS + "enumeration")]
+
+    def attributes(node: etree._Element, seen: set) -> Iterable[etree._Element]:
+        """attributes of a complexType, without going into child elements"""
+        for child in node.iterchildren(etree.Element):
+            tag = child.tag
+            if tag == _XS + "element":
+                continue
+            if tag == _XS + "attribute":
+                yield child
+            elif tag == _XS + "attributeGroup" and child.get("ref") is not None:
+                groupN = lookup("attributeGroup", child.get("ref"))
+                if groupN is not None and id(groupN) not in seen:
+                    seen.add(id(groupN))
+                    yield from attributes(groupN, seen)
+                continue
+            if tag in (_XS + "extension", _XS + "restriction"):
+                baseN = lookup("complexType", child.get("base"))
+                if baseN is not None and id(baseN) not in seen:
+                    seen.add(id(baseN))
+                    yield from attributes(baseN, seen)
+            yield from attributes(child, seen)
+
+    dataTypes = []
+    module_types = []
+    for elementN in rootN.iter(_XS + "element"):
+        name = elementN.get("name")
+        if name is None:
+            continue
+        typeN = lookup("complexType", elementN.get("type"))
+        if typeN is None:
+            typeN = elementN.find(_XS + "complexType")
+        if typeN is None:
+            continue
+        for attributeN in attributes(typeN, set()):
+            attrib = attributeN.get("name")
+            if attrib == "dataType":
+                dataTypes.extend(enumerations(attributeN))
+            elif attrib == "name" and name == "module":
+                module_types.extend(enumerations(attributeN))
+    return {
+        "dataTypes": sorted(set(dataTypes)),
+        "module_types": sorted(set(module_types)),
+    }
@@ -0,0 +1,90 @@
+"""
+MpApi.Fieldmaker.template - Clone repeated shapes instead of building them again
+
+Our documents repeat the same shapes thousands of times, e.g. the same
+ObjObjectTitleGrp item with only the values changed. Building each of them with the
+constructors means creating every element and setting every attribute again. A
+Template is built once with the normal constructors, using placeholders like
+"{title}" for values, ids and other attributes. Every new instance is a deep copy of
+that prototype (done by lxml in C) with only the placeholders filled in.
+
+A placeholder has to be the complete text or attribute value, e.g. value="{title}"
+or ID="{ID}".
+
+USAGE
+    from MpApi.Fieldmaker import Template, repeatableGroupItem, dataField
+
+    rGrpItem = repeatableGroupItem(ID="{ID}")
+    rGrpItem.add(dataField(name="TitleTxt", dataType="Varchar", value="{title}"))
+    titleT = Template(rGrpItem)
+
+    rGrp = repeatableGroup(name="ObjObjectTitleGrp")
+    rGrp.add(titleT.new(ID=26502225, title="tritantri vina"))
+    rGrp.add(titleT.new(ID=26502226, title="vina"))
+"""
+from __future__ import annotations
+from copy import deepcopy
+from lxml import etree
+from MpApi.Fieldmaker.fm import baseField
+import re
+
+_placeholder = re.compile(r"^\{(\w+)\}$")
+
+
+class Template:
+    def __init__(self, prototype: baseField) -> None:
+        """
+        prototype is any Fieldmaker object. We make our own copy of it, so it can be
+        used (or changed) after the template has been made.
+        """
+        self.cls = type(prototype)
+        self._proto = deepcopy(prototype.element)
+        # slots: (path of child indexes from root, attribute name or None for text,
+        # placeholder name)
+        self._slots = self._find_slots(self._proto)
+        self.names = frozenset(name for _, _, name in self._slots)
+
+    def new(self, **values) -> baseField:
+        """
+        Returns a new object of the prototype's class with placeholders replaced by
+        values. Values are converted with str() like in the constructors.
+        """
+        if values.keys() != self.names:
+            missing = self.names.difference(values)
+            if missing:
+                raise TypeError(f"ERROR: Missing value(s) for {sorted(missing)}")
+            unknown = set(values).difference(self.names)
+            raise TypeError(f"ERROR: Unknown placeholder(s) {sorted(unknown)}")
+
+        rootN = self._proto.__deepcopy__(None)
+        for path, attrib, name in self._slots:
+            node = rootN
+            for index in path:
+                node = node[index]
+            if attrib is None:
+                node.text = str(values[name])
+            else:
+                node.attrib[attrib] = str(values[name])
+        return self.cls.from_element(rootN)
+
+    #
+    # private
+    #
+
+    def _find_slots(self, rootN: etree._Element) -> list[tuple]:
+        slots = []
+
+        def walk(node: etree._Element, path: tuple) -> None:
+            for attrib, value in node.attrib.items():
+                match = _placeholder.match(value)
+                if match:
+                    slots.append((path, attrib, match.group(1)))
+            if node.text is not None:
+                match = _placeholder.match(node.text)
+                if match:
+                    slots.append((path, None, match.group(1)))
+            for index, child in enumerate(node):
+                walk(child, path + (index,))
+
+        walk(rootN, ())
+        return slots
@@ -0,0 +1,196 @@
+"""
+MpApi.Fieldmaker.uploader - Upload moduleItems in batches with one MpApi session
+
+Our upload scripts used to build a document per record and post it. The Uploader
+takes a stream of moduleItems instead, puts them into documents of batchsize items
+and posts those to the module endpoint ({appURL}/module/{mtype}) with the session of
+an mpapi.client.MpApi object. The session's connections are reused for all batches;
+its connection pool is sized to the number of workers.
+
+At most workers batches are in flight (thread pool); documents are serialized in the
+calling thread, so only a window of 2*workers batches is in memory. Batches that
+fail before anything was sent (the connection couldn't be made, or connecting timed
+out) are retried with exponential backoff; when retries are exhausted we raise
+UploadError.
+
+A POST creates records, so sending it twice can create duplicates. After a read
+timeout, a connection dropped by the server (e.g. "Connection aborted") or a 5xx
+response (perhaps from a proxy), the server may still have saved the batch, so we
+don't retry those unless you ask for it with retry_timeouts=True.
+
+USAGE
+    from mpapi.client import MpApi
+    from MpApi.Fieldmaker.uploader import Uploader
+
+    api = MpApi(baseURL=baseURL, user=user, pw=pw)
+    up = Uploader(api, mtype="Object", batchsize=500, workers=4)
+    up.upload(mi for mi in items)
+    print(f"{up.items} items in {up.batches} batches, {up.rate:.0f} items/s")
+
+progress is called after each finished batch with the number of items uploaded so
+far and the current rate (items/s).
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import io
+from itertools import islice
+from mpapi.client import MpApi
+from MpApi.Fieldmaker.fm import moduleItem
+from MpApi.Fieldmaker.writer import StreamWriter
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+import time
+from typing import Callable, Iterable, Optional
+
+
+class UploadError(Exception):
+    pass
+
+
+class Uploader:
+    def __init__(
+        self,
+        api: MpApi,
+        *,
+        mtype: str,
+        batchsize: int = 100,
+        workers: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: Optional[float] = None,
+        progress: Optional[Callable[[int, float], None]] = None,
+        retry_timeouts: bool = False,
+    ) -> None:
+        """
+        api: a MpApi object; we use its session, i.e. its credentials and headers
+        retries: how often a failed batch is sent again
+        backoff: seconds to wait before the first retry; doubles with every retry
+        retry_timeouts: also retry if the batch may have reached the server: after a
+            read timeout, a dropped connection or a 5xx response (risks duplicates)
+        """
+        if batchsize < 1 or workers < 1:
+            raise ValueError("ERROR: batchsize and workers have to be at least 1")
+        self.api = api
+        self.mtype = mtype
+        self.url = f"{api.appURL}/module/{mtype}"
+        self.batchsize = batchsize
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.progress = progress
+        self.retry_timeouts = retry_timeouts
+        self.session = api.session
+        # requests keeps 10 connections per host by default
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.items = 0  # items uploaded successfully
+        self.batches = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self) -> float:
+        """items per second of the last upload()"""
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def upload(self, items: Iterable[moduleItem]) -> int:
+        """
+        Uploads items in batches and returns the number of items uploaded. Raises
+        UploadError for the first batch that fails after all retries.
+        """
+        self.items = 0
+        self.batches = 0
+        self.seconds = 0.0
+        start = time.perf_counter()
+        window = 2 * self.workers
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending: deque[tuple[int, Future]] = deque()
+            try:
+                for count, xml in self._documents(items):
+                    pending.append((count, executor.submit(self.post, xml)))
+                    if len(pending) >= window:
+                        self._done(*pending.popleft(), start)
+                while pending:
+                    self._done(*pending.popleft(), start)
+            except BaseException:
+                for _, future in pending:
+                    future.cancel()
+                raise
+        return self.items
+
+    def post(self, xml: bytes) -> requests.Response:
+        """
+        Posts one document, with retries
+        """
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                r = self.session.post(self.url, data=xml, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{type(e).__name__}: {e}"
+                if not (self.retry_timeouts or _not_sent(e)):
+                    raise UploadError(
+                        f"ERROR: Upload to {self.url} failed; not retried, since"
+                        f" the batch may have been saved ({error})"
+                    ) from e
+            else:
+                if r.status_code < 500:
+                    break
+                error = f"HTTP {r.status_code}"
+                if not self.retry_timeouts:
+                    raise UploadError(
+                        f"ERROR: Upload to {self.url} failed; not retried, since"
+                        f" the batch may have been saved ({error})"
+                    )
+            if attempt < self.retries:
+                time.sleep(delay)
+                delay *= 2
+        else:
+            raise UploadError(
+                f"ERROR: Upload to {self.url} failed after {self.retries + 1} attempts ({error})"
+            )
+        if not r.ok:
+            raise UploadError(f"ERROR: Upload to {self.url} failed: HTTP {r.status_code}")
+        return r
+
+    #
+    # private
+    #
+
+    def _documents(self, items: Iterable[moduleItem]) -> Iterable[tuple[int, bytes]]:
+        """
+        Yields (number of items, document) per batch
+        """
+        items = iter(items)
+        while True:
+            batch = list(islice(items, self.batchsize))
+            if not batch:
+                return
+            buf = io.BytesIO()
+            with StreamWriter(buf, mtype=self.mtype, totalSize=len(batch)) as w:
+                for mi in batch:
+                    w.add(mi)
+            yield len(batch), buf.getvalue()
+
+    def _done(self, count: int, future: Future, start: float) -> None:
+        future.result()  # raises UploadError
+        self.items += count
+        self.batches += 1
+        self.seconds = time.perf_counter() - start
+        if self.progress is not None:
+            self.progress(self.items, self.rate)
+
+
+def _not_sent(e: requests.RequestException) -> bool:
+    """
+    True if the request failed before anything was sent: connecting timed out
+    or the connection couldn't be made (refused, unknown host)
+    """
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    cause = e.args[0] if e.args else None
+    return isinstance(getattr(cause, "reason", cause), NewConnectionError)
@@ -0,0 +1,170 @@
+"""
+MpApi.Fieldmaker.vocabulary - Cache for repeated vocabularyReferences
+
+A few hundred different vocabularyReferences (e.g. ObjCategoryVoc or
+ObjPublicationStatusVoc with one of their items) are repeated in hundreds of
+thousands of moduleItems. The VocabularyCache makes each combination only once:
+
+- new() returns a copy of a shared prototype (cloned by lxml in C), to be added to a
+  moduleItem like any other field
+- fragment() returns the serialized xml for the Emitter; emit() writes it into an
+  Emitter at its current level
+
+With the module type (mtype for fragment(), the Emitter's module for emit()), the
+name is checked against the registry every time, also for cached fragments.
+
+Both are memoized with bounded caches, keyed by (name, ID, instanceName, itemID,
+itemName, language, formattedValue). cache_info() and hit_rate tell you how well
+the cache size fits your data.
+
+USAGE
+    from MpApi.Fieldmaker.vocabulary import VocabularyCache
+
+    vocs = VocabularyCache(maxsize=1024)
+    mi.add(vocs.new(name="ObjPublicationStatusVoc", ID=30432,
+        instanceName="ObjPublicationStatusVgr", itemID=4399323, itemName="vorhanden",
+        language="de", formattedValue="vorhanden"))
+
+    with e.moduleItem(ID=1234):
+        vocs.emit(e, name="ObjCategoryVoc", ID=30349, itemID=3206642)
+
+    print(vocs.cache_info(), f"{vocs.hit_rate:.0%}")
+"""
+from __future__ import annotations
+from functools import lru_cache
+from lxml import etree
+from MpApi.Fieldmaker.emitter import Emitter
+from MpApi.Fieldmaker.fm import registry, vocabularyReference, vocabularyReferenceItem
+from typing import Optional
+
+
+class VocabularyCache:
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        maxsize: number of prototypes and of fragments we keep (each)
+        """
+        self.maxsize = maxsize
+        self._prototype = lru_cache(maxsize=maxsize)(_make)
+        self._fragment = lru_cache(maxsize=maxsize)(self._serialize)
+
+    def prototype(
+        self,
+        *,
+        name: str,
+        ID: Optional[int] = None,
+        instanceName: Optional[str] = None,
+        itemID: Optional[int] = None,
+        itemName: Optional[str] = None,
+        language: Optional[str] = None,
+        formattedValue: Optional[str] = None,
+    ) -> etree._Element:
+        """
+        Returns the shared element; don't change it, use new() for a copy.
+        """
+        return self._prototype(
+            name, ID, instanceName, itemID, itemName, language, formattedValue
+        )
+
+    def new(self, **key) -> vocabularyReference:
+        """
+        Same arguments as prototype(); returns a vocabularyReference with a copy
+        of the prototype.
+        """
+        return vocabularyReference.from_element(self.prototype(**key).__deepcopy__(None))
+
+    def fragment(
+        self,
+        *,
+        pretty_print: bool = False,
+        level: int = 0,
+        mtype: Optional[str] = None,
+        **key,
+    ) -> str:
+        """
+        Serialized vocabularyReference for a document; level is the nesting level
+        for pretty_print (a field in a moduleItem has level 4) and decides if it
+        gets an xmlns (level 0). mtype: module type to check the field name for.
+        """
+        registry.check_field(mtype, key["name"])
+        return self._fragment(
+            pretty_print,
+            level,
+            key["name"],
+            key.get("ID"),
+            key.get("instanceName"),
+            key.get("itemID"),
+            key.get("itemName"),
+            key.get("language"),
+            key.get("formattedValue"),
+        )
+
+    def emit(self, e: Emitter, **key) -> None:
+        """
+        Writes the vocabularyReference into an Emitter, at its current position.
+        """
+        e.raw(
+            self.fragment(
+                pretty_print=e.pretty_print, level=e.level, mtype=e.mtype, **key
+            )
+        )
+
+    def cache_info(self) -> dict:
+        """
+        hits, misses, maxsize and currsize for prototypes and fragments
+        """
+        return {
+            "prototypes": self._prototype.cache_info(),
+            "fragments": self._fragment.cache_info(),
+        }
+
+    @property
+    def hit_rate(self) -> float:
+        """hits / lookups for prototypes and fragments together"""
+        hits = lookups = 0
+        for info in self.cache_info().values():
+            hits += info.hits
+            lookups += info.hits + info.misses
+        return hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        self._prototype.cache_clear()
+        self._fragment.cache_clear()
+
+    #
+    # private
+    #
+
+    def _serialize(self, pretty_print: bool, level: int, *key) -> str:
+        e = Emitter(pretty_print=pretty_print, level=level)
+        name, ID, instanceName, itemID, itemName, language, formattedValue = key
+        with e.vocabularyReference(name=name, ID=ID, instanceName=instanceName):
+            if itemID is not None:
+                e.vocabularyReferenceItem(
+                    ID=itemID,
+                    name=itemName,
+                    language=language,
+                    formattedValue=formattedValue,
+                )
+        return e.getvalue()
+
+
+def _make(
+    name: str,
+    ID: Optional[int],
+    instanceName: Optional[str],
+    itemID: Optional[int],
+    itemName: Optional[str],
+    language: Optional[str],
+    formattedValue: Optional[str],
+) -> etree._Element:
+    vocRef = vocabularyReference(name=name, ID=ID, instanceName=instanceName)
+    if itemID is not None:
+        vocRef.add(
+            vocabularyReferenceItem(
+                ID=itemID,
+                name=itemName,
+                language=language,
+                formattedValue=formattedValue,
+            )
+        )
+    return vocRef.element
@@ -0,0 +1,459 @@
+"""
+MpApi.Fieldmaker.writer - Write big zml documents item by item
+
+application.tofile() needs the complete tree in memory before it can write anything.
+For exports with hundreds of thousands of moduleItems that is a lot of RAM. The
+StreamWriter writes the application/modules/module skeleton once and then every
+moduleItem as soon as it is added, so only one item needs to be in memory at a time.
+
+totalSize is only known at the end. We write a fixed-width placeholder into the
+module's start tag and overwrite it when the writer is closed (seek-back). If the
+target cannot seek (e.g. a pipe), items are spooled to a temporary file and copied
+behind the finished header instead (deferred header). If you know the number of
+items in advance, pass totalSize and it is written right away.
+
+Compressed targets (export.xml.gz, export.xml.zst or compression="gzip"/"zstd", see
+MpApi.Fieldmaker.compress) can't seek back either. There the header is kept in
+memory and written as a gzip member (zstd frame) of its own at the end; the items
+are compressed into a temporary file right away and copied behind it. Readers see
+one document.
+
+USAGE
+    from MpApi.Fieldmaker import StreamWriter, moduleItem, dataField
+
+    with StreamWriter("export.xml", mtype="Object") as w:
+        for ID in ids:
+            mi = moduleItem(ID=ID)
+            mi.add(dataField(name="ObjTechnicalTermClb", value="Laute"))
+            w.add(mi)
+
+    produces:
+    <application xmlns="http://www.zetcom.com/ria/ws/module">
+      <modules>
+        <module name="Object" totalSize="1234      ">
+          <moduleItem id="1">...</moduleItem>
+          ...
+
+With validate=True every item (or fragment) is checked against the schema before it
+is written, see fm.ItemValidator; the first invalid item raises InvalidItemError.
+
+The ShardedWriter splits a stream of moduleItems into several complete documents
+(shards), e.g. for uploads that would be too big in one piece. It rolls over to a
+new shard after max_items items or before a shard would get bigger than max_bytes;
+every shard gets its own totalSize. Items are serialized in the calling thread; the
+shards are written by a background thread, so building and I/O overlap.
+
+    with ShardedWriter("upload-{:04d}.xml", mtype="Object", max_items=5000,
+            max_bytes=50_000_000) as w:
+        for mi in items:
+            w.add(mi)
+    print(w.shards)  # [Path("upload-0000.xml"), ...]; without pattern: bytes
+
+ATTENTION: totalSize is padded with blanks. That is valid according to the schema,
+because xs:long collapses whitespace.
+"""
+from __future__ import annotations
+import io
+from lxml import etree
+from MpApi.Fieldmaker import compress
+from MpApi.Fieldmaker.fm import NSMAP, ItemValidator, moduleItem, module, registry
+from pathlib import Path
+import queue
+import shutil
+import tempfile
+import threading
+from typing import IO, Callable, Optional, Union
+
+NS = "{" + NSMAP[None] + "}"
+# every moduleItem serialized on its own declares the default namespace again
+_XMLNS = b' xmlns="' + NSMAP[None].encode() + b'"'
+
+# width of the totalSize placeholder; enough for 9,999,999,999 items
+_SIZE_WIDTH = 10
+
+# ShardedWriter hands serialized items to its thread in batches of about this size
+_BATCH_BYTES = 256 * 1024
+
+
+class StreamWriter:
+    def __init__(
+        self,
+        target: Union[str, Path, IO[bytes]],
+        *,
+        mtype: str,
+        pretty_print: bool = False,
+        validate: bool = False,
+        compression: Optional[str] = None,
+        totalSize: Optional[int] = None,
+    ) -> None:
+        """
+        target is either a path or a binary file object opened for writing. mtype is
+        checked like in module(name=mtype).
+        compression: "gzip", "zstd" or "none"; by default from the extension of a
+        path, none for file objects
+        totalSize: if you know the number of items in advance, it is written as is
+        (no placeholder, no seek-back or spooling); close() checks it
+        """
+        module(name=mtype)  # raises UnknownModuleTypeError
+        self.compression = compress.compression_for(target, compression)
+        self._expected = totalSize
+        self._validator = ItemValidator(mtype) if validate else None
+        self.mtype = mtype
+        self.pretty_print = pretty_print
+        self.totalSize = 0
+        self._target = target
+        self._own_file = False
+        self._spool: Optional[IO[bytes]] = None
+        self._head: Optional[io.BytesIO] = None
+        self._compressor: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> StreamWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def open(self) -> None:
+        if isinstance(self._target, (str, Path)):
+            self._fh = open(self._target, "wb")
+            self._own_file = True
+        else:
+            self._fh = self._target
+
+        if self._expected is not None:
+            # nothing to fill in later, so we write straight through
+            if self.compression is not None:
+                self._compressor = compress.writer(self._fh, self.compression)
+                self._out = self._compressor
+            else:
+                self._out = self._fh
+        elif self.compression is not None:
+            # header to memory; after it, _out switches to the compressed spool
+            self._head = io.BytesIO()
+            self._spool = tempfile.TemporaryFile()
+            self._compressor = compress.writer(self._spool, self.compression)
+            self._out = _Switch(self._head)
+        elif self._seekable(self._fh):
+            self._out = self._fh
+        else:
+            self._spool = tempfile.TemporaryFile()
+            self._out = self._spool
+
+        self._xf_cm = etree.xmlfile(self._out, encoding="UTF-8")
+        self._xf = self._xf_cm.__enter__()
+        self._xf.write_declaration()
+        if self._expected is not None:
+            totalSize = str(self._expected)
+        else:
+            totalSize = " " * _SIZE_WIDTH
+        # open application, modules and module; we close them in reverse order
+        self._elements = [
+            self._xf.element("application", nsmap=NSMAP),
+            self._xf.element(NS + "modules"),
+            self._xf.element(NS + "module", name=self.mtype, totalSize=totalSize),
+        ]
+        for cm in self._elements:
+            cm.__enter__()
+        if self._expected is None:
+            # start tag of module ends with the placeholder, i.e. '      ">'
+            self._xf.flush()
+            self._size_pos = self._out.tell() - len(b'">') - _SIZE_WIDTH
+            if self._compressor is not None:
+                self._out.target = self._compressor
+
+    def add(self, item: moduleItem) -> moduleItem:
+        """
+        Serializes moduleItem right away. The writer keeps no reference to it, so
+        the item can be garbage collected as soon as the caller drops it. Fields
+        are checked like in module.add().
+        """
+        registry.check_item(self.mtype, item.element)
+        if self._validator is not None:
+            self._validator.check(item)
+        self._xf.flush()
+        self._out.write(_tostring(item.element, self.pretty_print))
+        self.totalSize += 1
+        return item
+
+    def add_fragment(self, xml: bytes, count: int) -> None:
+        """
+        Appends moduleItems that have already been serialized, e.g. in another
+        process; count is the number of moduleItems in xml.
+        """
+        if self._validator is not None:
+            self._validator.check_fragment(xml)
+        self._xf.flush()
+        self._out.write(xml)
+        self.totalSize += count
+
+    def close(self) -> None:
+        for cm in reversed(self._elements):
+            cm.__exit__(None, None, None)
+        self._xf_cm.__exit__(None, None, None)
+
+        if self._expected is not None:
+            if self._compressor is not None:
+                self._compressor.close()
+                self._compressor = None
+            if self._own_file:
+                self._fh.close()
+            else:
+                self._fh.flush()
+            if self.totalSize != self._expected:
+                raise ValueError(
+                    f"ERROR: totalSize {self._expected} given, but {self.totalSize}"
+                    " moduleItems added"
+                )
+            return
+        if self._compressor is not None:
+            self._compressor.close()  # ends the compressed items, spool stays open
+            self._write_totalSize(self._head)
+            self._fh.write(compress.compress(self._head.getvalue(), self.compression))
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, self._fh)
+            self._spool.close()
+            self._spool = self._compressor = self._head = None
+        else:
+            self._write_totalSize(self._out)
+        if self._spool is not None:
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, self._fh)
+            self._spool.close()
+            self._spool = None
+
+        if self._own_file:
+            self._fh.close()
+        else:
+            self._fh.flush()
+
+    #
+    # private
+    #
+
+    def _seekable(self, fh: IO[bytes]) -> bool:
+        try:
+            return fh.seekable()
+        except AttributeError:
+            return False
+
+    def _write_totalSize(self, fh: IO[bytes]) -> None:
+        """
+        Overwrite the placeholder and return to the end of the document.
+        """
+        size = str(self.totalSize).ljust(_SIZE_WIDTH).encode()
+        if len(size) > _SIZE_WIDTH:
+            raise ValueError(f"ERROR: totalSize {self.totalSize} too big")
+        end = fh.tell()
+        fh.seek(self._size_pos)
+        fh.write(size)
+        fh.seek(end)
+
+
+def _tostring(element: etree._Element, pretty_print: bool = False) -> bytes:
+    """
+    Serializes a moduleItem without repeating the declaration of the default
+    namespace; it goes inside a module element that declares it already.
+    """
+    xml = etree.tostring(element, encoding="UTF-8", pretty_print=pretty_print)
+    tagEnd = xml.find(b" ")
+    if xml.startswith(_XMLNS, tagEnd):
+        return xml[:tagEnd] + xml[tagEnd + len(_XMLNS) :]
+    return xml
+
+
+class _Switch:
+    """
+    file object for xmlfile whose target we can change while it's open
+    """
+
+    def __init__(self, target: IO[bytes]) -> None:
+        self.target = target
+
+    def write(self, data: bytes) -> int:
+        return self.target.write(data)
+
+    def tell(self) -> int:
+        return self.target.tell()
+
+
+class ShardedWriter:
+    def __init__(
+        self,
+        pattern: Optional[str] = None,
+        *,
+        mtype: str,
+        max_items: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        pretty_print: bool = False,
+        validate: bool = False,
+        callback: Optional[Callable[[Union[Path, bytes], int], None]] = None,
+        queuesize: int = 16,
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        pattern is formatted with the number of the shard, e.g. "upload-{:04d}.xml";
+        without pattern, the shards are kept in memory as bytes. A shard never gets
+        bigger than max_bytes, unless a single item is bigger than that.
+
+        callback(shard, totalSize) is called in the background thread as soon as a
+        shard is complete, e.g. to start its upload.
+        queuesize: batches (of about _BATCH_BYTES) waiting for the background
+        thread before add() blocks
+        compression: like for StreamWriter, by default from the extension of
+        pattern; max_bytes counts uncompressed bytes
+        """
+        if max_items is not None and max_items < 1:
+            raise ValueError(f"ERROR: max_items {max_items} < 1")
+        # bytes of an empty document; also checks mtype
+        buf = io.BytesIO()
+        with StreamWriter(buf, mtype=mtype):
+            pass
+        self._overhead = len(buf.getvalue())
+        if max_bytes is not None and max_bytes <= self._overhead:
+            raise ValueError(f"ERROR: max_bytes {max_bytes} too small")
+        self._validator = ItemValidator(mtype) if validate else None
+        self.mtype = mtype
+        self.pattern = pattern
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.pretty_print = pretty_print
+        self.compression = compression
+        self.callback = callback
+        self.shards: list[Union[Path, bytes]] = []  # filled by the background thread
+        self.totalSizes: list[int] = []
+        self._queue: queue.Queue = queue.Queue(queuesize)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._count = 0  # items in the current shard
+        self._bytes = 0  # size of the current shard
+        self._batch: list[bytes] = []  # not yet handed to the background thread
+        self._batch_count = 0
+        self._batch_bytes = 0
+
+    def __enter__(self) -> ShardedWriter:
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+
+    @property
+    def totalSize(self) -> int:
+        """items in all shards so far"""
+        return sum(self.totalSizes) + self._count
+
+    def open(self) -> None:
+        """
+        Starts the background thread; add() does that too if necessary.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def add(self, item: moduleItem) -> moduleItem:
+        registry.check_item(self.mtype, item.element)
+        if self._validator is not None:
+            self._validator.check(item)
+        self._put(_tostring(item.element, self.pretty_print), 1)
+        return item
+
+    def add_fragment(self, xml: bytes, count: int) -> None:
+        """
+        Serialized moduleItems, see StreamWriter.add_fragment(); a fragment is never
+        split, so all of its items go into the same shard.
+        """
+        if self._validator is not None:
+            self._validator.check_fragment(xml)
+        self._put(xml, count)
+
+    def close(self) -> None:
+        """
+        Finishes the last shard and waits until everything is written.
+        """
+        if self._thread is None:
+            return
+        if self._count:
+            self._finish()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._raise()
+
+    #
+    # private
+    #
+
+    def _put(self, xml: bytes, count: int) -> None:
+        self._raise()
+        self.open()
+        if self._count and (
+            (self.max_items is not None and self._count + count > self.max_items)
+            or (self.max_bytes is not None and self._bytes + len(xml) > self.max_bytes)
+        ):
+            self._finish()
+        if not self._count:
+            self._queue.put(("open", len(self.totalSizes)))
+            self._bytes = self._overhead
+        # one job per item would cost more than writing the item
+        self._batch.append(xml)
+        self._batch_count += count
+        self._batch_bytes += len(xml)
+        if self._batch_bytes >= _BATCH_BYTES:
+            self._flush()
+        self._count += count
+        self._bytes += len(xml)
+
+    def _flush(self) -> None:
+        if self._batch:
+            self._queue.put(("add", b"".join(self._batch), self._batch_count))
+            self._batch = []
+            self._batch_count = self._batch_bytes = 0
+
+    def _finish(self) -> None:
+        self._flush()
+        self._queue.put(("close",))
+        self.totalSizes.append(self._count)
+        self._count = 0
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        """
+        background thread; after an error, we only empty the queue
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                if job[0] == "open":
+                    if self.pattern is None:
+                        target = io.BytesIO()
+                    else:
+                        target = Path(self.pattern.format(job[1]))
+                    w = StreamWriter(
+                        target,
+                        mtype=self.mtype,
+                        pretty_print=self.pretty_print,
+                        compression=self.compression,
+                    )
+                    w.open()
+                elif job[0] == "add":
+                    w.add_fragment(job[1], job[2])
+                else:
+                    w.close()
+                    shard = target if self.pattern is not None else target.getvalue()
+                    self.shards.append(shard)
+                    if self.callback is not None:
+                        self.callback(shard, w.totalSize)
+            except BaseException as e:
+                self._error = e
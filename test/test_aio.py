@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from MpApi.Fieldmaker import RowBuilder, iterparse_items
+from MpApi.Fieldmaker.aio import aiter_documents
+import asyncio
+import io
+import pytest
+
+mapping = {"Bezeichnung": {"kind": "dataField", "name": "ObjTechnicalTermClb"}}
+
+
+async def rows(n, fail_at=None):
+    for ID in range(n):
+        if ID == fail_at:
+            raise ValueError("broken record")
+        yield {"objId": ID, "Bezeichnung": f"Laute {ID}"}
+        await asyncio.sleep(0)
+
+
+async def collect(records, **kwargs):
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    return [xml async for xml in aiter_documents(records, rb.build, mtype="Object", **kwargs)]
+
+
+def test_documents():
+    docs = asyncio.run(collect(rows(25), batchsize=10, processes=2))
+    assert len(docs) == 3
+    IDs = []
+    for xml in docs:
+        assert xml.startswith(b"<?xml")
+        IDs.extend(int(mi.element.get("id")) for mi in iterparse_items(io.BytesIO(xml)))
+    assert IDs == list(range(25))
+    assert b'totalSize="5"' in docs[2]
+
+
+def test_thread_executor():
+    with ThreadPoolExecutor(2) as executor:
+        docs = asyncio.run(collect(rows(5), batchsize=2, executor=executor))
+    assert len(docs) == 3
+
+
+def test_backpressure():
+    """a slow consumer stops the producer after maxsize batches"""
+    read = []
+
+    async def counted():
+        async for row in rows(100):
+            read.append(row)
+            yield row
+
+    async def run():
+        rb = RowBuilder(ID="objId", mapping=mapping)
+        with ThreadPoolExecutor(1) as executor:
+            gen = aiter_documents(
+                counted(), rb.build, mtype="Object", batchsize=10, executor=executor, maxsize=2
+            )
+            await gen.__anext__()
+            await asyncio.sleep(0.1)
+            await gen.aclose()
+
+    asyncio.run(run())
+    # one batch consumed, two in the queue, one waiting to be put
+    assert len(read) <= 50
+
+
+def test_error():
+    with ThreadPoolExecutor(1) as executor, pytest.raises(ValueError):
+        asyncio.run(collect(rows(25, fail_at=15), batchsize=10, executor=executor))
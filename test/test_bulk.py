@@ -0,0 +1,77 @@
+from MpApi.Fieldmaker import (
+    RowBuilder,
+    UnknownFieldKindError,
+    UnknownDataTypeError,
+    moduleItem,
+    dataField,
+    vocabularyReference,
+    repeatableGroup,
+)
+import pytest
+
+mapping = {
+    "Bezeichnung": {"kind": "dataField", "name": "ObjTechnicalTermClb", "dataType": "Clob"},
+    "Kategorie": {
+        "kind": "vocabularyReference",
+        "name": "ObjCategoryVoc",
+        "ID": 30349,
+        "instanceName": "ObjCategoryVgr",
+    },
+    "Titel": {"kind": "repeatableGroup", "name": "ObjObjectTitleGrp", "field": "TitleTxt"},
+    "Titeltyp": {"kind": "repeatableGroup", "name": "ObjObjectTitleGrp", "field": "TypeTxt"},
+}
+
+
+def test_rowBuilder():
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    rows = [
+        {
+            "objId": 1234,
+            "Bezeichnung": "Laute & Zither",
+            "Kategorie": 3206642,
+            "Titel": "tritantri vina",
+            "Titeltyp": "Originaltitel",
+        }
+    ]
+    miL = list(rb.build(rows))
+    assert len(miL) == 1
+
+    mi = moduleItem(ID=1234)
+    mi.add(dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute & Zither"))
+    vocRef = mi.add(
+        vocabularyReference(name="ObjCategoryVoc", ID=30349, instanceName="ObjCategoryVgr")
+    )
+    vocRef.item(ID=3206642)
+    rGrp = mi.add(repeatableGroup(name="ObjObjectTitleGrp"))
+    rGrpItem = rGrp.item()
+    rGrpItem.add(dataField(name="TitleTxt", value="tritantri vina"))
+    rGrpItem.add(dataField(name="TypeTxt", value="Originaltitel"))
+    rGrp.update_size()
+    assert miL[0].tostring() == mi.tostring()
+
+
+def test_rowBuilder_empty():
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    mi = next(rb.build([{"objId": 1, "Bezeichnung": "", "Titeltyp": "Originaltitel"}]))
+    assert mi.count_elements() == 5  # moduleItem, rGrp, rGrpItem, dataField, value
+    assert "ObjTechnicalTermClb" not in mi.tostring()
+    assert "vocabularyReference" not in mi.tostring()
+
+    mi = next(rb.build([{"objId": 1}]))
+    assert mi.count_elements() == 1
+
+
+def test_rowBuilder_csv(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("objId;Bezeichnung\n1;Laute\n2;Zither\n", encoding="utf-8")
+    rb = RowBuilder(ID="objId", mapping={"Bezeichnung": mapping["Bezeichnung"]})
+    miL = list(rb.build_csv(path, delimiter=";"))
+    assert len(miL) == 2
+    assert miL[1].xpath("/moduleItem/@id") == ["2"]
+
+
+def test_rowBuilder_errors():
+    with pytest.raises(UnknownFieldKindError):
+        RowBuilder(ID="objId", mapping={"a": {"kind": "blabla"}})
+    with pytest.raises(UnknownDataTypeError):
+        RowBuilder(ID="objId", mapping={"a": {"kind": "dataField", "dataType": "bla"}})
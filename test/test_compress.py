@@ -0,0 +1,113 @@
+from MpApi.Fieldmaker import (
+    ShardedWriter,
+    StreamWriter,
+    application,
+    dataField,
+    iterparse_items,
+    moduleItem,
+)
+from MpApi.Fieldmaker import records
+from MpApi.Fieldmaker.compress import compression_for, open_file
+from MpApi.Fieldmaker.index import ItemIndex
+import gzip
+import io
+from lxml import etree
+import pytest
+
+NSMAP = {"m": "http://www.zetcom.com/ria/ws/module"}
+
+
+def _item(ID):
+    mi = moduleItem(ID=ID)
+    mi.add(dataField(name="ObjInventarNrTxt", value=f"I C {ID}"))
+    mi.add(dataField(name="ObjTechnicalTermClb", value="Laute"))
+    return mi
+
+
+def _totalSize(xml):
+    doc = etree.fromstring(xml)
+    assert int(doc.xpath("//m:module/@totalSize", namespaces=NSMAP)[0]) == len(
+        doc.xpath("//m:moduleItem", namespaces=NSMAP)
+    )
+    return len(doc.xpath("//m:moduleItem", namespaces=NSMAP))
+
+
+def test_compression_for():
+    assert compression_for("export.xml") is None
+    assert compression_for("export.xml.gz") == "gzip"
+    assert compression_for("export.xml.ZST") == "zstd"
+    assert compression_for("export.xml.gz", "none") is None
+    assert compression_for("export.xml", "gzip") == "gzip"
+    assert compression_for(io.BytesIO()) is None
+    with pytest.raises(ValueError):
+        compression_for("export.xml", "bzip2")
+
+
+def test_tofile_fromfile(tmp_path):
+    a = _item(1).wrap(mtype="Object")
+    path = tmp_path / "export.xml.gz"
+    a.tofile(path, update_sizes=True)
+    assert path.read_bytes()[:2] == b"\x1f\x8b"
+    assert _totalSize(gzip.decompress(path.read_bytes())) == 1
+    b = application.fromfile(path)
+    assert b.get_item(1, mtype="Object") is not None
+
+    plain = tmp_path / "export.gz"
+    a.tofile(plain, compression="none")
+    assert application.fromfile(plain, compression="none").get_item(1, mtype="Object")
+
+    r = records.moduleItem(ID=2)
+    r.add(records.dataField(name="ObjInventarNrTxt", value="I C 2"))
+    ra = r.wrap(mtype="Object")
+    ra.tofile(tmp_path / "records.xml.gz", update_sizes=True)
+    assert _totalSize(gzip.decompress((tmp_path / "records.xml.gz").read_bytes())) == 1
+
+
+def test_streamWriter(tmp_path):
+    path = tmp_path / "export.xml.gz"
+    with StreamWriter(path, mtype="Object") as w:
+        for ID in range(1000):
+            w.add(_item(ID))
+    xml = gzip.decompress(path.read_bytes())
+    assert _totalSize(xml) == 1000
+    assert path.stat().st_size * 10 < len(xml)
+    # libxml2 reads the gzip members like one file
+    assert len(etree.parse(str(path)).xpath("//m:moduleItem", namespaces=NSMAP)) == 1000
+
+    IDs = [mi.element.get("id") for mi in iterparse_items(path, mtype="Object")]
+    assert IDs == [str(ID) for ID in range(1000)]
+    with open(path, "rb") as f:
+        assert len(list(iterparse_items(f, compression="gzip"))) == 1000
+
+    buf = io.BytesIO()
+    with StreamWriter(buf, mtype="Object", compression="gzip") as w:
+        w.add(_item(1))
+    assert _totalSize(gzip.decompress(buf.getvalue())) == 1
+
+
+def test_shardedWriter(tmp_path):
+    pattern = str(tmp_path / "upload-{}.xml.gz")
+    with ShardedWriter(pattern, mtype="Object", max_items=3) as w:
+        for ID in range(7):
+            w.add(_item(ID))
+    assert [_totalSize(gzip.decompress(p.read_bytes())) for p in w.shards] == [3, 3, 1]
+
+
+def test_index(tmp_path):
+    path = tmp_path / "export.xml.gz"
+    _item(1).wrap(mtype="Object").tofile(path)
+    with pytest.raises(ValueError):
+        ItemIndex.build(path)
+
+
+def test_zstd(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "export.xml.zst"
+    with StreamWriter(path, mtype="Object") as w:
+        for ID in range(10):
+            w.add(_item(ID))
+    with open_file(path) as f:
+        assert _totalSize(f.read()) == 10
+    assert len(list(iterparse_items(path))) == 10
+    _item(1).wrap(mtype="Object").tofile(tmp_path / "a.xml.zst")
+    assert application.fromfile(tmp_path / "a.xml.zst").get_item(1, mtype="Object")
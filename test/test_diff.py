@@ -0,0 +1,97 @@
+from MpApi.Fieldmaker import application, dataField, moduleItem, repeatableGroup
+from MpApi.Fieldmaker import vocabularyReference
+from MpApi.Fieldmaker import diff
+from MpApi.Fieldmaker.diff import diff_document, diff_item
+import time
+
+
+def make(ID=1234, term="Laute", titles=("vina", "tritantri vina"), category=3206642):
+    mi = moduleItem(ID=ID)
+    mi.add(dataField(name="ObjTechnicalTermClb", value=term))
+    mi.add(dataField(name="ObjInventarNrTxt", value="I C 7703"))
+    vocRef = mi.add(vocabularyReference(name="ObjCategoryVoc", ID=30349))
+    vocRef.item(ID=category)
+    rGrp = mi.add(repeatableGroup(name="ObjObjectTitleGrp"))
+    for n, title in enumerate(titles):
+        rGrp.item(ID=n + 1).add(dataField(name="TitleTxt", value=title))
+    rGrp.update_size()
+    return mi
+
+
+def parsed(mi):
+    """as it comes from the server: pretty, namespaced, with more details"""
+    a = application.fromstring(mi.wrap(mtype="Object").tostring(pretty_print=True))
+    old = a.get_item(mi.element.get("id"), mtype="Object")
+    old.get_field("ObjInventarNrTxt").element.attrib["dataType"] = "Varchar"
+    old.add(dataField(name="__lastModified", value="2024-01-01"))
+    return old
+
+
+def test_no_change():
+    assert diff_item(parsed(make()), make()) is None
+
+
+def test_changed_field():
+    change = diff_item(parsed(make()), make(term="Zither"))
+    names = [f.element.get("name") for f in change.iter_fields()]
+    assert names == ["ObjTechnicalTermClb"]
+    assert change.element.get("id") == "1234"
+    assert change.get_field("ObjTechnicalTermClb").element[0].text == "Zither"
+
+
+def test_collision(monkeypatch):
+    """signatures are compared as tuples, equal hashes don't hide a change"""
+    monkeypatch.setattr(diff, "hash", lambda obj: 0, raising=False)
+    change = diff_item(parsed(make()), make(term="Zither"))
+    assert [f.element.get("name") for f in change.iter_fields()] == ["ObjTechnicalTermClb"]
+
+
+def test_vocabularyReference():
+    change = diff_item(parsed(make()), make(category=1))
+    assert [f.element.get("name") for f in change.iter_fields()] == ["ObjCategoryVoc"]
+
+
+def test_group():
+    new = make(titles=("vina", "Vina", "new"))
+    change = diff_item(parsed(make()), new)
+    rGrp = change.get_field("ObjObjectTitleGrp")
+    assert [item.element.get("id") for item in rGrp.iter_items()] == ["2", "3"]
+    assert rGrp.element.get("size") == "2"
+    # the result is a copy
+    assert new.get_field("ObjObjectTitleGrp").element.get("size") == "3"
+
+
+def document(IDs, changed=()):
+    items = b"".join(
+        make(ID=ID, term="Zither" if ID in changed else "Laute").tostring(encoding="UTF-8")
+        for ID in IDs
+    )
+    return application.fromstring(
+        b"<application xmlns='http://www.zetcom.com/ria/ws/module'><modules>"
+        b"<module name='Object'>" + items + b"</module></modules></application>"
+    )
+
+
+def test_diff_document():
+    old = document(range(3))
+    new = document(range(4), changed={1})
+    d = diff_document(old, new, mtype="Object")
+    assert [mi.element.get("id") for mi in d.iter_items()] == ["1", "3"]
+    assert d.xpath("//module/@totalSize") == ["2"]
+    assert diff_document(old, old, mtype="Object") is None
+
+
+def test_linear():
+    """a group with many entries; quadratic matching would take very long"""
+
+    def timed(n):
+        old = parsed(make(titles=[f"t{i}" for i in range(n)]))
+        new = make(titles=[f"t{i}" for i in range(n - 1)] + ["changed"])
+        start = time.perf_counter()
+        change = diff_item(old, new)
+        elapsed = time.perf_counter() - start
+        assert len(change.get_field("ObjObjectTitleGrp").element) == 1
+        return elapsed
+
+    small, big = timed(2000), timed(20000)
+    assert big < small * 30
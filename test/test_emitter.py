@@ -0,0 +1,113 @@
+from MpApi.Fieldmaker import fm
+from MpApi.Fieldmaker import records
+from MpApi.Fieldmaker.emitter import Emitter, escape, escape_attrib
+import io
+import pytest
+
+
+def build_fm():
+    a = fm.application()
+    m = a.add(fm.modules()).add(fm.module(name="Object"))
+    mi = m.add(fm.moduleItem(ID=1234, hasAttachments=True, uuid="u-1"))
+    mi.add(fm.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute & <Zither>"))
+    mi.add(fm.dataField(name="ObjEmptyTxt", value=""))
+    mi.add(fm.dataField(name="ObjNoValueTxt"))
+    mi.add(fm.systemField(name="__id", dataType="Long", value="1234"))
+    mi.add(fm.virtualField(name="ObjUuidVrt", value="a\r\nb"))
+    vocRef = mi.add(fm.vocabularyReference(name="ObjCategoryVoc", ID=30349, instanceName='"V"'))
+    vocRef.item(ID=3206642, name="Musik\tinstrument")
+    vocRef.add(fm.vocabularyReferenceItem(ID=1, language="de", formattedValue="x"))
+    # size in the constructor, as in the Emitter (update_size() would put it last)
+    rGrp = mi.add(
+        fm.repeatableGroup(name="ObjObjectTitleGrp", instanceName="ObjTitleVgr", size=2)
+    )
+    rGrp.item(ID=1, uuid="a").add(fm.dataField(name="TitleTxt", value="tritantri vina"))
+    rGrp.item()
+    m.update_totalSize()
+    return a
+
+
+def emit(e):
+    with e.application(), e.modules(), e.module(name="Object", totalSize=1):
+        with e.moduleItem(ID=1234, hasAttachments=True, uuid="u-1"):
+            e.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute & <Zither>")
+            e.dataField(name="ObjEmptyTxt", value="")
+            e.dataField(name="ObjNoValueTxt")
+            e.systemField(name="__id", dataType="Long", value="1234")
+            e.virtualField(name="ObjUuidVrt", value="a\r\nb")
+            with e.vocabularyReference(name="ObjCategoryVoc", ID=30349, instanceName='"V"'):
+                e.vocabularyReferenceItem(ID=3206642, name="Musik\tinstrument")
+                e.vocabularyReferenceItem(ID=1, language="de", formattedValue="x")
+            with e.repeatableGroup(name="ObjObjectTitleGrp", instanceName="ObjTitleVgr", size=2):
+                with e.repeatableGroupItem(ID=1, uuid="a"):
+                    e.dataField(name="TitleTxt", value="tritantri vina")
+                with e.repeatableGroupItem():
+                    pass
+    return e
+
+
+@pytest.mark.parametrize(
+    "pretty_print,encoding",
+    [(True, "unicode"), (False, "unicode"), (True, "UTF-8"), (False, "utf-8")],
+)
+def test_same_as_lxml(pretty_print, encoding):
+    e = emit(Emitter(pretty_print=pretty_print, encoding=encoding))
+    a = build_fm()
+    assert e.getvalue() == a.tostring(pretty_print=pretty_print, encoding=encoding)
+
+
+def test_fileobj():
+    buf = io.BytesIO()
+    e = emit(Emitter(buf, pretty_print=False, encoding="UTF-8"))
+    e.flush()
+    assert buf.getvalue() == build_fm().tostring(pretty_print=False, encoding="UTF-8")
+
+
+def test_records_methods():
+    def make():
+        mi = records.moduleItem(ID=1, uuid="x")
+        mi.add(records.dataField(name="a<b", value="&\r"))
+        mi.add(records.virtualField(name="v"))
+        return mi
+
+    for pretty_print in (True, False):
+        for encoding in ("unicode", "UTF-8", "ISO-8859-1"):
+            mi = make()
+            xml = mi.tostring(pretty_print=pretty_print, encoding=encoding)
+            assert mi._element is None or encoding == "ISO-8859-1"
+            assert xml == make().tostring(
+                pretty_print=pretty_print, encoding=encoding, method="lxml"
+            )
+    with pytest.raises(ValueError):
+        records.dataField(name="x").tostring(method="sax")
+
+
+def test_escape():
+    assert escape('a&<>"\r\n\t') == 'a&amp;&lt;&gt;"&#13;\n\t'
+    assert escape_attrib('a&<>"\r\n\t') == "a&amp;&lt;&gt;&quot;&#13;&#10;&#9;"
+
+
+def test_errors():
+    e = Emitter()
+    with pytest.raises(fm.UnknownModuleTypeError):
+        e.module(name="Objekt")
+    with pytest.raises(fm.UnknownDataTypeError):
+        e.dataField(name="x", dataType="Text")
+    with pytest.raises(ValueError):
+        Emitter(encoding="latin-1")
+
+
+@pytest.mark.parametrize("value", ["a\x01b", "\x00", "a\x1fb", "\ufffe", "\ud800"])
+def test_not_xml(value):
+    """same ValueError as lxml, for text and attributes"""
+    with pytest.raises(ValueError):
+        fm.dataField(name="x", value=value)
+    with pytest.raises(ValueError):
+        Emitter().dataField(name="x", value=value)
+    with pytest.raises(ValueError):
+        Emitter().moduleItem(ID=1, uuid=value)
+    for method in ("emit", "lxml"):
+        with pytest.raises(ValueError):
+            records.dataField(name="x", value=value).tostring(method=method)
+    # allowed: tab, newline, carriage return, and everything from space on
+    assert escape("\t\n \ud7ff\ue000\ufffd\U0001f600") == "\t\n \ud7ff\ue000\ufffd\U0001f600"
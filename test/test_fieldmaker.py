@@ -14,6 +14,7 @@ from MpApi.Fieldmaker import UnknownModuleTypeError
 from mpapi.module import Module
 from lxml import etree
 from lxml.etree import _Element
+import io
 import pytest
 
 
@@ -246,3 +247,87 @@ def test_validate():
     # a = application()
     # m = Module(xml=a.tostring())
     # m.validate()
+
+
+def test_xmlschema_cached():
+    a = application()
+    a2 = application()
+    assert a.xmlschema is a2.xmlschema
+
+    # trees in module namespace are validated in place
+    df = dataField(name="InventarNrSTxt", value="I C 7703")
+    a = df.wrap(mtype="Object", ID=1234)
+    a.element = etree.fromstring(etree.tostring(a.element))
+    assert a.validate()
+
+
+def test_sizes():
+    mi = moduleItem(ID=1234)
+    rGrp = mi.add(repeatableGroup(name="ObjObjectNumberGrp"))
+    rGrp.item(ID=1)
+    rGrp.item(ID=2)
+    rGrp2 = mi.add(repeatableGroup(name="ObjObjectTitleGrp"))
+    rGrp2.item(ID=3)
+    # each group only counts its own items
+    assert rGrp.update_size() == 2
+    assert rGrp2.update_size() == 1
+    assert rGrp2.element.attrib["size"] == "1"
+
+    a = application()
+    m = a.add(modules()).add(module(name="Object"))
+    m.add(mi)
+    m.add(moduleItem(ID=1235))
+    assert m.update_totalSize() == 2
+
+    rGrp2.item(ID=4)
+    xml = a.tostring(update_sizes=True)
+    assert 'name="ObjObjectTitleGrp" size="2"' in xml
+    assert 'totalSize="2"' in xml
+
+
+def test_xpath_variables():
+    df = dataField(name="InventarNrSTxt", value="I C 7703")
+    a = df.wrap(mtype="Object", ID=1234)
+    assert len(a.xpath("/application/modules/module[@name = $mtype]", mtype="Object")) == 1
+    assert a.xpath("count(//moduleItem[@id = $ID])", ID="1234") == 1
+    assert a.xpath("/m:application") == []  # constructed elements have no namespace
+
+
+def test_serialization_modes():
+    df = dataField(name="InventarNrSTxt", value="I C 7703")
+    a = df.wrap(mtype="Object", ID=1234)
+    pretty = a.tostring()
+    assert isinstance(pretty, str)
+    compact = a.tostring(pretty_print=False, encoding="UTF-8")
+    assert isinstance(compact, bytes)
+    assert b"\n" not in compact
+    assert len(compact) < len(pretty.encode())
+
+    buf = io.BytesIO()
+    a.write_to(buf)
+    assert buf.getvalue() == compact
+
+
+def test_add_item():
+    a = application()
+    for ID in range(3):
+        a.add_item(moduleItem(ID=ID), mtype="Object")
+    a.add_item(moduleItem(ID=10), mtype="Multimedia")
+    assert a.totals == {"Object": 3, "Multimedia": 1}
+    assert a.update_totalSizes() == {"Object": 3, "Multimedia": 1}
+    assert a.xpath("/application/modules/module/@totalSize") == ["3", "1"]
+    assert len(a.element) == 1  # one modules element
+    assert a.get_module("Object").size == 3
+
+    # the item index is kept up to date
+    assert a.get_item(10, mtype="Multimedia") is not None
+    a.add_item(moduleItem(ID=11), mtype="Multimedia")
+    assert a.get_item(11).element.get("id") == "11"
+
+    # parsed documents
+    b = application.fromstring(a.tostring())
+    b.add_item(moduleItem(ID=3), mtype="Object")
+    b.add_item(moduleItem(ID=1), mtype="Person")
+    assert b.update_totalSizes() == {"Object": 4, "Multimedia": 2, "Person": 1}
+    with pytest.raises(UnknownModuleTypeError):
+        b.add_item(moduleItem(ID=1), mtype="Objekt")
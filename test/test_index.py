@@ -0,0 +1,77 @@
+from MpApi.Fieldmaker import application, dataField, moduleItem
+from MpApi.Fieldmaker.index import ItemIndex
+import os
+import pytest
+
+
+def export(path, n=20):
+    a = application()
+    for ID in range(n):
+        mi = a.add_item(moduleItem(ID=ID), mtype="Object")
+        mi.add(dataField(name="ObjInventarNrTxt", value=f"I C {ID} <&>"))
+    a.add_item(moduleItem(ID=5), mtype="Multimedia")  # empty: <moduleItem id="5"/>
+    a.update_totalSizes()
+    a.tofile(path)
+    return a
+
+
+def test_get_item(tmp_path):
+    path = tmp_path / "export.xml"
+    a = export(path)
+    with ItemIndex.open(path) as idx:
+        assert len(idx) == 21
+        mi = idx.get_item(7, mtype="Object")
+        assert mi.get_field("ObjInventarNrTxt").element[0].text == "I C 7 <&>"
+        assert mi.element.tag == "{http://www.zetcom.com/ria/ws/module}moduleItem"
+        assert len(idx.get_item(5, mtype="Multimedia").element) == 0
+        assert len(idx.get_item(5, mtype="Object").element) == 1
+        assert idx.get_item(99) is None
+        assert 19 in idx
+        IDs = [mi.element.get("id") for mi in idx.iter_items([9, 3, 99, 4], mtype="Object")]
+        assert IDs == ["3", "4", "9"]
+
+        # same as parsing the whole file
+        whole = application.fromfile(path).get_item(7, mtype="Object")
+        assert mi.tostring() == whole.tostring()
+
+
+def test_saved(tmp_path, monkeypatch):
+    path = tmp_path / "export.xml"
+    export(path)
+    ItemIndex.open(path).close()
+    assert ItemIndex.index_path(path).exists()
+
+    def fail(path):
+        raise AssertionError("scanned again")
+
+    monkeypatch.setattr(ItemIndex, "build", fail)
+    with ItemIndex.open(path) as idx:
+        assert idx.get_item(3, mtype="Object") is not None
+    monkeypatch.undo()
+
+    # a changed file gets a new index
+    export(path, n=30)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert ItemIndex.load(path) is None
+    with ItemIndex.open(path) as idx:
+        assert len(idx) == 31
+
+
+def test_compact(tmp_path):
+    path = tmp_path / "compact.xml"
+    a = export(path)
+    path.write_bytes(a.tostring(pretty_print=False, encoding="UTF-8"))
+    idx = ItemIndex.build(path)
+    assert idx.get_item(12, mtype="Object").element.get("id") == "12"
+    idx.close()
+
+
+def test_truncated(tmp_path):
+    path = tmp_path / "export.xml"
+    xml = export(path).tostring(encoding="UTF-8")
+    cut = xml.index(b"<moduleItem") + 30
+    for end in (cut, xml.index(b"<module ") + 7):  # in a moduleItem, in a tag
+        path.write_bytes(xml[:end])
+        with pytest.raises(ValueError, match="truncated"):
+            ItemIndex.build(path)
@@ -0,0 +1,70 @@
+from MpApi.Fieldmaker import dataField, fm, instrument, moduleItem, records
+import io
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    instrument.reset()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+
+def make(m):
+    mi = m.moduleItem(ID=1)
+    mi.add(m.dataField(name="ObjTechnicalTermClb", value="Laute"))
+    rGrp = mi.add(m.repeatableGroup(name="ObjObjectTitleGrp"))
+    rGrp.item(ID=1)
+    return mi.wrap(mtype="Object")
+
+
+def test_disabled():
+    init = fm.dataField.__init__
+    tostring = fm.baseField.tostring
+    make(fm).tostring()
+    assert instrument.snapshot() == {"created": {}, "calls": {}, "bytes": {}}
+
+    instrument.enable()
+    assert fm.dataField.__init__ is not init
+    instrument.disable()
+    assert fm.dataField.__init__ is init
+    assert fm.baseField.tostring is tostring
+    assert "__init__" not in records.dataField.__dict__  # inherited before
+
+
+def test_counts(tmp_path):
+    events = []
+    with instrument.enabled(callback=lambda *event: events.append(event)):
+        a = make(fm)
+        xml = a.tostring()
+        a.tofile(tmp_path / "a.xml")
+        buf = io.BytesIO()
+        a.write_to(buf)
+        r = make(records)
+        r.tofile(tmp_path / "r.xml")  # uses write_to inside; counted once
+
+    stats = instrument.snapshot()
+    created = stats["created"]
+    assert created["dataField"] == 1
+    assert created["repeatableGroupItem"] == 1
+    assert created["moduleItem"] == 1
+    assert created["records.dataField"] == 1
+    assert created["application"] == 1
+    assert stats["calls"]["tostring"]["count"] == 1
+    assert stats["calls"]["tofile"]["count"] == 2
+    assert stats["calls"]["write_to"]["count"] == 1
+    assert stats["bytes"]["tostring"] == len(xml)
+    assert stats["bytes"]["write_to"] == len(buf.getvalue())
+    assert stats["bytes"]["tofile"] == (tmp_path / "a.xml").stat().st_size + (
+        tmp_path / "r.xml"
+    ).stat().st_size
+    assert [(phase, cls) for phase, cls, seconds, size in events] == [
+        ("tostring", "application"),
+        ("tofile", "application"),
+        ("write_to", "application"),
+        ("tofile", "records.application"),
+    ]
+    # a snapshot is a copy
+    stats["created"].clear()
+    assert instrument.snapshot()["created"]["dataField"] == 1
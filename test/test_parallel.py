@@ -0,0 +1,36 @@
+from MpApi.Fieldmaker import (
+    RowBuilder,
+    iter_chunks,
+    iterparse_items,
+    write_document,
+    write_shards,
+)
+import io
+
+mapping = {"Bezeichnung": {"kind": "dataField", "name": "ObjTechnicalTermClb"}}
+rows = [{"objId": ID, "Bezeichnung": f"Laute {ID}"} for ID in range(25)]
+
+
+def test_iter_chunks():
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    chunks = list(iter_chunks(rows, rb.build, chunksize=10, processes=2))
+    assert [count for count, xml in chunks] == [10, 10, 5]
+    assert chunks[0][1].startswith(b"<moduleItem")
+
+
+def test_write_document():
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    buf = io.BytesIO()
+    assert write_document(buf, rows, rb.build, mtype="Object", chunksize=10, processes=2) == 25
+    buf.seek(0)
+    IDs = [mi.element.get("id") for mi in iterparse_items(buf)]
+    assert IDs == [str(ID) for ID in range(25)]
+
+
+def test_write_shards(tmp_path):
+    rb = RowBuilder(ID="objId", mapping=mapping)
+    pathL = write_shards(
+        str(tmp_path / "upload-{:02d}.xml"), rows, rb.build, mtype="Object", chunksize=10
+    )
+    assert [p.name for p in pathL] == ["upload-00.xml", "upload-01.xml", "upload-02.xml"]
+    assert len(list(iterparse_items(pathL[2]))) == 5
@@ -0,0 +1,120 @@
+from MpApi.Fieldmaker import (
+    application,
+    moduleItem,
+    dataField,
+    repeatableGroup,
+    repeatableGroupItem,
+    vocabularyReference,
+)
+
+xml = """<?xml version="1.0" encoding="UTF-8"?>
+<application xmlns="http://www.zetcom.com/ria/ws/module">
+  <modules>
+    <module name="Object" totalSize="2">
+      <moduleItem hasAttachments="true" id="993084" uuid="993084">
+        <systemField dataType="Long" name="__id">
+          <value>993084</value>
+        </systemField>
+        <dataField dataType="Clob" name="ObjTechnicalTermClb">
+          <value>Schalenhalslaute</value>
+        </dataField>
+        <vocabularyReference name="ObjCategoryVoc" id="30349" instanceName="ObjCategoryVgr">
+          <vocabularyReferenceItem id="3206642" name="Musikinstrument">
+            <formattedValue language="de">Musikinstrument</formattedValue>
+          </vocabularyReferenceItem>
+        </vocabularyReference>
+        <repeatableGroup name="ObjObjectTitleGrp" size="2">
+          <repeatableGroupItem id="26502225">
+            <dataField dataType="Varchar" name="TitleTxt">
+              <value>tritantri vina</value>
+            </dataField>
+          </repeatableGroupItem>
+          <repeatableGroupItem id="26502226">
+            <dataField dataType="Varchar" name="TitleTxt">
+              <value>vina</value>
+            </dataField>
+          </repeatableGroupItem>
+        </repeatableGroup>
+      </moduleItem>
+      <moduleItem id="993085"/>
+    </module>
+  </modules>
+</application>
+"""
+
+
+def test_fromstring():
+    a = application.fromstring(xml)
+    assert [mi.element.get("id") for mi in a.iter_items()] == ["993084", "993085"]
+    assert a.get_item(1234) is None
+    assert a.get_item(993085, mtype="Multimedia") is None
+
+    mi = a.get_item(993084, mtype="Object")
+    assert isinstance(mi, moduleItem)
+    df = mi.get_field("ObjTechnicalTermClb")
+    assert isinstance(df, dataField)
+    assert df.xpath("m:value/text()") == ["Schalenhalslaute"]
+    assert isinstance(mi.get_field("ObjCategoryVoc"), vocabularyReference)
+    assert mi.get_field("blabla") is None
+    assert len(list(mi.iter_fields())) == 4
+
+    rGrp = mi.get_field("ObjObjectTitleGrp")
+    assert isinstance(rGrp, repeatableGroup)
+    assert rGrp.size == 2
+    rgi = rGrp.get_item(26502226)
+    assert isinstance(rgi, repeatableGroupItem)
+    assert rgi.get_field("TitleTxt").xpath("m:value/text()") == ["vina"]
+    assert len(list(rGrp.iter_items())) == 2
+
+    # index is updated when we add through the wrapper
+    mi.add(dataField(name="ObjNewTxt", value="neu"))
+    assert mi.get_field("ObjNewTxt") is not None
+
+
+def test_fromfile(tmp_path):
+    path = tmp_path / "doc.xml"
+    path.write_text(xml, encoding="utf-8")
+    a = application.fromfile(path)
+    assert a.get_item(993084) is not None
+
+    # constructed documents work the same
+    a = dataField(name="InventarNrSTxt", value="I C 7703").wrap(mtype="Object", ID=1234)
+    assert a.get_item(1234).get_field("InventarNrSTxt") is not None
+
+
+def test_index_after_add():
+    a = application.fromstring(xml)
+    assert a.get_item(1234, mtype="Object") is None  # index is made here
+    a.get_module("Object").add(moduleItem(ID=1234))
+    assert a.get_item(1234, mtype="Object") is not None
+    a.add_item(moduleItem(ID=5678), mtype="Multimedia")
+    assert a.get_item(5678).element.get("id") == "5678"
+    # lxml directly
+    moduleN = a.get_module("Object").element
+    moduleN.append(moduleItem(ID=9999).element)
+    assert a.get_item(9999, mtype="Object") is not None
+
+
+def test_get_module_empty():
+    """adding modules to an empty application mustn't lose the new module"""
+    a = application()
+    m = a.get_module("Object")
+    assert a.get_module("Object") is m
+    for ID in range(3):
+        m.add(moduleItem(ID=ID))
+    assert a.totals == {"Object": 3}
+    a.update_totalSizes()
+    assert m.element.get("totalSize") == "3"
+
+
+def test_get_item_cached():
+    """get_item returns the same object, so its field index is kept"""
+    a = application.fromstring(xml)
+    mi = a.get_item(993084, mtype="Object")
+    mi.get_field("ObjTechnicalTermClb")
+    assert a.get_item(993084, mtype="Object") is mi
+    assert mi._index is not None
+    new = a.add_item(moduleItem(ID=1), mtype="Object")
+    assert a.get_item(1, mtype="Object") is new
+    a.reindex()
+    assert a.get_item(993084, mtype="Object") is not mi
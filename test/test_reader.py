@@ -0,0 +1,53 @@
+from MpApi.Fieldmaker import (
+    StreamWriter,
+    iterparse_items,
+    moduleItem,
+    dataField,
+)
+import io
+
+xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<application xmlns="http://www.zetcom.com/ria/ws/module">
+  <modules>
+    <module name="Object" totalSize="2">
+      <moduleItem id="1">
+        <dataField dataType="Clob" name="ObjTechnicalTermClb">
+          <value>Schalenhalslaute</value>
+        </dataField>
+        <dataField dataType="Varchar" name="ObjInventarNrTxt">
+          <value>I C 7703</value>
+        </dataField>
+      </moduleItem>
+      <moduleItem id="2"/>
+    </module>
+    <module name="Multimedia" totalSize="1">
+      <moduleItem id="3"/>
+    </module>
+  </modules>
+</application>
+"""
+
+
+def test_iterparse_items():
+    miL = list(iterparse_items(io.BytesIO(xml)))
+    assert [mi.element.get("id") for mi in miL] == ["1", "2", "3"]
+    # items we kept are still complete
+    assert miL[0].get_field("ObjInventarNrTxt") is not None
+
+    miL = list(iterparse_items(io.BytesIO(xml), mtype="Multimedia"))
+    assert [mi.element.get("id") for mi in miL] == ["3"]
+
+    mi = next(iterparse_items(io.BytesIO(xml), fields=["ObjTechnicalTermClb"]))
+    assert mi.get_field("ObjTechnicalTermClb") is not None
+    assert mi.get_field("ObjInventarNrTxt") is None
+
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / "stream.xml"
+    with StreamWriter(path, mtype="Object") as w:
+        for ID in range(100):
+            mi = moduleItem(ID=ID)
+            mi.add(dataField(name="ObjInventarNrTxt", value=f"I C {ID}"))
+            w.add(mi)
+    IDs = [mi.element.get("id") for mi in iterparse_items(path)]
+    assert IDs == [str(ID) for ID in range(100)]
@@ -0,0 +1,74 @@
+from MpApi.Fieldmaker import fm
+from MpApi.Fieldmaker import records
+from lxml.etree import _Element
+import io
+import pytest
+
+
+def make(m):
+    """same document with fm or records"""
+    mi = m.moduleItem(ID=1234, hasAttachments=False)
+    mi.add(m.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute & <Zither>"))
+    mi.add(m.dataField(name="ObjEmptyTxt", value=""))
+    mi.add(m.dataField(name="ObjNoValueTxt"))
+    mi.add(m.systemField(name="__id", dataType="Long", value="1234"))
+    mi.add(m.virtualField(name="ObjUuidVrt"))
+    vocRef = mi.add(
+        m.vocabularyReference(name="ObjCategoryVoc", ID=30349, instanceName="ObjCategoryVgr")
+    )
+    vocRef.item(ID=3206642, name="Musikinstrument", formattedValue="Musikinstrument")
+    vocRef.add(m.vocabularyReferenceItem(ID=1, language="de", formattedValue='"x"\r\n'))
+    rGrp = mi.add(m.repeatableGroup(name="ObjObjectTitleGrp", instanceName="ObjTitleVgr"))
+    rGrp.item(ID=1, uuid="a").add(m.dataField(name="TitleTxt", value="tritantri vina"))
+    rGrp.item()
+    rGrp.update_size()
+    rGrp2 = mi.add(m.repeatableGroup(name="ObjOtherGrp", instanceName="x", size=5))
+    return mi.wrap(mtype="Object")
+
+
+def test_same_output(tmp_path):
+    a = make(fm)
+    r = make(records)
+    assert r.tostring() == a.tostring()
+    assert r.tostring(pretty_print=False) == a.tostring(pretty_print=False)
+    assert r.tostring(encoding="UTF-8") == a.tostring(encoding="UTF-8")
+    assert r.tostring(update_sizes=True) == a.tostring(update_sizes=True)
+    bufs = []
+    for obj in (a, r):
+        buf = io.BytesIO()
+        obj.write_to(buf, xml_declaration=True)
+        bufs.append(buf.getvalue())
+    assert bufs[0] == bufs[1]
+    a.tofile(tmp_path / "fm.xml")
+    r.tofile(tmp_path / "records.xml")
+    assert (tmp_path / "fm.xml").read_bytes() == (tmp_path / "records.xml").read_bytes()
+    assert records.dataField(name="x").tostring() == fm.dataField(name="x").tostring()
+
+
+def test_materialize():
+    r = make(records)
+    xml = r.tostring()
+    assert r._element is None
+    assert r.count_elements() == make(fm).count_elements()
+    assert isinstance(r.element, _Element)
+    assert r.tostring() == xml
+
+    # changes made with lxml show up
+    r.element.attrib["foo"] = "bar"
+    assert 'foo="bar"' in r.tostring()
+
+    # materialized part in a record tree
+    mi = records.moduleItem(ID=1)
+    df = records.dataField(name="ObjTechnicalTermClb", value="Laute")
+    df.element.attrib["dataType"] = "Clob"
+    mi.add(df)
+    assert 'dataType="Clob"' in mi.tostring()
+
+
+def test_errors():
+    with pytest.raises(fm.UnknownDataTypeError):
+        records.dataField(name="x", dataType="bla")
+    with pytest.raises(fm.UnknownModuleTypeError):
+        records.module(name="bla")
+    with pytest.raises(TypeError):
+        records.application().wrap()
@@ -0,0 +1,235 @@
+from MpApi.Fieldmaker import fm
+from MpApi.Fieldmaker import (
+    ShardedWriter,
+    StreamWriter,
+    UnknownDataTypeError,
+    UnknownFieldError,
+    UnknownModuleTypeError,
+    dataField,
+    module,
+    moduleItem,
+    repeatableGroup,
+    registry,
+)
+from MpApi.Fieldmaker.emitter import Emitter
+from MpApi.Fieldmaker import records, schema
+from MpApi.Fieldmaker.vocabulary import VocabularyCache
+import io
+from MpApi.Fieldmaker.schema import Registry, xsd_facts
+import json
+import pytest
+
+XSD = b"""<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:simpleType name="dataTypeType">
+    <xs:restriction base="xs:string">
+      <xs:enumeration value="Clob"/>
+      <xs:enumeration value="Varchar"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:attributeGroup name="named">
+    <xs:attribute name="name" type="xs:string"/>
+  </xs:attributeGroup>
+  <xs:complexType name="fieldType">
+    <xs:attributeGroup ref="named"/>
+  </xs:complexType>
+  <xs:element name="dataField">
+    <xs:complexType><xs:complexContent><xs:extension base="fieldType">
+      <xs:attribute name="dataType" type="dataTypeType"/>
+    </xs:extension></xs:complexContent></xs:complexType>
+  </xs:element>
+  <xs:element name="module">
+    <xs:complexType>
+      <xs:attribute name="name">
+        <xs:simpleType><xs:restriction base="xs:string">
+          <xs:enumeration value="Object"/>
+          <xs:enumeration value="Multimedia"/>
+        </xs:restriction></xs:simpleType>
+      </xs:attribute>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+@pytest.fixture
+def fields(monkeypatch):
+    """fields for Object in the default registry, only for one test"""
+    fieldD = {
+        "ObjTechnicalTermClb": "Clob",
+        "ObjObjectTitleGrp": None,
+        "TitleTxt": "Varchar",
+    }
+    monkeypatch.setattr(registry, "fields", {"Object": fieldD})
+
+
+def test_multimedia():
+    assert module(name="Multimedia").mtype == "Multimedia"
+    with pytest.raises(UnknownModuleTypeError):
+        module(name="Mulimedia")
+    assert fm.known_module_types is registry.module_types
+
+
+def test_check_field():
+    r = Registry(dataTypes=("Clob",), fields={"Object": {"ObjTechnicalTermClb": "Clob"}})
+    assert "Object" in r.module_types
+    r.check_field("Object", "ObjTechnicalTermClb", "Clob")
+    r.check_field("Person", "PerNameTxt")  # we don't know the fields of Person
+    with pytest.raises(UnknownFieldError):
+        r.check_field("Object", "ObjTechnicalTermClx")
+    with pytest.raises(UnknownDataTypeError):
+        r.check_field("Object", "ObjTechnicalTermClb", "Varchar")
+    with pytest.raises(UnknownDataTypeError):
+        r.add_field("Object", "ObjSortLnu", "Long")
+
+
+def test_fromfile(tmp_path):
+    path = tmp_path / "fields.json"
+    path.write_text(
+        json.dumps(
+            {
+                "module_types": ["Literature"],
+                "dataTypes": ["Clob"],
+                "fields": {"Object": {"ObjTechnicalTermClb": "Clob"}},
+            }
+        )
+    )
+    r = Registry(module_types=("Object",))
+    module_types = r.module_types
+    r.load(path)
+    assert module_types == {"Object", "Literature"}  # changed in place
+    assert r.fields == {"Object": {"ObjTechnicalTermClb": "Clob"}}
+
+
+def test_from_xsd(tmp_path):
+    r = Registry.from_xsd(XSD, cache_dir=tmp_path)
+    assert r.dataTypes == {"Clob", "Varchar"}
+    assert r.module_types == {"Object", "Multimedia"}
+
+
+def test_xsd_cache(tmp_path, monkeypatch):
+    facts = xsd_facts(XSD, cache_dir=tmp_path)
+    assert facts == xsd_facts(XSD, use_cache=False)
+    assert len(list(tmp_path.glob("xsd-*.json"))) == 1
+
+    def fail(xsd):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(schema, "_extract_facts", fail)
+    assert xsd_facts(XSD, cache_dir=tmp_path) == facts
+    monkeypatch.undo()
+
+    # another xsd, another cache file
+    xsd_facts(XSD.replace(b"Varchar", b"Clob2"), cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("xsd-*.json"))) == 2
+
+    # a broken cache file is made again
+    for path in tmp_path.glob("xsd-*.json"):
+        path.write_text("{")
+    assert xsd_facts(XSD, cache_dir=tmp_path) == facts
+
+
+def test_xsd_cache_no_home(monkeypatch):
+    def no_home():
+        raise RuntimeError("Could not determine home directory.")
+
+    for name in ("FIELDMAKER_CACHE", "XDG_CACHE_HOME", "HOME"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(schema.Path, "home", no_home)
+    assert xsd_facts(XSD)["dataTypes"] == ["Clob", "Varchar"]
+
+
+def test_module_add(fields):
+    m = module(name="Object")
+    mi = moduleItem(ID=1)
+    mi.add(dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute"))
+    rGrp = mi.add(repeatableGroup(name="ObjObjectTitleGrp"))
+    rGrp.item(ID=1).add(dataField(name="TitleTxt", value="vina"))
+    m.add(mi)
+
+    bad = moduleItem(ID=2)
+    bad.add(repeatableGroup(name="ObjObjectTitleGrp")).item().add(
+        dataField(name="TitleTxx", value="vina")
+    )
+    with pytest.raises(UnknownFieldError):
+        m.add(bad)
+    # other module types are not checked
+    module(name="Multimedia").add(bad)
+
+
+def test_group_fields_per_module():
+    """fields in groups are known per module type, not per group (see LIMITATION)"""
+    r = Registry(
+        dataTypes=("Clob", "Varchar"),
+        fields={"Object": {"ObjObjectTitleGrp": None, "ObjTextGrp": None}},
+    )
+    mi = moduleItem(ID=1)
+    mi.add(repeatableGroup(name="ObjObjectTitleGrp")).item().add(
+        dataField(name="TitleTxt", dataType="Varchar", value="vina")
+    )
+    with pytest.raises(UnknownFieldError):
+        r.check_item("Object", mi.element)
+    r.add_field("Object", "TitleTxt", "Varchar")
+    r.check_item("Object", mi.element)
+
+    # the same field name in another group has the same definition
+    other = moduleItem(ID=2)
+    other.add(repeatableGroup(name="ObjTextGrp")).item().add(
+        dataField(name="TitleTxt", dataType="Clob", value="vina")
+    )
+    with pytest.raises(UnknownDataTypeError):
+        r.check_item("Object", other.element)
+    r.add_field("Object", "TitleTxt")  # no dataType: both pass
+    r.check_item("Object", mi.element)
+    r.check_item("Object", other.element)
+
+
+def test_emitter(fields):
+    e = Emitter()
+    with e.application(), e.modules(), e.module(name="Object"):
+        with e.moduleItem(ID=1):
+            e.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="Laute")
+            with pytest.raises(UnknownDataTypeError):
+                e.dataField(name="ObjTechnicalTermClb", dataType="Varchar", value="x")
+            with pytest.raises(UnknownFieldError):
+                e.repeatableGroup(name="ObjTitleGrp")
+
+
+def test_writers(fields):
+    good = moduleItem(ID=1)
+    good.add(dataField(name="ObjTechnicalTermClb", value="Laute"))
+    bad = moduleItem(ID=2)
+    bad.add(dataField(name="ObjTechnicalTermClx", value="Laute"))
+    with StreamWriter(io.BytesIO(), mtype="Object") as w:
+        w.add(good)
+        with pytest.raises(UnknownFieldError):
+            w.add(bad)
+    assert w.totalSize == 1
+    with ShardedWriter(mtype="Object") as w:
+        w.add(good)
+        with pytest.raises(UnknownFieldError):
+            w.add(bad)
+    assert w.totalSize == 1
+
+
+def test_records(fields):
+    mi = records.moduleItem(ID=1)
+    mi.add(records.dataField(name="ObjTechnicalTermClb", dataType="Clob", value="x"))
+    grp = mi.add(records.repeatableGroup(name="ObjObjectTitleGrp"))
+    grp.item().add(records.dataField(name="TitleTxx", value="vina"))
+    mi.tostring()  # no module, no check
+    with pytest.raises(UnknownFieldError):
+        mi.wrap(mtype="Object").tostring()
+    with pytest.raises(UnknownFieldError):
+        mi.wrap(mtype="Object").write_to(io.BytesIO())
+    mi.wrap(mtype="Multimedia").tostring()  # fields not known
+
+
+def test_vocabulary(fields):
+    vocs = VocabularyCache()
+    e = Emitter()
+    with e.application(), e.modules(), e.module(name="Object"), e.moduleItem(ID=1):
+        vocs.fragment(name="ObjCategoryVoc", ID=1)  # without mtype, no check
+        with pytest.raises(UnknownFieldError):
+            vocs.emit(e, name="ObjCategoryVoc", ID=1)
+    with pytest.raises(UnknownFieldError):
+        vocs.fragment(name="ObjCategoryVoc", ID=1, mtype="Object")
@@ -0,0 +1,45 @@
+from MpApi.Fieldmaker import (
+    Template,
+    dataField,
+    repeatableGroup,
+    repeatableGroupItem,
+    vocabularyReferenceItem,
+)
+import pytest
+
+
+def test_template():
+    rGrpItem = repeatableGroupItem(ID="{ID}")
+    rGrpItem.add(dataField(name="TitleTxt", dataType="Varchar", value="{title}"))
+    titleT = Template(rGrpItem)
+    assert titleT.names == {"ID", "title"}
+
+    rgi = titleT.new(ID=26502225, title="tritantri vina")
+    assert isinstance(rgi, repeatableGroupItem)
+
+    expected = repeatableGroupItem(ID=26502225)
+    expected.add(dataField(name="TitleTxt", dataType="Varchar", value="tritantri vina"))
+    assert rgi.tostring() == expected.tostring()
+
+    # instances don't share elements with each other or the prototype
+    rgi2 = titleT.new(ID=2, title="vina")
+    assert rgi.element is not rgi2.element
+    assert rgi.xpath("/repeatableGroupItem/@id") == ["26502225"]
+    assert rGrpItem.xpath("/repeatableGroupItem/@id") == ["{ID}"]
+
+    rGrp = repeatableGroup(name="ObjObjectTitleGrp")
+    rGrp.add(rgi)
+    rGrp.add(rgi2)
+    assert rGrp.update_size() == 2
+
+
+def test_template_values():
+    vriT = Template(
+        vocabularyReferenceItem(ID="{ID}", language="de", formattedValue="{label}")
+    )
+    with pytest.raises(TypeError):
+        vriT.new(ID=1)
+    with pytest.raises(TypeError):
+        vriT.new(ID=1, label="vorhanden", name="vorhanden")
+    vri = vriT.new(ID=4399323, label="vorhanden")
+    assert vri.xpath("/vocabularyReferenceItem/formattedValue/text()") == ["vorhanden"]
@@ -0,0 +1,185 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lxml import etree
+from mpapi.client import MpApi
+from MpApi.Fieldmaker import dataField, moduleItem
+from MpApi.Fieldmaker.uploader import Uploader, UploadError
+import pytest
+import socket
+import threading
+import time
+
+NSMAP = {"m": "http://www.zetcom.com/ria/ws/module"}
+
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Records posted documents; answers with the status codes in fail first.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.documents = []
+        self.paths = set()
+        self.fail = []
+        self.clients = set()
+        self.lock = threading.Lock()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.clients.add(self.client_address)
+            self.server.paths.add(self.path)
+            status = self.server.fail.pop(0) if self.server.fail else 200
+            if status in (200, "slow", "drop"):
+                self.server.documents.append(body)
+        if status == "drop":
+            # saved, but the connection breaks before the answer
+            self.close_connection = True
+            return
+        if status == "slow":
+            # saved, but the answer comes too late
+            time.sleep(0.3)
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = MockServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_api(server):
+    host, port = server.server_address
+    return MpApi(baseURL=f"http://{host}:{port}", user="user", pw="pw")
+
+
+def items(n):
+    for ID in range(n):
+        mi = moduleItem(ID=ID)
+        mi.add(dataField(name="ObjInventarNrTxt", value=f"I C {ID}"))
+        yield mi
+
+
+def test_upload(server):
+    progress = []
+    up = Uploader(
+        make_api(server),
+        mtype="Object",
+        batchsize=10,
+        workers=2,
+        progress=lambda n, rate: progress.append(n),
+    )
+    assert up.upload(items(25)) == 25
+    assert up.batches == 3
+    assert up.rate > 0
+    assert progress == [10, 20, 25]
+    assert server.paths == {"/ria-ws/application/module/Object"}
+
+    ids = []
+    for doc in server.documents:
+        docN = etree.fromstring(doc)
+        moduleN = docN.xpath("/m:application/m:modules/m:module", namespaces=NSMAP)[0]
+        assert moduleN.get("totalSize") == str(len(moduleN))  # not padded
+        ids.extend(int(mi.get("id")) for mi in moduleN)
+    assert sorted(ids) == list(range(25))
+    # one pooled session: connections are reused, not one per batch
+    assert len(server.clients) <= 2
+
+
+def test_retry(server):
+    server.fail = [500, 503]
+    up = Uploader(make_api(server), mtype="Object", batchsize=5, workers=1, backoff=0)
+    with pytest.raises(UploadError):  # a 5xx may come after saving
+        up.upload(items(5))
+    assert server.fail == [503]
+
+    server.fail = [500, 503]
+    up = Uploader(
+        make_api(server),
+        mtype="Object",
+        batchsize=5,
+        workers=1,
+        backoff=0,
+        retry_timeouts=True,
+    )
+    assert up.upload(items(5)) == 5
+    assert len(server.documents) == 1
+
+
+def test_retries_exhausted(server):
+    server.fail = [500] * 3
+    up = Uploader(
+        make_api(server),
+        mtype="Object",
+        batchsize=5,
+        workers=1,
+        retries=2,
+        backoff=0,
+        retry_timeouts=True,
+    )
+    with pytest.raises(UploadError):
+        up.upload(items(5))
+    assert server.documents == []
+
+
+def test_connection_refused():
+    """nothing was sent, so it is retried"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        host, port = s.getsockname()
+    api = MpApi(baseURL=f"http://{host}:{port}", user="user", pw="pw")
+    up = Uploader(api, mtype="Object", workers=1, retries=2, backoff=0)
+    with pytest.raises(UploadError, match="after 3 attempts"):
+        up.upload(items(1))
+
+
+def test_connection_dropped(server):
+    """the server saved the batch, but dropped the connection: no duplicate"""
+    server.fail = ["drop"]
+    up = Uploader(make_api(server), mtype="Object", workers=1, backoff=0)
+    with pytest.raises(UploadError, match="not retried"):
+        up.upload(items(1))
+    assert len(server.documents) == 1
+
+
+def test_client_error(server):
+    server.fail = [400]
+    up = Uploader(make_api(server), mtype="Object", workers=1, backoff=0)
+    with pytest.raises(UploadError):
+        up.upload(items(1))
+    assert server.fail == []  # no retry for 4xx
+
+
+def test_read_timeout(server):
+    """the server saved the batch, but answered too late: no duplicate"""
+    server.fail = ["slow"]
+    up = Uploader(make_api(server), mtype="Object", workers=1, backoff=0, timeout=0.1)
+    with pytest.raises(UploadError):
+        up.upload(items(1))
+    assert len(server.documents) == 1
+
+    server.fail = ["slow"]
+    up = Uploader(
+        make_api(server),
+        mtype="Object",
+        workers=1,
+        backoff=0,
+        timeout=0.1,
+        retry_timeouts=True,
+    )
+    assert up.upload(items(1)) == 1
+    assert len(server.documents) == 3  # sent twice, as asked for
@@ -0,0 +1,151 @@
+from MpApi.Fieldmaker import fm
+from MpApi.Fieldmaker import (
+    InvalidItemError,
+    ItemValidator,
+    StreamWriter,
+    dataField,
+    module,
+    moduleItem,
+)
+from lxml import etree
+import io
+import pytest
+
+# a small stand-in for module_1_6.xsd: moduleItem ids have to be numbers
+XSD = b"""<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns="http://www.zetcom.com/ria/ws/module"
+    targetNamespace="http://www.zetcom.com/ria/ws/module"
+    elementFormDefault="qualified">
+  <xs:element name="application">
+    <xs:complexType><xs:sequence>
+      <xs:element name="modules">
+        <xs:complexType><xs:sequence>
+          <xs:element name="module" maxOccurs="unbounded">
+            <xs:complexType>
+              <xs:sequence>
+                <xs:element name="moduleItem" minOccurs="0" maxOccurs="unbounded">
+                  <xs:complexType>
+                    <xs:sequence>
+                      <xs:element name="dataField" minOccurs="0" maxOccurs="unbounded">
+                        <xs:complexType>
+                          <xs:sequence><xs:element name="value" type="xs:string"/></xs:sequence>
+                          <xs:attribute name="name" type="xs:string"/>
+                          <xs:attribute name="dataType" type="xs:string"/>
+                        </xs:complexType>
+                      </xs:element>
+                    </xs:sequence>
+                    <xs:attribute name="id" type="xs:long"/>
+                  </xs:complexType>
+                </xs:element>
+              </xs:sequence>
+              <xs:attribute name="name" type="xs:string"/>
+              <xs:attribute name="totalSize" type="xs:long"/>
+            </xs:complexType>
+          </xs:element>
+        </xs:sequence></xs:complexType>
+      </xs:element>
+    </xs:sequence></xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+@pytest.fixture
+def schema(monkeypatch):
+    xmlschema = etree.XMLSchema(etree.fromstring(XSD))
+    monkeypatch.setattr(fm, "_xmlschema", xmlschema)
+    return xmlschema
+
+
+def item(ID, value="Laute"):
+    mi = moduleItem(ID=ID)
+    mi.add(dataField(name="ObjTechnicalTermClb", value=value))
+    return mi
+
+
+def test_check(schema):
+    v = ItemValidator("Object", schema=schema)
+    assert v.check(item(1))
+    with pytest.raises(InvalidItemError) as excinfo:
+        v.check(item("x1"))
+    assert excinfo.value.ID == "x1"
+    assert excinfo.value.mtype == "Object"
+    assert "x1" in str(excinfo.value)
+    # the skeleton is empty again
+    assert len(v._moduleN) == 0
+    with pytest.raises(InvalidItemError):
+        v.check(item(2, value=None))  # dataField without value
+
+    # parsed (namespaced) items are validated, but not moved
+    a = fm.application.fromstring(item(3).wrap(mtype="Object").tostring())
+    mi = a.get_item(3, mtype="Object")
+    assert v.check(mi)
+    assert mi.element.getparent() is not None
+
+
+def test_check_fragment(schema):
+    v = ItemValidator("Object")
+    ok = b"".join(etree.tostring(item(ID).element) for ID in range(3))
+    assert v.check_fragment(ok)
+    bad = ok + etree.tostring(item("x7").element)
+    with pytest.raises(InvalidItemError) as excinfo:
+        v.check_fragment(bad)
+    assert excinfo.value.ID == "x7"
+
+
+def test_module_validate(schema):
+    m = module(name="Object", validate=True)
+    m.add(item(1))
+    with pytest.raises(InvalidItemError):
+        m.add(item("x2"))
+    assert m.size == 1
+    assert module(name="Object").validator is None
+
+
+def test_streamWriter_validate(schema):
+    buf = io.BytesIO()
+    with pytest.raises(InvalidItemError):
+        with StreamWriter(buf, mtype="Object", validate=True) as w:
+            w.add(item(1))
+            w.add(item("x2"))
+    assert w.totalSize == 1
+    assert b"x2" not in buf.getvalue()
+
+
+def test_unknown_mtype():
+    with pytest.raises(fm.UnknownModuleTypeError):
+        ItemValidator("Objekt", schema=True)
+
+
+def test_add_to_parsed(schema):
+    """new elements in a parsed document get its namespace"""
+    a = moduleItem(ID=1).wrap(mtype="Object")
+    a.update_sizes()
+    b = fm.application.fromstring(a.tostring())
+    mi = b.add_item(moduleItem(ID=2), mtype="Object")
+    mi.add(dataField(name="ObjInventarNrTxt", value="I C 2"))
+    b.get_item(1, mtype="Object").add(dataField(name="ObjTechnicalTermClb", value="Laute"))
+    b.update_totalSizes()
+    assert b.validate()
+    assert len(b.xpath("//m:dataField")) == 2
+
+
+def test_validate_mixed(schema):
+    """elements without namespace appended with lxml directly"""
+    a = moduleItem(ID=1).wrap(mtype="Object")
+    b = fm.application.fromstring(a.tostring())
+    moduleN = b.get_module("Object").element
+    moduleN.append(moduleItem(ID=2).element)
+    assert b.validate()
+    moduleN.append(moduleItem(ID=3).element)
+    moduleN[-1].set("id", "x")
+    with pytest.raises(etree.DocumentInvalid):
+        b.validate()
+
+
+def test_check_mixed(schema):
+    a = moduleItem(ID=1).wrap(mtype="Object")
+    mi = fm.application.fromstring(a.tostring()).get_item(1, mtype="Object")
+    mi.element.append(dataField(name="ObjInventarNrTxt", value="I C 1").element)
+    assert ItemValidator("Object").check(mi)
@@ -0,0 +1,67 @@
+from MpApi.Fieldmaker import fm
+from MpApi.Fieldmaker.emitter import Emitter
+from MpApi.Fieldmaker.vocabulary import VocabularyCache
+
+STATUS = dict(
+    name="ObjPublicationStatusVoc",
+    ID=30432,
+    instanceName="ObjPublicationStatusVgr",
+    itemID=4399323,
+    itemName="vorhanden",
+    language="de",
+    formattedValue="vorhanden",
+)
+
+
+def built():
+    vocRef = fm.vocabularyReference(
+        name="ObjPublicationStatusVoc", ID=30432, instanceName="ObjPublicationStatusVgr"
+    )
+    vocRef.add(
+        fm.vocabularyReferenceItem(
+            ID=4399323, name="vorhanden", language="de", formattedValue="vorhanden"
+        )
+    )
+    return vocRef
+
+
+def test_new():
+    vocs = VocabularyCache()
+    a = vocs.new(**STATUS)
+    b = vocs.new(**STATUS)
+    assert a.element is not b.element
+    assert a.tostring() == built().tostring()
+    assert vocs.prototype(**STATUS) is vocs.prototype(**STATUS)
+    info = vocs.cache_info()["prototypes"]
+    assert (info.hits, info.misses) == (3, 1)
+
+
+def test_emit():
+    vocs = VocabularyCache()
+    for pretty_print in (True, False):
+        mi = fm.moduleItem(ID=1)
+        mi.add(built())
+        mi.add(fm.vocabularyReference(name="ObjCategoryVoc", ID=30349))
+        a = mi.wrap(mtype="Object")
+
+        e = Emitter(pretty_print=pretty_print)
+        with e.application(), e.modules(), e.module(name="Object"):
+            with e.moduleItem(ID=1):
+                vocs.emit(e, **STATUS)
+                vocs.emit(e, name="ObjCategoryVoc", ID=30349)
+        assert e.getvalue() == a.tostring(pretty_print=pretty_print)
+    # a fragment at level 0 is a document of its own
+    assert vocs.fragment(pretty_print=True, **STATUS) == built().tostring()
+
+
+def test_bounded():
+    vocs = VocabularyCache(maxsize=2)
+    for itemID in range(10):
+        vocs.new(name="ObjCategoryVoc", itemID=itemID)
+    info = vocs.cache_info()["prototypes"]
+    assert info.currsize == 2
+    assert vocs.hit_rate == 0.0
+    vocs.new(name="ObjCategoryVoc", itemID=9)
+    assert vocs.hit_rate == 1 / 11
+    vocs.clear()
+    assert vocs.cache_info()["prototypes"].currsize == 0
@@ -0,0 +1,167 @@
+from MpApi.Fieldmaker import ShardedWriter, StreamWriter, moduleItem, dataField
+from MpApi.Fieldmaker import UnknownModuleTypeError
+from lxml import etree
+import io
+import pytest
+
+NSMAP = {"m": "http://www.zetcom.com/ria/ws/module"}
+
+
+class _Pipe(io.RawIOBase):
+    """not seekable, like a socket or stdout"""
+
+    def __init__(self):
+        self.data = b""
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += bytes(b)
+        return len(b)
+
+
+def test_streamWriter():
+    buf = io.BytesIO()
+    with StreamWriter(buf, mtype="Object") as w:
+        for ID in range(3):
+            mi = moduleItem(ID=ID)
+            mi.add(dataField(name="InventarNrSTxt", value=f"I C {ID}"))
+            w.add(mi)
+    assert w.totalSize == 3
+    doc = etree.fromstring(buf.getvalue())
+    assert int(doc.xpath("/m:application/m:modules/m:module/@totalSize", namespaces=NSMAP)[0]) == 3
+    assert len(doc.xpath("//m:moduleItem", namespaces=NSMAP)) == 3
+
+    with pytest.raises(UnknownModuleTypeError):
+        StreamWriter(buf, mtype="blabla")
+
+
+def test_streamWriter_path(tmp_path):
+    path = tmp_path / "stream.xml"
+    with StreamWriter(path, mtype="Object") as w:
+        w.add(moduleItem(ID=1234))
+    doc = etree.parse(str(path))
+    assert int(doc.xpath("//m:module/@totalSize", namespaces=NSMAP)[0]) == 1
+
+
+def test_streamWriter_unseekable():
+    pipe = _Pipe()
+    with StreamWriter(pipe, mtype="Object") as w:
+        w.add(moduleItem(ID=1))
+        w.add(moduleItem(ID=2))
+    doc = etree.fromstring(pipe.data)
+    assert int(doc.xpath("//m:module/@totalSize", namespaces=NSMAP)[0]) == 2
+
+
+def _item(ID):
+    mi = moduleItem(ID=ID)
+    mi.add(dataField(name="InventarNrSTxt", value=f"I C {ID}"))
+    return mi
+
+
+def _sizes(shards):
+    sizeL = []
+    for xml in shards:
+        doc = etree.fromstring(xml)
+        totalSize = int(doc.xpath("//m:module/@totalSize", namespaces=NSMAP)[0])
+        assert totalSize == len(doc.xpath("//m:moduleItem", namespaces=NSMAP))
+        sizeL.append(totalSize)
+    return sizeL
+
+
+def test_shardedWriter_items():
+    done = []
+    with ShardedWriter(
+        mtype="Object", max_items=4, callback=lambda shard, size: done.append(size)
+    ) as w:
+        for ID in range(10):
+            w.add(_item(ID))
+    assert w.totalSizes == [4, 4, 2]
+    assert w.totalSize == 10
+    assert _sizes(w.shards) == [4, 4, 2]
+    assert done == [4, 4, 2]
+    IDs = [
+        ID
+        for xml in w.shards
+        for ID in etree.fromstring(xml).xpath("//m:moduleItem/@id", namespaces=NSMAP)
+    ]
+    assert IDs == [str(ID) for ID in range(10)]
+
+
+def test_shardedWriter_bytes(tmp_path):
+    max_bytes = 1000
+    pattern = str(tmp_path / "upload-{:02d}.xml")
+    with ShardedWriter(pattern, mtype="Object", max_bytes=max_bytes) as w:
+        for ID in range(20):
+            w.add(_item(ID))
+    assert len(w.shards) > 1
+    assert w.shards[0] == tmp_path / "upload-00.xml"
+    for path in w.shards:
+        assert path.stat().st_size <= max_bytes
+    assert sum(_sizes(path.read_bytes() for path in w.shards)) == 20
+    # the next item wouldn't have fit
+    item = len(etree.tostring(_item(1).element, encoding="UTF-8"))
+    assert w.shards[0].stat().st_size + item > max_bytes
+
+
+def test_shardedWriter_empty():
+    with ShardedWriter(mtype="Object", max_items=2) as w:
+        pass
+    assert w.shards == []
+    with pytest.raises(UnknownModuleTypeError):
+        ShardedWriter(mtype="blabla")
+    with pytest.raises(ValueError):
+        ShardedWriter(mtype="Object", max_bytes=10)
+
+
+def test_shardedWriter_error(tmp_path):
+    pattern = str(tmp_path / "missing" / "upload-{}.xml")
+    with pytest.raises(FileNotFoundError):
+        with ShardedWriter(pattern, mtype="Object", max_items=1) as w:
+            for ID in range(100):
+                w.add(_item(ID))
+    assert w._thread is None
+
+
+def test_shardedWriter_without_open():
+    """without with or open(), add() starts the thread; it mustn't block"""
+    w = ShardedWriter(mtype="Object", max_items=5, queuesize=1)
+    for ID in range(50):
+        w.add(_item(ID))
+    w.close()
+    assert _sizes(w.shards) == [5] * 10
+    ShardedWriter(mtype="Object").close()  # nothing added, nothing to do
+
+
+def test_streamWriter_totalSize():
+    pipe = _Pipe()
+    with StreamWriter(pipe, mtype="Object", totalSize=2) as w:
+        w.add(moduleItem(ID=1))
+        w.add(moduleItem(ID=2))
+    doc = etree.fromstring(pipe.data)
+    assert doc.xpath("//m:module/@totalSize", namespaces=NSMAP) == ["2"]
+
+    with pytest.raises(ValueError):
+        with StreamWriter(io.BytesIO(), mtype="Object", totalSize=2) as w:
+            w.add(moduleItem(ID=1))
+
+
+def test_xmlns_once():
+    """items inherit the default namespace, they don't declare it again"""
+    xmlns = b'xmlns="http://www.zetcom.com/ria/ws/module"'
+    parsed = moduleItem.from_element(etree.fromstring(etree.tostring(_item(2).element)))
+    for pretty_print in (False, True):
+        buf = io.BytesIO()
+        with StreamWriter(buf, mtype="Object", pretty_print=pretty_print) as w:
+            w.add(_item(1))
+            w.add(parsed)
+        assert buf.getvalue().count(xmlns) == 1
+        doc = etree.fromstring(buf.getvalue())
+        assert len(doc.xpath("//m:moduleItem/m:dataField", namespaces=NSMAP)) == 2
+
+    with ShardedWriter(mtype="Object", max_items=2) as w:
+        for ID in range(3):
+            w.add(_item(ID))
+    assert [xml.count(xmlns) for xml in w.shards] == [1, 1]
+    assert _sizes(w.shards) == [2, 1]